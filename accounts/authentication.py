@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import UserProfile
+
+
+@dataclass(frozen=True)
+class ProfileClaims:
+    """The profile data request handling needs: ids plus editorial flags."""
+
+    id: int
+    user_id: int
+    can_create_learning_paths: bool
+    can_manage_all_learning_paths: bool
+
+    @classmethod
+    def from_profile(cls, profile: UserProfile) -> ProfileClaims:
+        return cls(
+            id=profile.id,
+            user_id=profile.user_id,
+            can_create_learning_paths=profile.can_create_learning_paths,
+            can_manage_all_learning_paths=profile.can_manage_all_learning_paths,
+        )
+
+
+class ClaimsUser(TokenUser):
+    """Request principal backed by access-token claims instead of `auth.User`.
+
+    Profile claims are written at login and re-read from the database by
+    `ClaimsTokenRefreshSerializer` whenever an access token is refreshed, so
+    editorial flag changes reach a user within `ACCESS_TOKEN_LIFETIME`.
+    `is_staff` and `is_active` are not taken from the token: they are read
+    from the user row (once per request) when something asks for them, which
+    only staff endpoints and writes do. The full `UserProfile` row is only
+    loaded (once per request) when something actually reads `profile`.
+    """
+
+    @cached_property
+    def id(self) -> int:
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self) -> int:
+        return self.id
+
+    @cached_property
+    def _account(self) -> dict | None:
+        # From the primary: authorization must not lag behind a revocation.
+        return (
+            get_user_model()
+            .objects.db_manager(DEFAULT_DB_ALIAS)
+            .filter(pk=self.id)
+            .values("is_active", "is_staff")
+            .first()
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self._account and self._account["is_active"])
+
+    @property
+    def is_staff(self) -> bool:
+        return self.is_active and self._account["is_staff"]
+
+    @cached_property
+    def profile_claims(self) -> ProfileClaims | None:
+        profile_id = self.token.get("profile_id")
+        if profile_id is None:
+            # Tokens issued before the claim existed.
+            try:
+                return ProfileClaims.from_profile(self.profile)
+            except UserProfile.DoesNotExist:
+                return None
+        return ProfileClaims(
+            id=profile_id,
+            user_id=self.id,
+            can_create_learning_paths=bool(self.token.get("can_create_learning_paths")),
+            can_manage_all_learning_paths=bool(
+                self.token.get("can_manage_all_learning_paths")
+            ),
+        )
+
+    @cached_property
+    def profile(self) -> UserProfile:
+        profile_id = self.token.get("profile_id")
+        if profile_id is not None:
+            return UserProfile.objects.get(pk=profile_id)
+        return UserProfile.objects.get(user_id=self.id)
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """Authenticate bearer tokens without loading the user on reads.
+
+    Writes check that the user still exists and is active, so a deactivated
+    or deleted account cannot change data with an unexpired access token.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and request.method not in SAFE_METHODS:
+            user, _token = result
+            if not user.is_active:
+                raise AuthenticationFailed(
+                    _("User is inactive or no longer exists."), code="user_inactive"
+                )
+        return result
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return ClaimsUser(validated_token)
+
+
+def get_profile_claims(user) -> ProfileClaims | None:
+    """Return profile claims for any authenticated user, or `None`.
+
+    Claims-backed principals answer from their token; session or
+    force-authenticated `auth.User` instances fall back to `user.profile`.
+    """
+    if not user or not user.is_authenticated:
+        return None
+    if isinstance(user, ClaimsUser):
+        return user.profile_claims
+    try:
+        return ProfileClaims.from_profile(user.profile)
+    except UserProfile.DoesNotExist:
+        return None
+
+
+def authenticate_request(request):
+    """Authenticate a Django request ahead of its DRF view, e.g. in middleware.
+
+    Returns the session user or the user of the request's credentials, or
+    `None` for anonymous requests and invalid credentials.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        drf_request = Request(
+            request,
+            authenticators=[
+                auth() for auth in drf_settings.DEFAULT_AUTHENTICATION_CLASSES
+            ],
+        )
+        try:
+            user = drf_request.user
+        except APIException:
+            return None
+    return user if user.is_authenticated else None
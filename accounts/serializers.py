@@ -4,7 +4,12 @@ from typing import Any
 
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
 
 from .models import UserProfile
 
@@ -33,16 +38,23 @@ class RegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
+def add_user_claims(token, user) -> None:
+    """Claims read by `accounts.authentication.ClaimsUser` so requests can skip
+    loading the user and profile rows. `is_staff` is for the SPA only; the
+    backend checks it against the user row."""
+    token["is_staff"] = user.is_staff
+    profile = getattr(user, "profile", None)
+    if profile:
+        token["profile_id"] = profile.id
+        token["can_create_learning_paths"] = profile.can_create_learning_paths
+        token["can_manage_all_learning_paths"] = profile.can_manage_all_learning_paths
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        profile = getattr(user, "profile", None)
-        if profile:
-            token["can_create_learning_paths"] = profile.can_create_learning_paths
-            token["can_manage_all_learning_paths"] = (
-                profile.can_manage_all_learning_paths
-            )
+        add_user_claims(token, user)
         return token
 
     def validate(self, attrs):
@@ -63,3 +75,42 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         else:
             data["profile"] = None
         return data
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Issue access tokens with claims re-read from the database.
+
+    simplejwt copies every claim of the refresh token into the new access
+    token, which would keep the flags of the login for the whole refresh
+    lifetime. Deleted and inactive users are refused a new access token.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = (
+            get_user_model()
+            .objects.select_related("profile")
+            .filter(
+                **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+            )
+            .first()
+        )
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+
+        access = refresh.access_token
+        add_user_claims(access, user)
+        data = {"access": str(access)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            add_user_claims(refresh, user)
+            data["refresh"] = str(refresh)
+        return data
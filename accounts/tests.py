@@ -1,3 +1,107 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+
+class ClaimsAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="editor",
+            email="editor@example.com",
+            password="pass1234",
+        )
+        self.profile = self.user.profile
+        self.profile.can_create_learning_paths = True
+        self.profile.save()
+
+    def _login(self) -> str:
+        return self._tokens()["access"]
+
+    def _tokens(self) -> dict:
+        response = self.client.post(
+            reverse("token-obtain-pair"),
+            {"username": "editor", "password": "pass1234"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def _refresh(self, refresh: str):
+        return self.client.post(
+            reverse("token-refresh"), {"refresh": refresh}, format="json"
+        )
+
+    def test_read_endpoints_skip_user_and_profile_queries(self):
+        access = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        for url in (reverse("learning-path-list"), reverse("learning-path-progress-list")):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            touched = " ".join(query["sql"] for query in queries)
+            self.assertNotIn('"auth_user"', touched)
+            self.assertNotIn('"accounts_userprofile"', touched)
+
+    def test_claims_drive_permissions_and_ownership(self):
+        access = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        response = self.client.post(
+            reverse("learning-path-list"), {"title": "Mine"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["owner"], self.profile.id)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+        response = self.client.get(reverse("learning-path-progress-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rereads_flags_and_refuses_inactive_users(self):
+        refresh = self._tokens()["refresh"]
+        self.profile.can_create_learning_paths = False
+        self.profile.save()
+        response = self._refresh(refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        claims = AccessToken(response.data["access"])
+        self.assertIs(claims["can_create_learning_paths"], False)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self._refresh(refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.delete()
+        response = self._refresh(refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_writes_and_staff_checks_read_the_account(self):
+        self.user.is_staff = True
+        self.user.save()
+        access = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        stats_url = reverse("monitoring-stats")
+        self.assertEqual(self.client.get(stats_url).status_code, status.HTTP_200_OK)
+
+        self.user.is_staff = False
+        self.user.save()
+        self.assertEqual(
+            self.client.get(stats_url).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(
+            reverse("learning-path-list"), {"title": "Late"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.delete()
+        response = self.client.post(
+            reverse("learning-path-list"), {"title": "Gone"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
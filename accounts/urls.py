@@ -1,11 +1,10 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 
-from .views import LoginView, RegistrationView
+from .views import LoginView, RefreshView, RegistrationView
 
 
 urlpatterns = [
     path("auth/register/", RegistrationView.as_view(), name="auth-register"),
     path("auth/token/", LoginView.as_view(), name="token-obtain-pair"),
-    path("auth/token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
+    path("auth/token/refresh/", RefreshView.as_view(), name="token-refresh"),
 ]
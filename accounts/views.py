@@ -1,8 +1,12 @@
 from rest_framework.generics import CreateAPIView
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .serializers import CustomTokenObtainPairSerializer, RegistrationSerializer
+from .serializers import (
+    ClaimsTokenRefreshSerializer,
+    CustomTokenObtainPairSerializer,
+    RegistrationSerializer,
+)
 
 
 class RegistrationView(CreateAPIView):
@@ -12,3 +16,7 @@ class RegistrationView(CreateAPIView):
 
 class LoginView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+
+
+class RefreshView(TokenRefreshView):
+    serializer_class = ClaimsTokenRefreshSerializer
@@ -0,0 +1,167 @@
+"""Cached index of the private learning paths each profile can see.
+
+Public paths are matched on the `is_public` column directly; only the
+private side (enrollments, group assignments and ownership) is indexed, so
+visibility checks never join the enrollment or group tables. Each profile's
+entry stores its direct enrollments, owned paths and group ids; the paths
+assigned to each group are cached once per group and merged in on read, so
+assigning a path to a department touches one cache key, not one per member.
+Signals in `learning.signals` drop the affected entries on every change,
+and again once the change commits; entries are always loaded from the
+primary database.
+
+The index is only cached while `LEARNING_ACCESS_CACHE_TIMEOUT` is positive,
+which by default needs a shared cache: with a per-process one, revocations
+would only reach the worker that made them. Otherwise it is loaded for
+every check.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.models import UserProfile
+from main.db_routing import use_primary
+
+from .models import LearningPath, LearningPathEnrollment
+
+_memberships = get_user_model().groups.through
+
+
+@dataclass(frozen=True)
+class PathAccessIndex:
+    assigned: frozenset[int]
+    owned: frozenset[int]
+
+    @property
+    def private(self) -> frozenset[int]:
+        return self.assigned | self.owned
+
+    def visible_filter(self) -> Q:
+        return Q(is_public=True) | Q(id__in=self.private)
+
+    def can_view(self, learning_path: LearningPath) -> bool:
+        return learning_path.is_public or learning_path.id in self.private
+
+    def is_assigned(self, learning_path: LearningPath) -> bool:
+        return learning_path.is_public or learning_path.id in self.assigned
+
+
+@dataclass(frozen=True)
+class _ProfileAccess:
+    enrolled: frozenset[int]
+    owned: frozenset[int]
+    group_ids: frozenset[int]
+
+
+def _cache_key(profile_id: int) -> str:
+    return f"learning:access:{profile_id}"
+
+
+def _group_cache_key(group_id: int) -> str:
+    return f"learning:group-paths:{group_id}"
+
+
+def get_access_index(profile_id: int, user_id: int | None = None) -> PathAccessIndex:
+    """Return the access index of a profile.
+
+    Pass `user_id` when it is already known (it is part of `ProfileClaims`)
+    so a cold entry reads group memberships without touching the profile.
+    """
+    access = _get_profile_access(profile_id, user_id)
+    assigned = set(access.enrolled)
+    for paths in _get_group_paths(access.group_ids).values():
+        assigned |= paths
+    return PathAccessIndex(assigned=frozenset(assigned), owned=access.owned)
+
+
+def _get_profile_access(profile_id: int, user_id: int | None) -> _ProfileAccess:
+    timeout = settings.LEARNING_ACCESS_CACHE_TIMEOUT
+    if not timeout:
+        return _load_profile_access(profile_id, user_id)
+    key = _cache_key(profile_id)
+    access = cache.get(key)
+    if access is None:
+        with use_primary():
+            access = _load_profile_access(profile_id, user_id)
+        cache.set(key, access, timeout=timeout)
+    return access
+
+
+def _load_profile_access(profile_id: int, user_id: int | None) -> _ProfileAccess:
+    memberships = _memberships.objects.filter(
+        user_id=user_id
+        if user_id is not None
+        else UserProfile.objects.filter(pk=profile_id).values("user_id")[:1]
+    )
+    return _ProfileAccess(
+        enrolled=frozenset(
+            LearningPathEnrollment.objects.filter(
+                user_profile_id=profile_id
+            ).values_list("learning_path_id", flat=True)
+        ),
+        owned=frozenset(
+            LearningPath.objects.filter(owner_id=profile_id).values_list(
+                "id", flat=True
+            )
+        ),
+        group_ids=frozenset(memberships.values_list("group_id", flat=True)),
+    )
+
+
+def _get_group_paths(group_ids: frozenset[int]) -> dict[int, frozenset[int]]:
+    if not group_ids:
+        return {}
+    if not settings.LEARNING_ACCESS_CACHE_TIMEOUT:
+        return _load_group_paths(group_ids)
+    keys = {_group_cache_key(group_id): group_id for group_id in group_ids}
+    cached = cache.get_many(keys)
+    paths = {keys[key]: value for key, value in cached.items()}
+    missing = group_ids - set(paths)
+    if missing:
+        with use_primary():
+            fresh = _load_group_paths(missing)
+        cache.set_many(
+            {_group_cache_key(group_id): ids for group_id, ids in fresh.items()},
+            timeout=settings.LEARNING_ACCESS_CACHE_TIMEOUT,
+        )
+        paths.update(fresh)
+    return paths
+
+
+def _load_group_paths(group_ids) -> dict[int, frozenset[int]]:
+    loaded = {group_id: set() for group_id in group_ids}
+    assignments = LearningPath.assigned_groups.through.objects.filter(
+        group_id__in=group_ids
+    ).values_list("group_id", "learningpath_id")
+    for group_id, path_id in assignments:
+        loaded[group_id].add(path_id)
+    return {group_id: frozenset(ids) for group_id, ids in loaded.items()}
+
+
+def _delete_keys(keys: list[str]) -> None:
+    if keys:
+        cache.delete_many(keys)
+        # Again once committed: a concurrent request may have refilled the
+        # entries from the state before the change.
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_access(*profile_ids: int | None) -> None:
+    _delete_keys([_cache_key(profile_id) for profile_id in profile_ids if profile_id])
+
+
+def invalidate_user_access(*user_ids: int) -> None:
+    invalidate_access(
+        *UserProfile.objects.filter(user_id__in=user_ids).values_list("id", flat=True)
+    )
+
+
+def invalidate_group_access(*group_ids: int) -> None:
+    _delete_keys([_group_cache_key(group_id) for group_id in group_ids])
@@ -22,6 +22,7 @@ class LearningPathAdmin(admin.ModelAdmin):
     list_display = ("title", "is_public", "created_at", "updated_at")
     list_filter = ("is_public",)
     search_fields = ("title",)
+    filter_horizontal = ("assigned_groups",)
     inlines = [LearningPathStepInline]
 
 
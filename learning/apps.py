@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class LearningConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'learning'
+
+    def ready(self):
+        from main.caches import check_shared_cache, warn_if_cache_is_local
+
+        from . import signals  # noqa: F401
+        from .checks import check_step_status_storage
+
+        # The catalogue and access caches need every worker to see their
+        # invalidations.
+        checks.register(check_shared_cache, checks.Tags.caches, deploy=True)
+        warn_if_cache_is_local()
+        checks.register(check_step_status_storage)
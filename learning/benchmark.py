@@ -0,0 +1,346 @@
+"""Drive every API endpoint through the test client and measure it.
+
+Runs against whatever database is configured (typically one filled by
+`seed_learning_data`), authenticating with real JWTs as a seeded learner
+and the seeded staff user. Each request runs inside a transaction that is
+rolled back, so writes do not change the data set between iterations.
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from main.timing import percentile
+
+from .models import LearningPathProgress, LearningPathStep
+from .seeding import SeedSpec
+
+LEARNER = "learner"
+STAFF = "staff"
+
+
+@dataclass(frozen=True)
+class Target:
+    """Ids of seeded rows the endpoints are called with."""
+
+    learning_path: int
+    steps: list[int]
+    progress: int
+    progress_updated_at: str
+    learner_profile: int
+    username: str
+    password: str
+    refresh_token: str
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    method: str
+    url: Callable[[Target], str]
+    data: Callable[[Target, int], Any] | None = None
+    user: str | None = LEARNER
+    format: str = "json"
+
+
+@dataclass
+class EndpointResult:
+    name: str
+    method: str
+    statuses: list[int] = field(default_factory=list)
+    latencies_ms: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    sizes: list[int] = field(default_factory=list)
+    # SQL of the last timed call.
+    sql: list[str] = field(default_factory=list)
+
+    def summary(self) -> dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+        return {
+            "name": self.name,
+            "method": self.method,
+            "statuses": sorted(set(self.statuses)),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "queries": max(self.queries),
+            "bytes": int(statistics.median(self.sizes)),
+        }
+
+
+def _entries(target: Target, status: str = "completed") -> list[dict[str, Any]]:
+    return [{"step": step, "status": status} for step in target.steps]
+
+
+ENDPOINTS = (
+    Endpoint(
+        "auth-register",
+        "post",
+        lambda t: reverse("auth-register"),
+        lambda t, i: {"username": f"bench-{i}", "password": "bench-pass-1"},
+        user=None,
+    ),
+    Endpoint(
+        "token-obtain-pair",
+        "post",
+        lambda t: reverse("token-obtain-pair"),
+        lambda t, i: {"username": t.username, "password": t.password},
+        user=None,
+    ),
+    Endpoint(
+        "token-refresh",
+        "post",
+        lambda t: reverse("token-refresh"),
+        lambda t, i: {"refresh": t.refresh_token},
+        user=None,
+    ),
+    Endpoint("learning-path-list", "get", lambda t: reverse("learning-path-list")),
+    Endpoint(
+        "learning-path-list-summary",
+        "get",
+        lambda t: reverse("learning-path-list") + "?view=summary",
+    ),
+    Endpoint(
+        "learning-path-public",
+        "get",
+        lambda t: reverse("learning-path-public"),
+        user=None,
+    ),
+    Endpoint(
+        "learning-path-assigned",
+        "get",
+        lambda t: reverse("learning-path-assigned"),
+    ),
+    Endpoint(
+        "learning-path-started",
+        "get",
+        lambda t: reverse("learning-path-started"),
+    ),
+    Endpoint(
+        "learning-path-dashboard",
+        "get",
+        lambda t: reverse("learning-path-dashboard"),
+    ),
+    Endpoint(
+        "learning-path-detail",
+        "get",
+        lambda t: reverse("learning-path-detail", args=[t.learning_path]),
+    ),
+    Endpoint(
+        "learning-path-progress",
+        "get",
+        lambda t: reverse("learning-path-progress", args=[t.learning_path]),
+    ),
+    Endpoint(
+        "learning-path-funnel",
+        "get",
+        lambda t: reverse("learning-path-funnel", args=[t.learning_path]),
+        user=STAFF,
+    ),
+    Endpoint(
+        "learning-path-enrollments",
+        "post",
+        lambda t: reverse("learning-path-enrollments", args=[t.learning_path]),
+        lambda t, i: {"profile_ids": [t.learner_profile]},
+        user=STAFF,
+    ),
+    Endpoint(
+        "learning-path-create",
+        "post",
+        lambda t: reverse("learning-path-list"),
+        lambda t, i: {"title": f"Benchmark path {i}", "is_public": False},
+        user=STAFF,
+    ),
+    Endpoint(
+        "learning-path-update",
+        "put",
+        lambda t: reverse("learning-path-detail", args=[t.learning_path]),
+        lambda t, i: {"title": f"Benchmark path {i}", "is_public": False},
+        user=STAFF,
+    ),
+    Endpoint(
+        "learning-path-partial-update",
+        "patch",
+        lambda t: reverse("learning-path-detail", args=[t.learning_path]),
+        lambda t, i: {"description": f"Revision {i}"},
+        user=STAFF,
+    ),
+    Endpoint(
+        "learning-path-delete",
+        "delete",
+        lambda t: reverse("learning-path-detail", args=[t.learning_path]),
+        user=STAFF,
+    ),
+    Endpoint("progress-list", "get", lambda t: reverse("learning-path-progress-list")),
+    Endpoint(
+        "progress-create",
+        "post",
+        lambda t: reverse("learning-path-progress-list"),
+        lambda t, i: {
+            "learning_path": t.learning_path,
+            "step_progress_entries": _entries(t, "in_progress"),
+        },
+    ),
+    Endpoint(
+        "progress-detail",
+        "get",
+        lambda t: reverse("learning-path-progress-detail", args=[t.progress]),
+    ),
+    Endpoint(
+        "progress-update",
+        "put",
+        lambda t: reverse("learning-path-progress-detail", args=[t.progress]),
+        lambda t, i: {
+            "learning_path": t.learning_path,
+            "step_progress_entries": _entries(t),
+        },
+    ),
+    Endpoint(
+        "progress-partial-update",
+        "patch",
+        lambda t: reverse("learning-path-progress-detail", args=[t.progress]),
+        lambda t, i: {"step_progress_entries": _entries(t)[:1]},
+    ),
+    Endpoint(
+        "progress-changes",
+        "get",
+        lambda t: reverse("learning-path-progress-changes"),
+    ),
+    Endpoint(
+        "progress-push",
+        "post",
+        lambda t: reverse("learning-path-progress-push"),
+        lambda t, i: [
+            {
+                "assumed_master_state": {"updated_at": t.progress_updated_at},
+                "new_document_state": {
+                    "learning_path": t.learning_path,
+                    "step_progress_entries": _entries(t),
+                },
+            }
+        ],
+    ),
+    Endpoint(
+        "progress-export",
+        "get",
+        lambda t: reverse("learning-path-progress-export")
+        + f"?learning_path={t.learning_path}",
+        user=STAFF,
+    ),
+)
+
+
+def run_benchmark(
+    spec: SeedSpec,
+    iterations: int = 20,
+    warmup: int = 2,
+    only: set[str] | None = None,
+) -> list[EndpointResult]:
+    """Call each endpoint `warmup + iterations` times; time the last ones."""
+    endpoints = [e for e in ENDPOINTS if not only or e.name in only]
+    results = []
+    # The test client identifies itself as `testserver`. Seeded progress is
+    # brand new; the sync feed would hold all of it back.
+    with override_settings(
+        ALLOWED_HOSTS=["testserver"], LEARNING_SYNC_SAFETY_LAG_SECONDS=0
+    ):
+        clients, target = _prepare(spec)
+        for endpoint in endpoints:
+            result = EndpointResult(endpoint.name, endpoint.method.upper())
+            for i in range(warmup + iterations):
+                status, elapsed, queries, size = _call(
+                    clients[endpoint.user], endpoint, target, i
+                )
+                if i >= warmup:
+                    result.statuses.append(status)
+                    result.latencies_ms.append(elapsed * 1000)
+                    result.queries.append(len(queries))
+                    result.sizes.append(size)
+                    result.sql = queries
+            results.append(result)
+    return results
+
+
+def _prepare(spec: SeedSpec) -> tuple[dict[str | None, APIClient], Target]:
+    progress = (
+        LearningPathProgress.objects.filter(
+            user_profile__user__username__startswith=f"{spec.prefix}-user-",
+            learning_path__is_public=False,
+            total_steps__gt=0,
+        )
+        .select_related("user_profile__user")
+        .order_by("pk")
+        .first()
+    )
+    if progress is None:
+        raise LookupError(
+            f"No seeded learner with private progress under prefix {spec.prefix!r}."
+        )
+    clients: dict[str | None, APIClient] = {None: APIClient()}
+    tokens = {}
+    for role, username in (
+        (LEARNER, progress.user_profile.user.username),
+        (STAFF, spec.staff_username),
+    ):
+        response = clients[None].post(
+            reverse("token-obtain-pair"),
+            {"username": username, "password": spec.password},
+            format="json",
+        )
+        tokens[role] = response.data
+        clients[role] = APIClient()
+        clients[role].credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data['access']}"
+        )
+    target = Target(
+        learning_path=progress.learning_path_id,
+        steps=list(
+            LearningPathStep.objects.filter(
+                learning_path_id=progress.learning_path_id
+            ).values_list("pk", flat=True)
+        ),
+        progress=progress.pk,
+        progress_updated_at=progress.updated_at.isoformat(),
+        learner_profile=progress.user_profile_id,
+        username=progress.user_profile.user.username,
+        password=spec.password,
+        refresh_token=tokens[LEARNER]["refresh"],
+    )
+    return clients, target
+
+
+def _call(
+    client: APIClient, endpoint: Endpoint, target: Target, iteration: int
+) -> tuple[int, float, list[str], int]:
+    data = endpoint.data(target, iteration) if endpoint.data else None
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if endpoint.method == "get":
+                response = client.get(endpoint.url(target), data)
+            else:
+                response = getattr(client, endpoint.method)(
+                    endpoint.url(target), data, format=endpoint.format
+                )
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed = time.perf_counter() - started
+        transaction.set_rollback(True)
+    return (
+        response.status_code,
+        elapsed,
+        [query["sql"] for query in queries.captured_queries],
+        size,
+    )
+
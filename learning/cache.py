@@ -0,0 +1,116 @@
+"""Caching and HTTP validators for learning path content."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from main.db_routing import use_primary
+
+CONTENT_VERSION_KEY = "learning:content-version"
+
+
+def get_content_version() -> str:
+    """Return the current content version, creating one if the cache lost it.
+
+    Versions are random tokens rather than counters, so an evicted version
+    key can never resurrect entries cached under an older version.
+    """
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        cache.add(CONTENT_VERSION_KEY, uuid4().hex, timeout=None)
+        version = cache.get(CONTENT_VERSION_KEY)
+    return version
+
+
+def bump_content_version() -> None:
+    cache.set(CONTENT_VERSION_KEY, uuid4().hex, timeout=None)
+
+
+def versioned_key(name: str, *variant: Any) -> str:
+    digest = hashlib.md5(
+        repr(variant).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"learning:{name}:{get_content_version()}:{digest}"
+
+
+def get_or_build(key: str, build: Callable[[], Any]) -> Any:
+    data = cache.get(key)
+    if data is None:
+        # Cached until the next version bump, so it must not lag behind it.
+        with use_primary():
+            data = build()
+        cache.set(key, data, timeout=settings.LEARNING_CATALOG_CACHE_TIMEOUT)
+    return data
+
+
+CONTENT_ROW_FIELDS = ("id", "updated_at", "content_version", "content_updated_at")
+
+
+def content_rows(queryset: QuerySet) -> list[tuple]:
+    """Fetch just the version columns of the learning paths in `queryset`."""
+    queryset = queryset.prefetch_related(None)
+    if not queryset.query.is_sliced:
+        # Sliced querysets (pages) need their ordering to pick the same rows.
+        queryset = queryset.order_by()
+    return list(queryset.values_list(*CONTENT_ROW_FIELDS))
+
+
+@dataclass(frozen=True)
+class ContentValidators:
+    """Strong ETag and Last-Modified for a set of learning paths."""
+
+    etag: str
+    last_modified: datetime | None
+
+    @classmethod
+    def for_rows(cls, rows: Iterable[tuple], *variant: Any) -> ContentValidators:
+        # `variant` covers everything else that shapes the body (page,
+        # representation, origin of absolute image URLs).
+        rows = sorted(rows)
+        digest = hashlib.sha1(
+            repr((rows, variant)).encode(), usedforsecurity=False
+        ).hexdigest()
+        last_modified = max(
+            (max(row[1], row[3]) for row in rows),
+            default=None,
+        )
+        return cls(etag=f'"{digest}"', last_modified=last_modified)
+
+    def not_modified(
+        self, request: HttpRequest, use_last_modified: bool = True
+    ) -> HttpResponse | None:
+        """Return a 304 when the client's copy is current, else `None`.
+
+        Collections should pass `use_last_modified=False`: removing a path
+        from a listing changes its body without moving any timestamp forward.
+        """
+        response = get_conditional_response(
+            request,
+            etag=self.etag,
+            last_modified=(
+                int(self.last_modified.timestamp())
+                if use_last_modified and self.last_modified
+                else None
+            ),
+        )
+        if isinstance(response, HttpResponseNotModified):
+            return self.apply(response)
+        return None
+
+    def apply(self, response: HttpResponse) -> HttpResponse:
+        response["ETag"] = self.etag
+        if self.last_modified:
+            response["Last-Modified"] = http_date(self.last_modified.timestamp())
+        patch_vary_headers(response, ["Authorization"])
+        return response
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core import checks
+
+STEP_STATUS_STORAGES = ("rows", "compact")
+
+
+def check_step_status_storage(app_configs=None, **kwargs) -> list[checks.CheckMessage]:
+    """Reject a `LEARNING_STEP_STATUS_STORAGE` other than rows or compact."""
+    storage = settings.LEARNING_STEP_STATUS_STORAGE
+    if storage in STEP_STATUS_STORAGES:
+        return []
+    return [
+        checks.Error(
+            f"LEARNING_STEP_STATUS_STORAGE is {storage!r}.",
+            hint="Set it to 'rows' or 'compact'.",
+            id="learning.E001",
+        )
+    ]
@@ -0,0 +1,115 @@
+"""Bulk assignment of learning paths to many learners at once.
+
+Learners are identified by profile id or username, resolved in batches, and
+enrolled with `bulk_create(ignore_conflicts=True)`. Bulk inserts skip the
+enrollment signals, so the access index is invalidated here explicitly.
+"""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.db import transaction
+
+from accounts.models import UserProfile
+
+from .access import invalidate_access
+from .models import LearningPath, LearningPathEnrollment
+
+BATCH_SIZE = 1000
+
+PROFILE_ID = "profile_id"
+USERNAME = "username"
+
+
+@dataclass
+class EnrollmentReport:
+    created: int = 0
+    already_enrolled: int = 0
+    unknown: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "created": self.created,
+            "already_enrolled": self.already_enrolled,
+            "unknown": self.unknown,
+        }
+
+
+def enroll_learners(
+    learning_path: LearningPath,
+    learners: Iterable[tuple[str, str | int]],
+    batch_size: int = BATCH_SIZE,
+) -> EnrollmentReport:
+    """Enroll `(PROFILE_ID | USERNAME, value)` pairs into `learning_path`.
+
+    `learners` is consumed lazily, so streamed CSV uploads never have to fit
+    in memory. Duplicates and existing enrollments are counted, not errors.
+    """
+    report = EnrollmentReport()
+    learners = iter(learners)
+    while batch := list(islice(learners, batch_size)):
+        profile_ids = _resolve_profiles(batch, report)
+        existing = set(
+            LearningPathEnrollment.objects.filter(
+                learning_path=learning_path, user_profile_id__in=profile_ids
+            ).values_list("user_profile_id", flat=True)
+        )
+        new_ids = profile_ids - existing
+        LearningPathEnrollment.objects.bulk_create(
+            [
+                LearningPathEnrollment(
+                    learning_path=learning_path, user_profile_id=profile_id
+                )
+                for profile_id in new_ids
+            ],
+            ignore_conflicts=True,
+        )
+        # Deferred until the caller's transaction (if any) commits.
+        transaction.on_commit(partial(invalidate_access, *new_ids))
+        report.created += len(new_ids)
+        report.already_enrolled += len(existing)
+    return report
+
+
+def _resolve_profiles(
+    batch: list[tuple[str, str | int]], report: EnrollmentReport
+) -> set[int]:
+    ids = {int(value) for kind, value in batch if kind == PROFILE_ID}
+    usernames = {str(value) for kind, value in batch if kind == USERNAME}
+    known_ids = set(
+        UserProfile.objects.filter(id__in=ids).values_list("id", flat=True)
+    )
+    by_username = dict(
+        UserProfile.objects.filter(user__username__in=usernames).values_list(
+            "user__username", "id"
+        )
+    )
+    report.unknown.extend(str(profile_id) for profile_id in sorted(ids - known_ids))
+    report.unknown.extend(sorted(usernames - set(by_username)))
+    return known_ids | set(by_username.values())
+
+
+def read_learner_csv(lines: Iterable[str]) -> Iterator[tuple[str, str | int]]:
+    """Yield learners from CSV text with a `profile_id` and/or `username` column.
+
+    Rows with a profile id use it; otherwise the username is used. Blank
+    rows are skipped.
+    """
+    reader = csv.DictReader(lines)
+    columns = {name.strip().lower(): name for name in reader.fieldnames or ()}
+    if PROFILE_ID not in columns and USERNAME not in columns:
+        raise ValueError("CSV needs a 'profile_id' or 'username' header.")
+    for row in reader:
+        profile_id = (row.get(columns.get(PROFILE_ID, "")) or "").strip()
+        username = (row.get(columns.get(USERNAME, "")) or "").strip()
+        if profile_id:
+            if not profile_id.isdigit():
+                raise ValueError(f"Invalid profile id on line {reader.line_num}.")
+            yield PROFILE_ID, int(profile_id)
+        elif username:
+            yield USERNAME, username
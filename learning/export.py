@@ -0,0 +1,206 @@
+"""Streaming exports of learner progress for reporting.
+
+Progress records are read through a single `iterator()` cursor (server-side
+on PostgreSQL) in batches of `BATCH_SIZE`; each batch loads the step rows of
+its row-backed records in one query and expands compact records from their
+`step_statuses` map. Every record yields one line per step of its path, so
+both storages export the same rows and memory stays bounded by the batch
+size however many records match.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+from django.db.models import QuerySet
+
+from .models import (
+    STATUS_BY_CODE,
+    LearningPathProgress,
+    LearningPathStep,
+    LearningPathStepProgress,
+)
+
+BATCH_SIZE = 2000
+UNSTARTED = LearningPathStepProgress.Status.UNSTARTED
+
+CSV = "csv"
+NDJSON = "ndjson"
+CONTENT_TYPES = {
+    CSV: "text/csv; charset=utf-8",
+    NDJSON: "application/x-ndjson",
+}
+
+COLUMNS = (
+    "progress_id",
+    "user_profile_id",
+    "username",
+    "learning_path_id",
+    "learning_path_title",
+    "step_id",
+    "step_order",
+    "step_title",
+    "status",
+    "step_updated_at",
+    "started_at",
+    "is_completed",
+    "progress_updated_at",
+)
+
+_PROGRESS_FIELDS = (
+    "id",
+    "user_profile_id",
+    "user_profile__user__username",
+    "learning_path_id",
+    "learning_path__title",
+    "started_at",
+    "is_completed",
+    "updated_at",
+    "step_statuses",
+)
+
+
+def export_queryset(
+    learning_path_ids: Iterable[int] = (),
+    updated_after: datetime | None = None,
+    updated_before: datetime | None = None,
+) -> QuerySet:
+    """Progress records to export; the date range applies to `updated_at`."""
+    queryset = LearningPathProgress.objects.all()
+    if learning_path_ids:
+        queryset = queryset.filter(learning_path_id__in=learning_path_ids)
+    if updated_after is not None:
+        queryset = queryset.filter(updated_at__gte=updated_after)
+    if updated_before is not None:
+        queryset = queryset.filter(updated_at__lt=updated_before)
+    return queryset
+
+
+def export_rows(
+    queryset: QuerySet, batch_size: int = BATCH_SIZE
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Yield batches of export rows, ordered by progress id and step order."""
+    records = (
+        queryset.order_by("pk")
+        .values_list(*_PROGRESS_FIELDS)
+        .iterator(chunk_size=batch_size)
+    )
+    steps_by_path: dict[int, list[tuple[int, int, str]]] = {}
+    while batch := list(islice(records, batch_size)):
+        _load_steps(steps_by_path, {record[3] for record in batch})
+        stored = _stored_rows([record[0] for record in batch if record[8] is None])
+        rows = []
+        for (
+            progress_id,
+            profile_id,
+            username,
+            path_id,
+            path_title,
+            started_at,
+            is_completed,
+            updated_at,
+            compact,
+        ) in batch:
+            if compact is not None:
+                statuses = {
+                    int(step_id): (STATUS_BY_CODE[code], None)
+                    for step_id, code in compact.items()
+                }
+            else:
+                statuses = stored.get(progress_id, {})
+            for step_id, order, title in steps_by_path.get(path_id, ()):
+                status, step_updated_at = statuses.get(step_id, (UNSTARTED, None))
+                rows.append(
+                    (
+                        progress_id,
+                        profile_id,
+                        username,
+                        path_id,
+                        path_title,
+                        step_id,
+                        order,
+                        title,
+                        status,
+                        _iso(step_updated_at),
+                        _iso(started_at),
+                        is_completed,
+                        _iso(updated_at),
+                    )
+                )
+        yield rows
+
+
+def render_csv(batches: Iterable[list[tuple[Any, ...]]]) -> Iterator[str]:
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    yield buffer.flush()
+    for rows in batches:
+        writer.writerows(
+            ["" if value is None else value for value in row] for row in rows
+        )
+        yield buffer.flush()
+
+
+def render_ndjson(batches: Iterable[list[tuple[Any, ...]]]) -> Iterator[str]:
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(COLUMNS, row)), separators=(",", ":")) + "\n"
+            for row in rows
+        )
+
+
+RENDERERS = {CSV: render_csv, NDJSON: render_ndjson}
+
+
+class _LineBuffer:
+    """File-like sink that hands the `csv` writer's output back in chunks."""
+
+    def __init__(self):
+        self._parts: list[str] = []
+
+    def write(self, value: str) -> None:
+        self._parts.append(value)
+
+    def flush(self) -> str:
+        value, self._parts = "".join(self._parts), []
+        return value
+
+
+def _load_steps(
+    steps_by_path: dict[int, list[tuple[int, int, str]]], path_ids: set[int]
+) -> None:
+    missing = path_ids - steps_by_path.keys()
+    if not missing:
+        return
+    for path_id in missing:
+        steps_by_path[path_id] = []
+    for step_id, path_id, order, title in (
+        LearningPathStep.objects.filter(learning_path_id__in=missing)
+        .order_by("learning_path_id", "order")
+        .values_list("id", "learning_path_id", "order", "title")
+    ):
+        steps_by_path[path_id].append((step_id, order, title))
+
+
+def _stored_rows(
+    progress_ids: list[int],
+) -> dict[int, dict[int, tuple[str, datetime]]]:
+    stored: dict[int, dict[int, tuple[str, datetime]]] = {}
+    if not progress_ids:
+        return stored
+    for progress_id, step_id, status, updated_at in (
+        LearningPathStepProgress.objects.filter(progress_id__in=progress_ids)
+        .order_by()
+        .values_list("progress_id", "step_id", "status", "updated_at")
+    ):
+        stored.setdefault(progress_id, {})[step_id] = (status, updated_at)
+    return stored
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
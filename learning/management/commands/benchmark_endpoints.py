@@ -0,0 +1,116 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.benchmark import ENDPOINTS, run_benchmark
+from learning.seeding import SeedSpec
+
+COLUMNS = ("p50_ms", "p95_ms", "p99_ms", "max_ms", "queries", "bytes")
+
+
+class Command(BaseCommand):
+    help = (
+        "Call every learning and auth API endpoint against a seeded data set "
+        "and report latency percentiles, query counts and payload sizes."
+    )
+
+    def add_arguments(self, parser):
+        defaults = SeedSpec()
+        parser.add_argument(
+            "--prefix",
+            default=defaults.prefix,
+            help="Prefix the data set was seeded under.",
+        )
+        parser.add_argument("--password", default=defaults.password)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Untimed calls per endpoint before measuring.",
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=[endpoint.name for endpoint in ENDPOINTS],
+            help="Only benchmark this endpoint (repeatable).",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the results as JSON."
+        )
+        parser.add_argument("--save", help="Write the results as JSON to this file.")
+        parser.add_argument(
+            "--baseline",
+            help="JSON results of an earlier run; fail on regressions against it.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative p95 growth before --baseline fails.",
+        )
+
+    def handle(self, *args, **options):
+        spec = SeedSpec(prefix=options["prefix"], password=options["password"])
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        try:
+            results = run_benchmark(
+                spec,
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                only=set(options["only"] or ()),
+            )
+        except LookupError as exc:
+            raise CommandError(f"{exc} Run seed_learning_data first.")
+        summaries = [result.summary() for result in results]
+
+        if options["save"]:
+            with open(options["save"], "w", encoding="utf-8") as out:
+                json.dump(summaries, out, indent=2)
+        if options["json"]:
+            self.stdout.write(json.dumps(summaries, indent=2))
+        else:
+            self._write_table(summaries)
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as baseline_file:
+                baseline = {row["name"]: row for row in json.load(baseline_file)}
+            regressions = _regressions(summaries, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(regressions))
+            self.stdout.write(
+                self.style.SUCCESS("No regressions against the baseline.")
+            )
+
+    def _write_table(self, summaries):
+        width = max(len(row["name"]) for row in summaries) + 8
+        self.stdout.write(
+            f"{'endpoint':<{width}}{'status':>10}"
+            + "".join(f"{column:>10}" for column in COLUMNS)
+        )
+        for row in summaries:
+            statuses = "/".join(str(code) for code in row["statuses"])
+            line = (
+                f"{row['method'] + ' ' + row['name']:<{width}}{statuses:>10}"
+                + "".join(f"{row[column]:>10}" for column in COLUMNS)
+            )
+            failed = any(code >= 400 for code in row["statuses"])
+            self.stdout.write(self.style.ERROR(line) if failed else line)
+
+
+def _regressions(summaries, baseline, tolerance):
+    regressions = []
+    for row in summaries:
+        before = baseline.get(row["name"])
+        if before is None:
+            continue
+        if row["queries"] > before["queries"]:
+            regressions.append(
+                f"{row['name']}: {row['queries']} queries (was {before['queries']})"
+            )
+        if row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{row['name']}: p95 {row['p95_ms']} ms (was {before['p95_ms']} ms)"
+            )
+    return regressions
@@ -0,0 +1,115 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+
+from learning.models import (
+    LearningPathProgress,
+    LearningPathStep,
+    LearningPathStepProgress,
+)
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Move step statuses of learning path progress records between "
+        "LearningPathStepProgress rows and the compact step_statuses column."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--to",
+            choices=("compact", "rows"),
+            required=True,
+            help="Target storage for the converted records.",
+        )
+        parser.add_argument(
+            "--learning-path",
+            type=int,
+            help="Only convert progress records of this learning path id.",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = LearningPathProgress.objects.all()
+        if options["learning_path"]:
+            queryset = queryset.filter(learning_path_id=options["learning_path"])
+        if options["to"] == "compact":
+            queryset, convert = queryset.row_backed(), self._to_compact
+        else:
+            queryset, convert = queryset.compact(), self._to_rows
+
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+        batch_size = options["batch_size"]
+        converted = 0
+        for start in range(0, len(ids), batch_size):
+            with transaction.atomic():
+                # Re-check the storage under the lock: a concurrent run may
+                # have converted some of these records since the scan.
+                records = list(
+                    queryset.select_for_update().filter(
+                        pk__in=ids[start : start + batch_size]
+                    )
+                )
+                if records:
+                    convert(records)
+                converted += len(records)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Converted {converted} progress records to {options['to']} storage."
+            )
+        )
+
+    def _to_compact(self, records: list[LearningPathProgress]) -> None:
+        entries = LearningPathStepProgress.objects.filter(
+            progress__in=records
+        ).order_by()
+        statuses = defaultdict(dict)
+        for progress_id, step_id, status in entries.values_list(
+            "progress_id", "step_id", "status"
+        ):
+            statuses[progress_id][step_id] = status
+        for progress in records:
+            progress.set_compact_statuses(statuses[progress.pk])
+        LearningPathProgress.objects.bulk_update(records, ["step_statuses"])
+        self._delete_rows(records)
+
+    def _delete_rows(self, records: list[LearningPathProgress]) -> None:
+        # Plain SQL instead of QuerySet.delete(): the delete signals would
+        # shift the counters, but only the storage moved.
+        connection = connections[router.db_for_write(LearningPathStepProgress)]
+        quote = connection.ops.quote_name
+        table = quote(LearningPathStepProgress._meta.db_table)
+        column = quote(LearningPathStepProgress._meta.get_field("progress").column)
+        placeholders = ", ".join(["%s"] * len(records))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {column} IN ({placeholders})",
+                [progress.pk for progress in records],
+            )
+
+    def _to_rows(self, records: list[LearningPathProgress]) -> None:
+        statuses = {
+            progress.pk: progress.get_compact_statuses() for progress in records
+        }
+        # Keys of steps deleted since they were written have no row to become.
+        existing_steps = set(
+            LearningPathStep.objects.filter(
+                pk__in={step_id for entry in statuses.values() for step_id in entry}
+            ).values_list("pk", flat=True)
+        )
+        LearningPathStepProgress.objects.bulk_create(
+            [
+                LearningPathStepProgress(
+                    progress_id=progress_id, step_id=step_id, status=status
+                )
+                for progress_id, entry in statuses.items()
+                for step_id, status in entry.items()
+                if step_id in existing_steps
+            ]
+        )
+        for progress in records:
+            progress.step_statuses = None
+        LearningPathProgress.objects.bulk_update(records, ["step_statuses"])
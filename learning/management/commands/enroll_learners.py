@@ -0,0 +1,77 @@
+import sys
+from contextlib import ExitStack
+from itertools import chain
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from learning.enrollment import (
+    BATCH_SIZE,
+    PROFILE_ID,
+    USERNAME,
+    enroll_learners,
+    read_learner_csv,
+)
+from learning.models import LearningPath
+
+
+class Command(BaseCommand):
+    help = (
+        "Assign a learning path to many learners, read from a CSV file with a "
+        "profile_id and/or username column and/or given on the command line."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("learning_path", type=int, help="Learning path id.")
+        parser.add_argument(
+            "--csv",
+            help="CSV file to stream learners from; use '-' for stdin.",
+        )
+        parser.add_argument("--profile-id", type=int, action="append", default=[])
+        parser.add_argument("--username", action="append", default=[])
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            learning_path = LearningPath.objects.get(pk=options["learning_path"])
+        except LearningPath.DoesNotExist:
+            raise CommandError(f"Learning path {options['learning_path']} not found.")
+
+        learners = chain(
+            ((PROFILE_ID, value) for value in options["profile_id"]),
+            ((USERNAME, value) for value in options["username"]),
+        )
+        csv_path = options["csv"]
+        if not (options["profile_id"] or options["username"] or csv_path):
+            raise CommandError("Give --csv, --profile-id or --username.")
+
+        with ExitStack() as stack:
+            if csv_path == "-":
+                learners = chain(learners, read_learner_csv(sys.stdin))
+            elif csv_path:
+                lines = stack.enter_context(
+                    open(csv_path, encoding="utf-8-sig", newline="")
+                )
+                learners = chain(learners, read_learner_csv(lines))
+            try:
+                with transaction.atomic():
+                    report = enroll_learners(
+                        learning_path, learners, batch_size=options["batch_size"]
+                    )
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Enrolled {report.created} learners in '{learning_path}' "
+                f"({report.already_enrolled} already enrolled)."
+            )
+        )
+        if report.unknown:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(report.unknown)} unknown learners: "
+                    + ", ".join(report.unknown[:20])
+                    + (" ..." if len(report.unknown) > 20 else "")
+                )
+            )
@@ -0,0 +1,53 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from learning.export import (
+    BATCH_SIZE,
+    CSV,
+    NDJSON,
+    RENDERERS,
+    export_queryset,
+    export_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream learning path progress (one line per learner and step) as CSV "
+        "or NDJSON, without loading the whole result into memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", choices=(CSV, NDJSON), default=CSV)
+        parser.add_argument("--file", help="File to write; defaults to stdout.")
+        parser.add_argument("--learning-path", type=int, action="append", default=[])
+        parser.add_argument("--updated-after", help="ISO 8601 datetime, inclusive.")
+        parser.add_argument("--updated-before", help="ISO 8601 datetime, exclusive.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = export_queryset(
+            options["learning_path"],
+            self._datetime(options, "updated_after"),
+            self._datetime(options, "updated_before"),
+        )
+        chunks = RENDERERS[options["output"]](
+            export_rows(queryset, batch_size=options["batch_size"])
+        )
+        if options["file"]:
+            with open(options["file"], "w", encoding="utf-8", newline="") as out:
+                out.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
+
+    @staticmethod
+    def _datetime(options, name):
+        value = options[name]
+        if value is None:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise CommandError(f"Invalid --{name.replace('_', '-')}: {value!r}.")
+        return parsed
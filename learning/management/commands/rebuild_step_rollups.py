@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from learning.models import LearningPathStepRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-step status rollups behind the learning path funnel "
+        "from the stored step statuses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--learning-path",
+            type=int,
+            action="append",
+            help="Only rebuild this learning path id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = LearningPathStepRollup.rebuild(options["learning_path"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} step rollups."))
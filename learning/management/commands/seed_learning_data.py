@@ -0,0 +1,90 @@
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from learning.seeding import SeedSpec, flush, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic learning paths, steps, blocks, learners, enrollments and "
+        "progress with bulk inserts, for profiling at production-like volumes."
+    )
+
+    def add_arguments(self, parser):
+        defaults = SeedSpec()
+        parser.add_argument("--paths", type=int, default=defaults.paths)
+        parser.add_argument(
+            "--steps", type=int, default=defaults.steps, help="Steps per path."
+        )
+        parser.add_argument(
+            "--blocks", type=int, default=defaults.blocks, help="Blocks per step."
+        )
+        parser.add_argument(
+            "--users", type=int, default=defaults.users, help="Learners to create."
+        )
+        parser.add_argument(
+            "--public-share",
+            type=float,
+            default=defaults.public_share,
+            help="Share of paths that are public.",
+        )
+        parser.add_argument(
+            "--enrollment-rate",
+            type=float,
+            default=defaults.enrollment_rate,
+            help="Share of the private paths each learner is enrolled in.",
+        )
+        parser.add_argument(
+            "--progress-rate",
+            type=float,
+            default=defaults.progress_rate,
+            help="Share of a learner's accessible paths with a progress record.",
+        )
+        parser.add_argument(
+            "--completion-rate",
+            type=float,
+            default=defaults.completion_rate,
+            help="Share of progress records with every step completed.",
+        )
+        parser.add_argument(
+            "--storage", choices=("rows", "compact"), default=defaults.storage
+        )
+        parser.add_argument(
+            "--prefix",
+            default=defaults.prefix,
+            help="Name prefix of the seeded users and paths.",
+        )
+        parser.add_argument(
+            "--password",
+            default=defaults.password,
+            help="Password of every seeded user.",
+        )
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete the data set seeded under --prefix first.",
+        )
+
+    def handle(self, *args, **options):
+        spec = SeedSpec(**{f.name: options[f.name] for f in fields(SeedSpec)})
+        if options["flush"]:
+            flush(spec.prefix)
+        try:
+            report = seed(spec)
+        except IntegrityError as exc:
+            raise CommandError(
+                f"Could not seed under prefix {spec.prefix!r} ({exc}); "
+                "use --flush or another --prefix."
+            )
+        counts = ", ".join(
+            f"{count} {name}" for name, count in report.as_dict().items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {counts}. Staff user: {spec.staff_username}."
+            )
+        )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from learning.models import LearningPathProgress
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the denormalized step counters, completion and started state "
+        "of learning path progress records with the step tables and "
+        "optionally repair drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Recompute counters and completion for drifted records.",
+        )
+        parser.add_argument(
+            "--learning-path",
+            type=int,
+            help="Only check progress records of this learning path id.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = LearningPathProgress.objects.all()
+        if options["learning_path"]:
+            queryset = queryset.filter(learning_path_id=options["learning_path"])
+
+        drifted_ids = list(queryset.with_counter_drift().values_list("pk", flat=True))
+        drifted_ids += queryset.compact_drift_ids()
+        if not drifted_ids:
+            self.stdout.write(self.style.SUCCESS("All progress counters are consistent."))
+            return
+
+        self.stdout.write(
+            self.style.WARNING(f"{len(drifted_ids)} progress records have drifted counters.")
+        )
+        if not options["repair"]:
+            self.stdout.write("Re-run with --repair to fix them.")
+            return
+
+        repaired = 0
+        for start in range(0, len(drifted_ids), BATCH_SIZE):
+            with transaction.atomic():
+                repaired += LearningPathProgress.objects.filter(
+                    pk__in=drifted_ids[start : start + BATCH_SIZE]
+                ).recount_step_counters()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} progress records."))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_userprofile_can_create_learning_paths_and_more'),
+        ('learning', '0002_learningpath_owner'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearningPathProgressTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('progress_id', models.BigIntegerField(unique=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Learning Path Progress Tombstone',
+                'verbose_name_plural': 'Learning Path Progress Tombstones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='learningpathprogress',
+            index=models.Index(fields=['user_profile', 'updated_at', 'id'], name='learning_progress_sync_idx'),
+        ),
+        migrations.AddField(
+            model_name='learningpathprogresstombstone',
+            name='learning_path',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='learning.learningpath'),
+        ),
+        migrations.AddField(
+            model_name='learningpathprogresstombstone',
+            name='user_profile',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.userprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='learningpathprogresstombstone',
+            index=models.Index(fields=['user_profile', 'deleted_at', 'progress_id'], name='learning_tombstone_sync_idx'),
+        ),
+    ]
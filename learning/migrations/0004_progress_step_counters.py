@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:17
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+
+def backfill_step_counters(apps, schema_editor):
+    LearningPathProgress = apps.get_model("learning", "LearningPathProgress")
+    LearningPathStep = apps.get_model("learning", "LearningPathStep")
+    LearningPathStepProgress = apps.get_model("learning", "LearningPathStepProgress")
+
+    def count(queryset, group_by):
+        return Coalesce(
+            Subquery(
+                queryset.order_by()
+                .values(group_by)
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            0,
+        )
+
+    entries = LearningPathStepProgress.objects.filter(progress=OuterRef("pk"))
+    LearningPathProgress.objects.update(
+        total_steps=count(
+            LearningPathStep.objects.filter(learning_path=OuterRef("learning_path")),
+            "learning_path",
+        ),
+        completed_steps=count(entries.filter(status="completed"), "progress"),
+        in_progress_steps=count(entries.filter(status="in_progress"), "progress"),
+    )
+    LearningPathProgress.objects.update(
+        is_completed=Case(
+            When(total_steps__gt=0, completed_steps=F("total_steps"), then=Value(True)),
+            default=Value(False),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0003_progress_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningpathprogress',
+            name='completed_steps',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='learningpathprogress',
+            name='in_progress_steps',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='learningpathprogress',
+            name='total_steps',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_step_counters, migrations.RunPython.noop),
+    ]
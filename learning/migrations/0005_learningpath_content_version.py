@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:19
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seed_content_updated_at(apps, schema_editor):
+    LearningPath = apps.get_model("learning", "LearningPath")
+    LearningPath.objects.update(content_updated_at=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0004_progress_step_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningpath',
+            name='content_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='learningpath',
+            name='content_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(seed_content_updated_at, migrations.RunPython.noop),
+    ]
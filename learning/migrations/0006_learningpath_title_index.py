@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_userprofile_can_create_learning_paths_and_more'),
+        ('learning', '0005_learningpath_content_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='learningpath',
+            index=models.Index(fields=['title', 'id'], name='learning_path_title_idx'),
+        ),
+    ]
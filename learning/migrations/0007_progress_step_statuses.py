@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0006_learningpath_title_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningpathprogress',
+            name='step_statuses',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
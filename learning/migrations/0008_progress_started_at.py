@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:34
+
+from django.db import migrations, models
+from django.db.models import F, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_started_at(apps, schema_editor):
+    LearningPathProgress = apps.get_model("learning", "LearningPathProgress")
+    LearningPathStepProgress = apps.get_model("learning", "LearningPathStepProgress")
+
+    # Earliest touched step row; compact records fall back to `updated_at`.
+    first_touched = (
+        LearningPathStepProgress.objects.filter(progress=OuterRef("pk"))
+        .exclude(status="unstarted")
+        .order_by()
+        .values("progress")
+        .annotate(first=Min("created_at"))
+        .values("first")
+    )
+    LearningPathProgress.objects.filter(
+        Q(completed_steps__gt=0) | Q(in_progress_steps__gt=0)
+    ).update(started_at=Coalesce(Subquery(first_touched), F("updated_at")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_userprofile_can_create_learning_paths_and_more'),
+        ('learning', '0007_progress_step_statuses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningpathprogress',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='learningpathprogress',
+            index=models.Index(fields=['user_profile', 'started_at'], name='learning_progress_started_idx'),
+        ),
+        migrations.RunPython(backfill_started_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('learning', '0008_progress_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningpath',
+            name='assigned_groups',
+            field=models.ManyToManyField(blank=True, related_name='learning_paths', to='auth.group'),
+        ),
+    ]
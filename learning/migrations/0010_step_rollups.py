@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:47
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+STATUS_BY_CODE = {"c": "completed", "i": "in_progress"}
+
+
+def build_rollups(apps, schema_editor):
+    LearningPathProgress = apps.get_model("learning", "LearningPathProgress")
+    LearningPathStep = apps.get_model("learning", "LearningPathStep")
+    LearningPathStepProgress = apps.get_model("learning", "LearningPathStepProgress")
+    LearningPathStepRollup = apps.get_model("learning", "LearningPathStepRollup")
+
+    learners = dict(
+        LearningPathProgress.objects.order_by()
+        .values("learning_path_id")
+        .annotate(n=Count("id"))
+        .values_list("learning_path_id", "n")
+    )
+    counts = Counter()
+    for step_id, status, n in (
+        LearningPathStepProgress.objects.filter(
+            progress__step_statuses__isnull=True,
+            status__in=STATUS_BY_CODE.values(),
+        )
+        .order_by()
+        .values("step_id", "status")
+        .annotate(n=Count("id"))
+        .values_list("step_id", "status", "n")
+    ):
+        counts[step_id, status] += n
+    for statuses in LearningPathProgress.objects.filter(
+        step_statuses__isnull=False
+    ).values_list("step_statuses", flat=True):
+        for step_id, code in statuses.items():
+            counts[int(step_id), STATUS_BY_CODE[code]] += 1
+
+    rollups = []
+    for step_id, path_id in LearningPathStep.objects.values_list(
+        "id", "learning_path_id"
+    ):
+        in_progress = counts[step_id, "in_progress"]
+        completed = counts[step_id, "completed"]
+        rollups.append(
+            LearningPathStepRollup(
+                step_id=step_id,
+                learning_path_id=path_id,
+                unstarted=max(learners.get(path_id, 0) - in_progress - completed, 0),
+                in_progress=in_progress,
+                completed=completed,
+            )
+        )
+    LearningPathStepRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0009_learningpath_assigned_groups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearningPathStepRollup',
+            fields=[
+                ('step', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='learning.learningpathstep')),
+                ('unstarted', models.PositiveIntegerField(default=0)),
+                ('in_progress', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('learning_path', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='step_rollups', to='learning.learningpath')),
+            ],
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,11 @@
+from collections import defaultdict
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from accounts.models import UserProfile
@@ -30,10 +36,33 @@ class LearningPath(TimeStampedModel):
         related_name="learning_paths",
         blank=True,
     )
+    # Everyone in these groups is assigned the path without enrollment rows.
+    assigned_groups = models.ManyToManyField(
+        "auth.Group",
+        related_name="learning_paths",
+        blank=True,
+    )
+    # Bumped whenever the path or any of its steps/blocks change; feeds the
+    # ETag and Last-Modified validators of the content endpoints.
+    content_version = models.PositiveIntegerField(default=0, editable=False)
+    content_updated_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # Serves the `(title, id)` keyset pages of the listing endpoints.
+            models.Index(fields=["title", "id"], name="learning_path_title_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so an ownership change can invalidate both owners' access.
+        instance._stored_owner_id = instance.__dict__.get("owner_id")
+        return instance
+
 
 class LearningPathEnrollment(TimeStampedModel):
     learning_path = models.ForeignKey(
@@ -73,6 +102,13 @@ class LearningPathStep(TimeStampedModel):
     def __str__(self) -> str:
         return self.title or f"{self.learning_path} - Step {self.order}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a later save() can tell whether the step moved.
+        instance._stored_order = instance.__dict__.get("order")
+        return instance
+
 
 class LearningPathStepBlock(TimeStampedModel):
     class BlockType(models.TextChoices):
@@ -112,6 +148,193 @@ class LearningPathStepBlock(TimeStampedModel):
         return f"{self.get_block_type_display()} block #{self.order} for {self.step}"
 
 
+class LearningPathProgressQuerySet(models.QuerySet):
+    def shift_step_counters(
+        self, *, total: int = 0, completed: int = 0, in_progress: int = 0
+    ) -> int:
+        """Apply step counter deltas in SQL and re-derive `is_completed`.
+
+        All right-hand sides see the pre-update row, so completion and the
+        started state are evaluated against the shifted values in the same
+        statement.
+        """
+        now = timezone.now()
+        return self.update(
+            total_steps=Greatest(F("total_steps") + total, 0),
+            completed_steps=Greatest(F("completed_steps") + completed, 0),
+            in_progress_steps=Greatest(F("in_progress_steps") + in_progress, 0),
+            is_completed=Case(
+                When(
+                    Q(total_steps__gt=-total)
+                    & Q(completed_steps=F("total_steps") + (total - completed)),
+                    then=Value(True),
+                ),
+                default=Value(False),
+            ),
+            started_at=_started_at(
+                Q(completed_steps__gt=-completed)
+                | Q(in_progress_steps__gt=-in_progress),
+                now,
+            ),
+            updated_at=now,
+        )
+
+    def with_actual_step_counts(self) -> "LearningPathProgressQuerySet":
+        return self.annotate(**_actual_step_count_expressions())
+
+    def row_backed(self) -> "LearningPathProgressQuerySet":
+        return self.filter(step_statuses__isnull=True)
+
+    def compact(self) -> "LearningPathProgressQuerySet":
+        return self.filter(step_statuses__isnull=False)
+
+    def with_counter_drift(self) -> "LearningPathProgressQuerySet":
+        """Row-backed records whose counters disagree with the step tables.
+
+        `is_completed` and whether `started_at` is set count as drift too
+        when they disagree with the actual counts. Compact records are
+        checked in Python by `compact_drift_ids()`.
+        """
+        return (
+            self.row_backed()
+            .with_actual_step_counts()
+            .annotate(
+                is_started=_flag(Q(started_at__isnull=False)),
+                actual_is_completed=_flag(
+                    Q(actual_total_steps__gt=0)
+                    & Q(actual_completed_steps=F("actual_total_steps"))
+                ),
+                actual_is_started=_flag(
+                    Q(actual_completed_steps__gt=0) | Q(actual_in_progress_steps__gt=0)
+                ),
+            )
+            .exclude(
+                total_steps=F("actual_total_steps"),
+                completed_steps=F("actual_completed_steps"),
+                in_progress_steps=F("actual_in_progress_steps"),
+                is_completed=F("actual_is_completed"),
+                is_started=F("actual_is_started"),
+            )
+        )
+
+    def compact_drift_ids(self) -> list[int]:
+        drifted = []
+        compact = self.compact()
+        path_ids = compact.order_by().values_list("learning_path_id", flat=True)
+        steps_by_path = _step_ids_by_path(set(path_ids.distinct()))
+        for progress in compact.iterator():
+            total, completed, in_progress = progress.compact_step_counts(
+                steps_by_path[progress.learning_path_id]
+            )
+            if (
+                total,
+                completed,
+                in_progress,
+                total > 0 and completed == total,
+                completed > 0 or in_progress > 0,
+            ) != (
+                progress.total_steps,
+                progress.completed_steps,
+                progress.in_progress_steps,
+                progress.is_completed,
+                progress.started_at is not None,
+            ):
+                drifted.append(progress.pk)
+        return drifted
+
+    def recount_step_counters(self) -> int:
+        """Recompute counters and completion from the stored step statuses."""
+        actual = _actual_step_count_expressions()
+        updated = self.row_backed().update(
+            total_steps=actual["actual_total_steps"],
+            completed_steps=actual["actual_completed_steps"],
+            in_progress_steps=actual["actual_in_progress_steps"],
+        )
+        compact = list(self.compact())
+        steps_by_path = _step_ids_by_path(
+            {progress.learning_path_id for progress in compact}
+        )
+        for progress in compact:
+            (
+                progress.total_steps,
+                progress.completed_steps,
+                progress.in_progress_steps,
+            ) = progress.compact_step_counts(steps_by_path[progress.learning_path_id])
+        updated += LearningPathProgress.objects.bulk_update(
+            compact, ["total_steps", "completed_steps", "in_progress_steps"]
+        )
+        self.update(
+            is_completed=Case(
+                When(
+                    total_steps__gt=0,
+                    completed_steps=F("total_steps"),
+                    then=Value(True),
+                ),
+                default=Value(False),
+            ),
+            started_at=_started_at(
+                Q(completed_steps__gt=0) | Q(in_progress_steps__gt=0), timezone.now()
+            ),
+        )
+        return updated
+
+
+def _flag(condition: Q) -> Case:
+    return Case(
+        When(condition, then=Value(True)),
+        default=Value(False),
+        output_field=models.BooleanField(),
+    )
+
+
+def _started_at(started: Q, now) -> Case:
+    """Keep the first start time while `started` holds; clear it otherwise."""
+    return Case(
+        When(started, then=Coalesce(F("started_at"), Value(now))),
+        default=Value(None),
+        output_field=models.DateTimeField(),
+    )
+
+
+def _step_ids_by_path(path_ids: set[int] | None = None) -> defaultdict[int, set[int]]:
+    steps = LearningPathStep.objects.order_by()
+    if path_ids is not None:
+        steps = steps.filter(learning_path_id__in=path_ids)
+    steps_by_path = defaultdict(set)
+    for step_id, path_id in steps.values_list("id", "learning_path_id"):
+        steps_by_path[path_id].add(step_id)
+    return steps_by_path
+
+
+def _actual_step_count_expressions() -> dict[str, Coalesce]:
+    def count(queryset: models.QuerySet, group_by: str) -> Coalesce:
+        return Coalesce(
+            Subquery(
+                queryset.order_by()
+                .values(group_by)
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            0,
+        )
+
+    entries = LearningPathStepProgress.objects.filter(progress=OuterRef("pk"))
+    return {
+        "actual_total_steps": count(
+            LearningPathStep.objects.filter(learning_path=OuterRef("learning_path")),
+            "learning_path",
+        ),
+        "actual_completed_steps": count(
+            entries.filter(status=LearningPathStepProgress.Status.COMPLETED),
+            "progress",
+        ),
+        "actual_in_progress_steps": count(
+            entries.filter(status=LearningPathStepProgress.Status.IN_PROGRESS),
+            "progress",
+        ),
+    }
+
+
 class LearningPathProgress(TimeStampedModel):
     user_profile = models.ForeignKey(
         UserProfile,
@@ -131,9 +354,34 @@ class LearningPathProgress(TimeStampedModel):
         related_name="+",
     )
     is_completed = models.BooleanField(default=False)
+    # Maintained incrementally (see `learning.signals`); repair drift with
+    # `manage.py verify_progress_counters --repair`.
+    total_steps = models.PositiveIntegerField(default=0)
+    completed_steps = models.PositiveIntegerField(default=0)
+    in_progress_steps = models.PositiveIntegerField(default=0)
+    # When a step first left `unstarted`; cleared if every step is reset.
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Compact storage: `{"<step id>": "c" | "i"}` for every step that left
+    # `unstarted`. `None` means statuses live in `LearningPathStepProgress`
+    # rows; `manage.py convert_step_statuses` moves records between the two.
+    step_statuses = models.JSONField(null=True, blank=True, editable=False)
+
+    objects = LearningPathProgressQuerySet.as_manager()
 
     class Meta:
         unique_together = ("user_profile", "learning_path")
+        indexes = [
+            # Serves the `(updated_at, id)` checkpoint scans of the sync pull feed.
+            models.Index(
+                fields=["user_profile", "updated_at", "id"],
+                name="learning_progress_sync_idx",
+            ),
+            # Serves the "started paths" lookup without touching step rows.
+            models.Index(
+                fields=["user_profile", "started_at"],
+                name="learning_progress_started_idx",
+            ),
+        ]
         verbose_name = _("Learning Path Progress")
         verbose_name_plural = _("Learning Path Progress Records")
 
@@ -146,36 +394,129 @@ class LearningPathProgress(TimeStampedModel):
             raise ValidationError(_("Last step must belong to the learning path."))
 
     def refresh_completion_state(self) -> None:
-        qs = self.step_progress_entries.all()
-        if qs.exists():
-            all_completed = not qs.exclude(
-                status=LearningPathStepProgress.Status.COMPLETED
-            ).exists()
-            if self.is_completed != all_completed:
-                self.is_completed = all_completed
-                self.save(update_fields=["is_completed", "updated_at"])
-        else:
-            if self.is_completed:
-                self.is_completed = False
-                self.save(update_fields=["is_completed", "updated_at"])
-
-    def ensure_all_step_progress_entries(self):
-        existing_step_ids = set(
-            self.step_progress_entries.values_list("step_id", flat=True)
+        """Reload the step counters and derived state maintained in SQL."""
+        self.refresh_from_db(
+            fields=[
+                "total_steps",
+                "completed_steps",
+                "in_progress_steps",
+                "is_completed",
+                "started_at",
+                "updated_at",
+            ]
         )
-        missing_steps = self.learning_path.steps.exclude(id__in=existing_step_ids)
-        LearningPathStepProgress.objects.bulk_create(
-            [
+
+    @staticmethod
+    def initial_step_statuses() -> dict[str, str] | None:
+        """Storage for new records, per `LEARNING_STEP_STATUS_STORAGE`."""
+        return {} if settings.LEARNING_STEP_STATUS_STORAGE == "compact" else None
+
+    @property
+    def uses_compact_statuses(self) -> bool:
+        return self.step_statuses is not None
+
+    def get_compact_statuses(self) -> dict[int, str]:
+        return {
+            int(step_id): STATUS_BY_CODE[code]
+            for step_id, code in (self.step_statuses or {}).items()
+        }
+
+    def set_compact_statuses(self, statuses: dict[int, str]) -> None:
+        self.step_statuses = {
+            str(step_id): CODE_BY_STATUS[status]
+            for step_id, status in sorted(statuses.items())
+            if status in CODE_BY_STATUS
+        }
+
+    def compact_step_counts(
+        self, step_ids: set[int] | None = None
+    ) -> tuple[int, int, int]:
+        """`(total, completed, in_progress)` derived from `step_statuses`.
+
+        `step_ids` are the path's current steps; loaded when not given.
+        """
+        if step_ids is None:
+            step_ids = _step_ids_by_path({self.learning_path_id})[self.learning_path_id]
+        statuses = [
+            status
+            for step_id, status in self.get_compact_statuses().items()
+            if step_id in step_ids
+        ]
+        return (
+            len(step_ids),
+            statuses.count(LearningPathStepProgress.Status.COMPLETED),
+            statuses.count(LearningPathStepProgress.Status.IN_PROGRESS),
+        )
+
+    def step_progress_snapshot(self) -> list["LearningPathStepProgress"]:
+        """Return one entry per step of the path, in step order.
+
+        Steps the learner never touched are represented by unsaved
+        `unstarted` entries instead of being written on read; rows are only
+        materialized when a status is actually submitted. Uses the prefetched
+        `learning_path.steps` and `step_progress_entries` when available.
+        Compact records answer every entry from `step_statuses`, unsaved.
+        """
+        if self.uses_compact_statuses:
+            statuses = self.get_compact_statuses()
+            return [
                 LearningPathStepProgress(
+                    progress=self,
+                    step=step,
+                    status=statuses.get(
+                        step.id, LearningPathStepProgress.Status.UNSTARTED
+                    ),
+                )
+                for step in self.learning_path.steps.all()
+            ]
+        stored = {entry.step_id: entry for entry in self.step_progress_entries.all()}
+        snapshot = []
+        for step in self.learning_path.steps.all():
+            entry = stored.get(step.id)
+            if entry is None:
+                entry = LearningPathStepProgress(
                     progress=self,
                     step=step,
                     status=LearningPathStepProgress.Status.UNSTARTED,
                 )
-                for step in missing_steps
-            ],
-            ignore_conflicts=True,
-        )
-        return self.step_progress_entries.select_related("step")
+            else:
+                # Reuse the loaded step rather than fetching it per entry.
+                entry.step = step
+            snapshot.append(entry)
+        return snapshot
+
+
+class LearningPathProgressTombstone(models.Model):
+    """Marks a deleted progress record so the sync feed can report it."""
+
+    # Constraints are disabled so tombstones outlive the rows they point at.
+    progress_id = models.BigIntegerField(unique=True)
+    user_profile = models.ForeignKey(
+        UserProfile,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    learning_path = models.ForeignKey(
+        LearningPath,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user_profile", "deleted_at", "progress_id"],
+                name="learning_tombstone_sync_idx",
+            ),
+        ]
+        verbose_name = _("Learning Path Progress Tombstone")
+        verbose_name_plural = _("Learning Path Progress Tombstones")
+
+    def __str__(self) -> str:
+        return f"Deleted progress #{self.progress_id}"
 
 
 class LearningPathStepProgress(TimeStampedModel):
@@ -207,7 +548,154 @@ class LearningPathStepProgress(TimeStampedModel):
     def __str__(self) -> str:
         return f"{self.step} - {self.get_status_display()}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a later save() can count the status transition.
+        instance._stored_status = instance.__dict__.get("status")
+        return instance
+
+    @classmethod
+    def counter_deltas(cls, previous: str | None, current: str | None) -> dict[str, int]:
+        """Translate a status transition into `shift_step_counters` deltas."""
+        counters = {cls.Status.COMPLETED: "completed", cls.Status.IN_PROGRESS: "in_progress"}
+        deltas = {"completed": 0, "in_progress": 0}
+        if previous in counters:
+            deltas[counters[previous]] -= 1
+        if current in counters:
+            deltas[counters[current]] += 1
+        return deltas
+
     def clean(self) -> None:
         super().clean()
         if self.step.learning_path_id != self.progress.learning_path_id:
             raise ValidationError(_("Step does not belong to the learning path."))
+
+
+class LearningPathStepRollupQuerySet(models.QuerySet):
+    def shift(
+        self, *, unstarted: int = 0, in_progress: int = 0, completed: int = 0
+    ) -> int:
+        return self.update(
+            unstarted=Greatest(F("unstarted") + unstarted, 0),
+            in_progress=Greatest(F("in_progress") + in_progress, 0),
+            completed=Greatest(F("completed") + completed, 0),
+        )
+
+    def shift_steps(self, deltas: dict[int, dict[str, int]]) -> None:
+        """Apply `{step_id: {column: delta}}`, one UPDATE per distinct delta."""
+        steps_by_delta: defaultdict[tuple, list[int]] = defaultdict(list)
+        for step_id, delta in deltas.items():
+            key = tuple(sorted((column, n) for column, n in delta.items() if n))
+            if key:
+                steps_by_delta[key].append(step_id)
+        for key, step_ids in steps_by_delta.items():
+            self.filter(step_id__in=step_ids).shift(**dict(key))
+
+
+class LearningPathStepRollup(models.Model):
+    """How many learners are at each status of one step (the path funnel).
+
+    Maintained incrementally on every status transition (see
+    `learning.signals` and `learning.sync.apply_step_statuses`), so funnel
+    reads never scan step progress. `rebuild()` recomputes it from the
+    stored statuses.
+    """
+
+    step = models.OneToOneField(
+        LearningPathStep,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rollup",
+    )
+    learning_path = models.ForeignKey(
+        LearningPath,
+        on_delete=models.CASCADE,
+        related_name="step_rollups",
+    )
+    unstarted = models.PositiveIntegerField(default=0)
+    in_progress = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+
+    objects = LearningPathStepRollupQuerySet.as_manager()
+
+    COLUMNS = {
+        LearningPathStepProgress.Status.UNSTARTED: "unstarted",
+        LearningPathStepProgress.Status.IN_PROGRESS: "in_progress",
+        LearningPathStepProgress.Status.COMPLETED: "completed",
+    }
+
+    def __str__(self) -> str:
+        return f"{self.step} rollup"
+
+    @classmethod
+    def transition(
+        cls, previous: str | None, current: str | None
+    ) -> dict[str, int]:
+        """Column deltas for one learner changing status (`None` is unstarted)."""
+        unstarted = LearningPathStepProgress.Status.UNSTARTED
+        before = cls.COLUMNS[previous or unstarted]
+        after = cls.COLUMNS[current or unstarted]
+        return {} if before == after else {before: -1, after: 1}
+
+    @classmethod
+    def rebuild(cls, learning_path_ids: list[int] | None = None) -> int:
+        """Recompute the rollups of the given paths (all paths by default)."""
+        steps = LearningPathStep.objects.all()
+        progress = LearningPathProgress.objects.all()
+        rollups = cls.objects.all()
+        if learning_path_ids is not None:
+            steps = steps.filter(learning_path_id__in=learning_path_ids)
+            progress = progress.filter(learning_path_id__in=learning_path_ids)
+            rollups = rollups.filter(learning_path_id__in=learning_path_ids)
+
+        learners = dict(
+            progress.order_by()
+            .values("learning_path_id")
+            .annotate(n=Count("id"))
+            .values_list("learning_path_id", "n")
+        )
+        counts: defaultdict[int, dict[str, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        for step_id, status, n in (
+            LearningPathStepProgress.objects.filter(
+                progress__in=progress.row_backed(),
+                status__in=list(CODE_BY_STATUS),
+            )
+            .order_by()
+            .values("step_id", "status")
+            .annotate(n=Count("id"))
+            .values_list("step_id", "status", "n")
+        ):
+            counts[step_id][cls.COLUMNS[status]] += n
+        for statuses in progress.compact().values_list("step_statuses", flat=True):
+            for step_id, code in statuses.items():
+                counts[int(step_id)][cls.COLUMNS[STATUS_BY_CODE[code]]] += 1
+
+        fresh = []
+        for step_id, path_id in steps.values_list("id", "learning_path_id"):
+            in_progress = counts[step_id]["in_progress"]
+            completed = counts[step_id]["completed"]
+            fresh.append(
+                cls(
+                    step_id=step_id,
+                    learning_path_id=path_id,
+                    unstarted=max(
+                        learners.get(path_id, 0) - in_progress - completed, 0
+                    ),
+                    in_progress=in_progress,
+                    completed=completed,
+                )
+            )
+        with transaction.atomic():
+            rollups.delete()
+            cls.objects.bulk_create(fresh, batch_size=1000)
+        return len(fresh)
+
+
+CODE_BY_STATUS = {
+    LearningPathStepProgress.Status.COMPLETED: "c",
+    LearningPathStepProgress.Status.IN_PROGRESS: "i",
+}
+STATUS_BY_CODE = {code: status for status, code in CODE_BY_STATUS.items()}
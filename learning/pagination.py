@@ -0,0 +1,153 @@
+"""Keyset pagination for learning path and progress listings.
+
+Pages are selected with `WHERE (title, id) > (:title, :id)` style filters
+instead of offsets, so fetching page N costs the same as fetching page 1
+and rows inserted ahead of the cursor never shift later pages.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from functools import reduce
+from operator import or_
+from typing import Any
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only cursor pagination over a unique `ordering`.
+
+    The last ordering field must be unique (normally `id`). Responses look
+    like `{"next": <url or null>, "results": [...]}`.
+    """
+
+    ordering: tuple[str, ...] = ("id",)
+    # Type of each `ordering` value in a cursor.
+    cursor_types: tuple[type, ...] = (int,)
+    # Query parameters carried over into `next` links besides the cursor and
+    # page size; `None` keeps all of them.
+    link_query_params: tuple[str, ...] | None = None
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request) -> int:
+        page_size = settings.LEARNING_PAGE_SIZE
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                page_size = int(raw)
+            except ValueError:
+                pass
+        return max(1, min(page_size, settings.LEARNING_MAX_PAGE_SIZE))
+
+    def window(self, queryset: QuerySet, request) -> QuerySet:
+        """Return the unevaluated page slice, one row longer than the page."""
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self._decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor))
+        return queryset[: self.get_page_size(request) + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        rows = list(self.window(queryset, request))
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.next_key = self._key(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_payload(data))
+
+    def get_paginated_payload(self, data) -> dict[str, Any]:
+        return {"next": self.get_next_link(), "results": data}
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.link_query_params is not None:
+            kept = (*self.link_query_params, self.page_size_query_param)
+            params = {
+                name: self.request.query_params[name]
+                for name in kept
+                if name in self.request.query_params
+            }
+            url = self.request.build_absolute_uri(self.request.path)
+            if params:
+                url = f"{url}?{urlencode(params)}"
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(self.next_key, separators=(",", ":")).encode()
+        ).decode()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def _key(self, instance) -> list[Any]:
+        if isinstance(instance, dict):
+            # `values()` rows are keyed by the ordering lookups themselves.
+            return [instance[field] for field in self.ordering]
+        key = []
+        for field in self.ordering:
+            value = instance
+            for attr in field.split("__"):
+                value = getattr(value, attr)
+            key.append(value)
+        return key
+
+    def _after(self, cursor: list[Any]) -> Q:
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        conditions = []
+        for position, field in enumerate(self.ordering):
+            equal = {name: cursor[i] for i, name in enumerate(self.ordering[:position])}
+            conditions.append(Q(**equal, **{f"{field}__gt": cursor[position]}))
+        return reduce(or_, conditions)
+
+    def _decode_cursor(self, request) -> list[Any] | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(cursor, list) or len(cursor) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        for value, expected in zip(cursor, self.cursor_types):
+            # `bool` is an `int` subclass, but never a valid key.
+            if not isinstance(value, expected) or isinstance(value, bool):
+                raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+
+# The query parameters of `LearningPathContentOptions`.
+CONTENT_QUERY_PARAMS = ("view", "expand", "fields")
+
+
+class LearningPathPagination(KeysetPagination):
+    ordering = ("title", "id")
+    cursor_types = (str, int)
+    link_query_params = CONTENT_QUERY_PARAMS
+
+
+class LearningPathProgressPagination(KeysetPagination):
+    ordering = ("learning_path__title", "id")
+    cursor_types = (str, int)
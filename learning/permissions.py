@@ -4,7 +4,7 @@ from typing import Any
 
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
-from accounts.models import UserProfile
+from accounts.authentication import ProfileClaims, get_profile_claims
 
 
 class CanManageLearningPaths(BasePermission):
@@ -40,8 +40,5 @@ class CanManageLearningPaths(BasePermission):
         return owner_id == profile.id
 
     @staticmethod
-    def _get_profile(user) -> UserProfile | None:
-        try:
-            return user.profile
-        except UserProfile.DoesNotExist:
-            return None
+    def _get_profile(user) -> ProfileClaims | None:
+        return get_profile_claims(user)
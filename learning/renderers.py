@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """`JSONRenderer` that encodes with orjson when it is installed.
+
+    Produces the same bytes as the stock renderer for serializer output
+    (strings, numbers, booleans, lists and dicts); anything orjson would
+    encode differently, indented output and non-compact settings fall back
+    to the stock encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_unsupported,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same JavaScript-safety escaping as `JSONRenderer`.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+def _unsupported(obj):
+    raise TypeError
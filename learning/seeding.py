@@ -0,0 +1,297 @@
+"""Synthetic learning data at production-like volumes.
+
+Everything is written with batched `bulk_create`, which skips the model
+signals; the state those signals maintain (profiles, progress counters,
+step rollups, the content version) is filled in here directly. Seeded rows
+are named after a prefix so several data sets can coexist and `flush()`
+can remove them again.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import UserProfile
+
+from .cache import bump_content_version
+from .models import (
+    CODE_BY_STATUS,
+    LearningPath,
+    LearningPathEnrollment,
+    LearningPathProgress,
+    LearningPathStep,
+    LearningPathStepBlock,
+    LearningPathStepProgress,
+    LearningPathStepRollup,
+)
+
+COMPLETED = LearningPathStepProgress.Status.COMPLETED
+IN_PROGRESS = LearningPathStepProgress.Status.IN_PROGRESS
+
+
+@dataclass(frozen=True)
+class SeedSpec:
+    paths: int = 100
+    steps: int = 10
+    blocks: int = 3
+    users: int = 1000
+    # Share of paths that are public.
+    public_share: float = 0.3
+    # Share of the private paths each learner is enrolled in.
+    enrollment_rate: float = 0.1
+    # Share of a learner's accessible paths with a progress record.
+    progress_rate: float = 0.5
+    # Share of progress records with every step completed; the others
+    # completed a uniform number of leading steps.
+    completion_rate: float = 0.2
+    storage: str = "rows"
+    prefix: str = "seed"
+    password: str = "seed-pass"
+    seed: int = 0
+    batch_size: int = 1000
+
+    @property
+    def staff_username(self) -> str:
+        return f"{self.prefix}-staff"
+
+    def learner_username(self, index: int) -> str:
+        return f"{self.prefix}-user-{index}"
+
+    def path_title(self, index: int) -> str:
+        return f"{self.prefix} path {index:06d}"
+
+
+@dataclass
+class SeedReport:
+    users: int = 0
+    paths: int = 0
+    steps: int = 0
+    blocks: int = 0
+    enrollments: int = 0
+    progress: int = 0
+    step_progress: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+def seed(spec: SeedSpec) -> SeedReport:
+    """Create one data set described by `spec` in a single transaction."""
+    rng = random.Random(spec.seed)
+    report = SeedReport()
+    with transaction.atomic():
+        staff_profile_id = _seed_staff(spec)
+        profile_ids = _seed_learners(spec, report)
+        steps_by_path, public, private = _seed_paths(
+            spec, staff_profile_id, rng, report
+        )
+        for batch in _batches(profile_ids, spec.batch_size):
+            _seed_assignments(spec, batch, steps_by_path, public, private, rng, report)
+        LearningPathStepRollup.rebuild(list(steps_by_path))
+        transaction.on_commit(bump_content_version)
+    return report
+
+
+def flush(prefix: str) -> None:
+    """Delete the data set seeded under `prefix`."""
+    with transaction.atomic():
+        LearningPath.objects.filter(title__startswith=f"{prefix} path ").delete()
+        get_user_model().objects.filter(username__startswith=f"{prefix}-").delete()
+        transaction.on_commit(bump_content_version)
+
+
+def _seed_staff(spec: SeedSpec) -> int:
+    # Owns every seeded path and can call the staff-only endpoints.
+    staff = get_user_model().objects.create_user(
+        username=spec.staff_username, password=spec.password, is_staff=True
+    )
+    UserProfile.objects.filter(user=staff).update(
+        can_create_learning_paths=True, can_manage_all_learning_paths=True
+    )
+    return staff.profile.id
+
+
+def _seed_learners(spec: SeedSpec, report: SeedReport) -> list[int]:
+    user_model = get_user_model()
+    password = make_password(spec.password)
+    for batch in _batches(range(spec.users), spec.batch_size):
+        user_model.objects.bulk_create(
+            [
+                user_model(username=spec.learner_username(index), password=password)
+                for index in batch
+            ]
+        )
+    learners = user_model.objects.filter(
+        username__startswith=f"{spec.prefix}-user-"
+    ).order_by("pk")
+    for batch in _batches(learners.values_list("pk", flat=True), spec.batch_size):
+        UserProfile.objects.bulk_create([UserProfile(user_id=pk) for pk in batch])
+    report.users = spec.users
+    return list(
+        UserProfile.objects.filter(user__in=learners)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def _seed_paths(
+    spec: SeedSpec, owner_id: int, rng: random.Random, report: SeedReport
+) -> tuple[dict[int, list[int]], list[int], list[int]]:
+    now = timezone.now()
+    LearningPath.objects.bulk_create(
+        [
+            LearningPath(
+                title=spec.path_title(index),
+                description=f"Synthetic path {index} of {spec.paths}.",
+                is_public=rng.random() < spec.public_share,
+                owner_id=owner_id,
+                content_updated_at=now,
+            )
+            for index in range(spec.paths)
+        ],
+        batch_size=spec.batch_size,
+    )
+    paths = dict(
+        LearningPath.objects.filter(title__startswith=f"{spec.prefix} path ")
+        .order_by("pk")
+        .values_list("pk", "is_public")
+    )
+    steps_by_path: dict[int, list[int]] = {}
+    per_batch = max(1, spec.batch_size // max(1, spec.steps))
+    for batch in _batches(paths, per_batch):
+        LearningPathStep.objects.bulk_create(
+            [
+                LearningPathStep(
+                    learning_path_id=path_id, title=f"Step {order}", order=order
+                )
+                for path_id in batch
+                for order in range(1, spec.steps + 1)
+            ]
+        )
+        step_ids = list(
+            LearningPathStep.objects.filter(learning_path_id__in=batch)
+            .order_by("learning_path_id", "order")
+            .values_list("learning_path_id", "pk")
+        )
+        for path_id, step_id in step_ids:
+            steps_by_path.setdefault(path_id, []).append(step_id)
+        LearningPathStepBlock.objects.bulk_create(
+            [
+                LearningPathStepBlock(
+                    step_id=step_id,
+                    order=order,
+                    block_type=LearningPathStepBlock.BlockType.TEXT,
+                    text=f"Block {order} of step {step_id}. " * 8,
+                )
+                for _, step_id in step_ids
+                for order in range(1, spec.blocks + 1)
+            ],
+            batch_size=spec.batch_size,
+        )
+    for path_id in paths:
+        steps_by_path.setdefault(path_id, [])
+    report.paths = len(paths)
+    report.steps = len(paths) * spec.steps
+    report.blocks = report.steps * spec.blocks
+    public = [path_id for path_id, is_public in paths.items() if is_public]
+    private = [path_id for path_id, is_public in paths.items() if not is_public]
+    return steps_by_path, public, private
+
+
+def _seed_assignments(
+    spec: SeedSpec,
+    profile_ids: list[int],
+    steps_by_path: dict[int, list[int]],
+    public: list[int],
+    private: list[int],
+    rng: random.Random,
+    report: SeedReport,
+) -> None:
+    now = timezone.now()
+    enrollments = []
+    records = []
+    statuses: dict[tuple[int, int], dict[int, str]] = {}
+    for profile_id in profile_ids:
+        enrolled = _sample(rng, private, spec.enrollment_rate)
+        enrollments.extend(
+            LearningPathEnrollment(learning_path_id=path_id, user_profile_id=profile_id)
+            for path_id in enrolled
+        )
+        for path_id in _sample(rng, public + enrolled, spec.progress_rate):
+            step_ids = steps_by_path[path_id]
+            entry = _step_statuses(rng, step_ids, spec.completion_rate)
+            completed = sum(status == COMPLETED for status in entry.values())
+            started = bool(entry)
+            records.append(
+                LearningPathProgress(
+                    user_profile_id=profile_id,
+                    learning_path_id=path_id,
+                    last_step_id=max(entry, default=None),
+                    total_steps=len(step_ids),
+                    completed_steps=completed,
+                    in_progress_steps=len(entry) - completed,
+                    is_completed=bool(step_ids) and completed == len(step_ids),
+                    started_at=(
+                        now - timedelta(days=90 * rng.random()) if started else None
+                    ),
+                    step_statuses=(
+                        {str(step): CODE_BY_STATUS[s] for step, s in entry.items()}
+                        if spec.storage == "compact"
+                        else None
+                    ),
+                )
+            )
+            statuses[profile_id, path_id] = entry
+
+    LearningPathEnrollment.objects.bulk_create(enrollments, batch_size=spec.batch_size)
+    LearningPathProgress.objects.bulk_create(records, batch_size=spec.batch_size)
+    report.enrollments += len(enrollments)
+    report.progress += len(records)
+    if spec.storage == "compact":
+        return
+
+    progress_ids = LearningPathProgress.objects.filter(
+        user_profile_id__in=profile_ids
+    ).values_list("user_profile_id", "learning_path_id", "pk")
+    rows = [
+        LearningPathStepProgress(progress_id=pk, step_id=step_id, status=status)
+        for profile_id, path_id, pk in progress_ids
+        for step_id, status in statuses.get((profile_id, path_id), {}).items()
+    ]
+    LearningPathStepProgress.objects.bulk_create(rows, batch_size=spec.batch_size)
+    report.step_progress += len(rows)
+
+
+def _step_statuses(
+    rng: random.Random, step_ids: list[int], completion_rate: float
+) -> dict[int, str]:
+    if not step_ids:
+        return {}
+    if rng.random() < completion_rate:
+        return dict.fromkeys(step_ids, COMPLETED)
+    reached = rng.randrange(len(step_ids))
+    statuses = dict.fromkeys(step_ids[:reached], COMPLETED)
+    if rng.random() < 0.5:
+        statuses[step_ids[reached]] = IN_PROGRESS
+    return statuses
+
+
+def _sample(rng: random.Random, population: list[int], rate: float) -> list[int]:
+    expected = rate * len(population)
+    count = int(expected) + (rng.random() < expected % 1)
+    return rng.sample(population, min(count, len(population)))
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
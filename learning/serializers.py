@@ -1,19 +1,88 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Any, Iterable
 
 from django.db import transaction
 from rest_framework import serializers
 
+from accounts.authentication import ProfileClaims, get_profile_claims
 from accounts.models import UserProfile
+from main.timing import TimedListSerializer, TimedSerializerMixin
 
+from .export import CSV, NDJSON
 from .models import (
     LearningPath,
     LearningPathProgress,
+    LearningPathProgressTombstone,
     LearningPathStep,
     LearningPathStepBlock,
     LearningPathStepProgress,
 )
+from .sync import Checkpoint, apply_step_statuses
+
+DEFAULT_CHANGES_LIMIT = 100
+MAX_CHANGES_LIMIT = 1000
+
+
+@dataclass(frozen=True)
+class LearningPathContentOptions:
+    """Which parts of a learning path a read request asked to render.
+
+    Built from `?view=summary`, `?expand=steps,blocks` and `?fields=...`;
+    the defaults reproduce the full tree.
+    """
+
+    # Sorted, so equal options always share a cache key.
+    fields: tuple[str, ...] | None = None
+    steps: bool = True
+    blocks: bool = True
+    step_count: bool = False
+
+    @classmethod
+    def from_query_params(cls, params) -> LearningPathContentOptions:
+        view = params.get("view") or "full"
+        if view not in ("full", "summary"):
+            raise serializers.ValidationError({"view": "Use 'full' or 'summary'."})
+        steps = blocks = view == "full"
+        step_count = view == "summary"
+
+        if "expand" in params:
+            expand = _split_param(params["expand"])
+            if expand - {"steps", "blocks"}:
+                raise serializers.ValidationError(
+                    {"expand": "Only 'steps' and 'blocks' can be expanded."}
+                )
+            blocks = "blocks" in expand
+            steps = blocks or "steps" in expand
+
+        fields = None
+        if params.get("fields"):
+            fields = tuple(sorted(_split_param(params["fields"])))
+            unknown = set(fields) - set(LearningPathSerializer.Meta.fields)
+            if unknown:
+                raise serializers.ValidationError(
+                    {"fields": f"Unknown fields: {', '.join(sorted(unknown))}."}
+                )
+            steps = "steps" in fields
+            blocks = blocks and steps
+            step_count = "step_count" in fields
+        return cls(fields=fields, steps=steps, blocks=blocks, step_count=step_count)
+
+    def prune(self, fields: dict[str, Any]) -> dict[str, Any]:
+        if self.fields:
+            keep = set(self.fields)
+        else:
+            keep = set(fields) - {"step_count"}
+            if self.step_count:
+                keep.add("step_count")
+        if not self.steps:
+            keep = keep - {"steps"}
+        return {name: field for name, field in fields.items() if name in keep}
+
+
+def _split_param(value: str) -> set[str]:
+    return {item.strip() for item in value.split(",") if item.strip()}
 
 
 class LearningPathStepBlockSerializer(serializers.ModelSerializer):
@@ -40,13 +109,22 @@ class LearningPathStepSerializer(serializers.ModelSerializer):
         fields = ("id", "title", "order", "blocks", "created_at", "updated_at")
         read_only_fields = ("id", "created_at", "updated_at")
 
+    def get_fields(self):
+        fields = super().get_fields()
+        options = self.context.get("content_options")
+        if options and not options.blocks:
+            fields.pop("blocks")
+        return fields
+
 
-class LearningPathSerializer(serializers.ModelSerializer):
+class LearningPathSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     steps = LearningPathStepSerializer(many=True, read_only=True)
+    step_count = serializers.IntegerField(read_only=True)
     owner = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         model = LearningPath
+        list_serializer_class = TimedListSerializer
         fields = (
             "id",
             "title",
@@ -54,11 +132,100 @@ class LearningPathSerializer(serializers.ModelSerializer):
             "is_public",
             "owner",
             "steps",
+            "step_count",
             "created_at",
             "updated_at",
         )
         read_only_fields = ("id", "created_at", "updated_at")
 
+    def get_fields(self):
+        options = self.context.get("content_options") or LearningPathContentOptions()
+        return options.prune(super().get_fields())
+
+
+class LearningPathDashboardSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Read-only summary row built from `LearningPathViewSet.dashboard`."""
+
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    step_count = serializers.IntegerField()
+    progress = serializers.IntegerField(allow_null=True)
+    completed_steps = serializers.SerializerMethodField()
+    in_progress_steps = serializers.SerializerMethodField()
+    percent_complete = serializers.SerializerMethodField()
+    last_step = serializers.IntegerField(allow_null=True)
+    is_completed = serializers.SerializerMethodField()
+    started_at = serializers.DateTimeField(allow_null=True)
+
+    class Meta:
+        list_serializer_class = TimedListSerializer
+
+    # Paths without a progress record come back with NULL counters.
+    def get_completed_steps(self, row: dict[str, Any]) -> int:
+        return row["completed_steps"] or 0
+
+    def get_in_progress_steps(self, row: dict[str, Any]) -> int:
+        return row["in_progress_steps"] or 0
+
+    def get_percent_complete(self, row: dict[str, Any]) -> int:
+        if not row["step_count"]:
+            return 0
+        completed = row["completed_steps"] or 0
+        return min(100, round(100 * completed / row["step_count"]))
+
+    def get_is_completed(self, row: dict[str, Any]) -> bool:
+        return bool(row["is_completed"])
+
+
+class LearningPathFunnelStepSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Read-only funnel row built from `LearningPathViewSet.funnel`."""
+
+    step = serializers.IntegerField(source="id")
+    title = serializers.CharField()
+    order = serializers.IntegerField()
+    unstarted = serializers.SerializerMethodField()
+    in_progress = serializers.SerializerMethodField()
+    completed = serializers.SerializerMethodField()
+
+    class Meta:
+        list_serializer_class = TimedListSerializer
+
+    # Steps whose rollup has not been built yet come back with NULL counts.
+    def get_unstarted(self, row: dict[str, Any]) -> int:
+        return row["rollup__unstarted"] or 0
+
+    def get_in_progress(self, row: dict[str, Any]) -> int:
+        return row["rollup__in_progress"] or 0
+
+    def get_completed(self, row: dict[str, Any]) -> int:
+        return row["rollup__completed"] or 0
+
+
+class EnrollmentRequestSerializer(serializers.Serializer):
+    profile_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list
+    )
+    usernames = serializers.ListField(
+        child=serializers.CharField(), required=False, default=list
+    )
+    file = serializers.FileField(required=False)
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        if not (attrs["profile_ids"] or attrs["usernames"] or attrs.get("file")):
+            raise serializers.ValidationError(
+                "Provide profile_ids, usernames or a CSV file."
+            )
+        return attrs
+
+
+class ProgressExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=(CSV, NDJSON), default=CSV)
+    learning_path = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list
+    )
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+
 
 class UserProfileSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField()
@@ -69,11 +236,53 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "user", "created_at", "updated_at")
 
 
+class StepPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """Step reference that reads from steps the list serializer preloaded."""
+
+    def __init__(self, **kwargs):
+        self.preloaded: dict[int, LearningPathStep] = {}
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        step = self.preloaded.get(_as_pk(data))
+        if step is not None:
+            return step
+        return super().to_internal_value(data)
+
+
+def _as_pk(value) -> int | None:
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class LearningPathStepProgressListSerializer(serializers.ListSerializer):
+    def get_attribute(self, instance: LearningPathProgress):
+        return instance.step_progress_snapshot()
+
+    def to_internal_value(self, data):
+        # Resolve every submitted step with one query instead of one per entry.
+        if isinstance(data, list):
+            step_ids = {
+                _as_pk(item.get("step")) for item in data if isinstance(item, dict)
+            }
+            step_ids.discard(None)
+            self.child.fields["step"].preloaded = LearningPathStep.objects.in_bulk(
+                step_ids
+            )
+        return super().to_internal_value(data)
+
+
 class LearningPathStepProgressSerializer(serializers.ModelSerializer):
+    step = StepPrimaryKeyField(queryset=LearningPathStep.objects.all())
     step_order = serializers.IntegerField(source="step.order", read_only=True)
 
     class Meta:
         model = LearningPathStepProgress
+        list_serializer_class = LearningPathStepProgressListSerializer
         fields = (
             "id",
             "step",
@@ -85,7 +294,7 @@ class LearningPathStepProgressSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "created_at", "updated_at", "step_order")
 
 
-class LearningPathProgressSerializer(serializers.ModelSerializer):
+class LearningPathProgressSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     learning_path = serializers.PrimaryKeyRelatedField(
         queryset=LearningPath.objects.all()
     )
@@ -100,16 +309,30 @@ class LearningPathProgressSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = LearningPathProgress
+        list_serializer_class = TimedListSerializer
         fields = (
             "id",
             "learning_path",
             "last_step",
             "is_completed",
+            "total_steps",
+            "completed_steps",
+            "in_progress_steps",
+            "started_at",
             "step_progress_entries",
             "created_at",
             "updated_at",
         )
-        read_only_fields = ("id", "is_completed", "created_at", "updated_at")
+        read_only_fields = (
+            "id",
+            "is_completed",
+            "total_steps",
+            "completed_steps",
+            "in_progress_steps",
+            "started_at",
+            "created_at",
+            "updated_at",
+        )
 
     def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
         learning_path: LearningPath = attrs.get("learning_path") or (
@@ -133,42 +356,29 @@ class LearningPathProgressSerializer(serializers.ModelSerializer):
                 )
         return attrs
 
-    def _get_user_profile(self) -> UserProfile:
+    def _get_user_profile(self) -> ProfileClaims:
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             raise serializers.ValidationError("Authentication required.")
-        try:
-            return request.user.profile
-        except UserProfile.DoesNotExist as exc:
+        profile = get_profile_claims(request.user)
+        if profile is None:
             raise serializers.ValidationError(
                 "User profile is missing. Please contact support."
-            ) from exc
+            )
+        return profile
 
-    def _sync_step_progress(
-        self,
+    @staticmethod
+    def _write_progress(
         progress: LearningPathProgress,
         step_progress_data: Iterable[dict[str, Any]],
     ) -> None:
-        existing = {
-            item.step_id: item
-            for item in progress.step_progress_entries.select_related("step")
+        """Apply submitted step statuses to a locked `progress` row in bulk."""
+        unstarted = LearningPathStepProgress.Status.UNSTARTED
+        statuses = {
+            item["step"].id: item.get("status", unstarted)
+            for item in step_progress_data or []
         }
-        for progress_item in step_progress_data or []:
-            step = progress_item["step"]
-            status = progress_item.get(
-                "status", LearningPathStepProgress.Status.UNSTARTED
-            )
-            entry = existing.get(step.id)
-            if entry:
-                if entry.status != status:
-                    entry.status = status
-                    entry.save(update_fields=["status", "updated_at"])
-            else:
-                LearningPathStepProgress.objects.create(
-                    progress=progress,
-                    step=step,
-                    status=status,
-                )
+        apply_step_statuses([progress], {progress.id: statuses})
 
     def create(self, validated_data: dict[str, Any]) -> LearningPathProgress:
         step_progress_data = validated_data.pop("step_progress_entries", [])
@@ -177,16 +387,14 @@ class LearningPathProgressSerializer(serializers.ModelSerializer):
         last_step = validated_data.get("last_step")
 
         with transaction.atomic():
-            progress, created = LearningPathProgress.objects.get_or_create(
-                user_profile=user_profile,
+            progress, _ = LearningPathProgress.objects.select_for_update().get_or_create(
+                user_profile_id=user_profile.id,
                 learning_path=learning_path,
                 defaults={"last_step": last_step},
             )
-            if not created and last_step:
+            if last_step:
                 progress.last_step = last_step
-                progress.save(update_fields=["last_step", "updated_at"])
-            self._sync_step_progress(progress, step_progress_data)
-            progress.refresh_completion_state()
+            self._write_progress(progress, step_progress_data)
         return progress
 
     def update(
@@ -196,14 +404,70 @@ class LearningPathProgressSerializer(serializers.ModelSerializer):
         last_step = validated_data.get("last_step")
 
         with transaction.atomic():
+            progress = LearningPathProgress.objects.select_for_update().get(
+                pk=instance.pk
+            )
+            # Steps are not touched by progress writes; keep the prefetched ones.
+            progress.learning_path = instance.learning_path
             if last_step is not None:
-                instance.last_step = last_step
-                instance.save(update_fields=["last_step", "updated_at"])
-            self._sync_step_progress(instance, step_progress_data)
-            instance.refresh_from_db()
-            instance.refresh_completion_state()
-        return instance
-
-    def to_representation(self, instance: LearningPathProgress) -> dict[str, Any]:
-        instance.ensure_all_step_progress_entries()
-        return super().to_representation(instance)
+                progress.last_step = last_step
+            self._write_progress(progress, step_progress_data)
+        return progress
+
+
+class LearningPathProgressTombstoneSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
+    id = serializers.IntegerField(source="progress_id", read_only=True)
+    learning_path = serializers.IntegerField(source="learning_path_id", read_only=True)
+    updated_at = serializers.DateTimeField(source="deleted_at", read_only=True)
+    deleted = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LearningPathProgressTombstone
+        fields = ("id", "learning_path", "deleted", "updated_at")
+
+    def get_deleted(self, obj: LearningPathProgressTombstone) -> bool:
+        return True
+
+
+class ProgressChangesQuerySerializer(serializers.Serializer):
+    checkpoint = serializers.CharField(required=False, allow_blank=True)
+    limit = serializers.IntegerField(
+        required=False,
+        default=DEFAULT_CHANGES_LIMIT,
+        min_value=1,
+        max_value=MAX_CHANGES_LIMIT,
+    )
+
+    def validate_checkpoint(self, value: str) -> Checkpoint | None:
+        if not value:
+            return None
+        try:
+            return Checkpoint.decode(value)
+        except (OverflowError, ValueError) as exc:
+            raise serializers.ValidationError("Invalid checkpoint.") from exc
+
+
+class ProgressPushStepSerializer(serializers.Serializer):
+    step = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=LearningPathStepProgress.Status.choices)
+
+
+class ProgressPushDocumentSerializer(serializers.Serializer):
+    # Plain ids keep validation of large batches free of per-row lookups;
+    # `push_progress_documents` resolves them in bulk.
+    learning_path = serializers.IntegerField()
+    last_step = serializers.IntegerField(allow_null=True, required=False)
+    step_progress_entries = ProgressPushStepSerializer(many=True, required=False)
+
+
+class ProgressAssumedStateSerializer(serializers.Serializer):
+    updated_at = serializers.DateTimeField()
+
+
+class ProgressPushRowSerializer(serializers.Serializer):
+    assumed_master_state = ProgressAssumedStateSerializer(
+        allow_null=True, required=False, default=None
+    )
+    new_document_state = ProgressPushDocumentSerializer()
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .access import invalidate_access, invalidate_group_access, invalidate_user_access
+from .cache import bump_content_version
+from .models import (
+    LearningPath,
+    LearningPathEnrollment,
+    LearningPathProgress,
+    LearningPathProgressTombstone,
+    LearningPathStep,
+    LearningPathStepBlock,
+    LearningPathStepProgress,
+    LearningPathStepRollup,
+)
+
+COUNTED_STATUSES = (
+    LearningPathStepProgress.Status.COMPLETED,
+    LearningPathStepProgress.Status.IN_PROGRESS,
+)
+
+
+def _deleted_via(origin, model) -> bool:
+    """Whether a delete() call started on `model` (instance or queryset)."""
+    return isinstance(origin, model) or getattr(origin, "model", None) is model
+
+
+@receiver(pre_save, sender=LearningPathProgress)
+def count_steps_for_new_progress(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance.total_steps = LearningPathStep.objects.filter(
+            learning_path_id=instance.learning_path_id
+        ).count()
+        if instance.step_statuses is None:
+            instance.step_statuses = LearningPathProgress.initial_step_statuses()
+
+
+@receiver(post_save, sender=LearningPathProgress)
+def roll_up_new_progress(sender, instance, created, **kwargs):
+    # A new learner starts out unstarted at every step of the path.
+    if created:
+        LearningPathStepRollup.objects.filter(
+            learning_path_id=instance.learning_path_id
+        ).shift(unstarted=1)
+
+
+@receiver(pre_delete, sender=LearningPathProgress)
+def unroll_deleted_progress(sender, instance, origin=None, **kwargs):
+    if _deleted_via(origin, LearningPath):
+        return
+    if instance.uses_compact_statuses:
+        statuses = instance.get_compact_statuses()
+    else:
+        statuses = dict(
+            LearningPathStepProgress.objects.filter(progress=instance).values_list(
+                "step_id", "status"
+            )
+        )
+    rollups = LearningPathStepRollup.objects.filter(
+        learning_path_id=instance.learning_path_id
+    )
+    # Move the learner back to unstarted first, so the clamped decrement
+    # below never hits a column that is still zero.
+    rollups.shift_steps(
+        {
+            step_id: LearningPathStepRollup.transition(status, None)
+            for step_id, status in statuses.items()
+        }
+    )
+    rollups.shift(unstarted=-1)
+
+
+@receiver(post_delete, sender=LearningPathProgress)
+def record_progress_tombstone(sender, instance, origin=None, **kwargs):
+    # Records deleted with their path are tombstoned in one statement by
+    # `record_path_progress_tombstones`.
+    if _deleted_via(origin, LearningPath):
+        return
+    _record_tombstones(
+        [(instance.pk, instance.user_profile_id)], instance.learning_path_id
+    )
+
+
+@receiver(pre_delete, sender=LearningPath)
+def record_path_progress_tombstones(sender, instance, **kwargs):
+    _record_tombstones(
+        instance.progress_entries.values_list("pk", "user_profile_id"), instance.pk
+    )
+
+
+def _record_tombstones(records, learning_path_id: int) -> None:
+    # Upsert: SQLite may hand the id of a deleted record to a new one.
+    deleted_at = timezone.now()
+    LearningPathProgressTombstone.objects.bulk_create(
+        [
+            LearningPathProgressTombstone(
+                progress_id=progress_id,
+                user_profile_id=profile_id,
+                learning_path_id=learning_path_id,
+                deleted_at=deleted_at,
+            )
+            for progress_id, profile_id in records
+        ],
+        update_conflicts=True,
+        unique_fields=["progress_id"],
+        update_fields=["user_profile", "learning_path", "deleted_at"],
+    )
+
+
+@receiver(post_save, sender=LearningPathStepProgress)
+def count_step_status(sender, instance, created, **kwargs):
+    # Also bumps `updated_at`, which re-emits the record in the sync feed.
+    previous = None if created else getattr(instance, "_stored_status", None)
+    LearningPathProgress.objects.filter(pk=instance.progress_id).shift_step_counters(
+        **LearningPathStepProgress.counter_deltas(previous, instance.status)
+    )
+    _shift_rollup(instance.step_id, previous, instance.status)
+    instance._stored_status = instance.status
+
+
+@receiver(post_delete, sender=LearningPathStepProgress)
+def uncount_step_status(sender, instance, origin=None, **kwargs):
+    # Cascades from a step, progress record or path are accounted for by
+    # the handlers of the deleted parent.
+    if not _deleted_via(origin, LearningPathStepProgress):
+        return
+    LearningPathProgress.objects.filter(pk=instance.progress_id).shift_step_counters(
+        **LearningPathStepProgress.counter_deltas(instance.status, None)
+    )
+    _shift_rollup(instance.step_id, instance.status, None)
+
+
+def _shift_rollup(step_id: int, previous: str | None, current: str | None) -> None:
+    delta = LearningPathStepRollup.transition(previous, current)
+    if delta:
+        LearningPathStepRollup.objects.filter(step_id=step_id).shift(**delta)
+
+
+@receiver(post_save, sender=LearningPathStep)
+def count_new_step(sender, instance, created, **kwargs):
+    # New steps show up as unstarted entries in every learner's document.
+    if created:
+        LearningPathProgress.objects.filter(
+            learning_path_id=instance.learning_path_id
+        ).shift_step_counters(total=1)
+
+
+@receiver(post_save, sender=LearningPathStep)
+def touch_progress_for_moved_step(sender, instance, created, **kwargs):
+    # Progress documents carry each entry's `step_order`; bumping
+    # `updated_at` re-emits them in the sync feed.
+    if not created and getattr(instance, "_stored_order", None) != instance.order:
+        LearningPathProgress.objects.filter(
+            learning_path_id=instance.learning_path_id
+        ).update(updated_at=timezone.now())
+    instance._stored_order = instance.order
+
+
+@receiver(post_save, sender=LearningPathStep)
+def create_step_rollup(sender, instance, created, **kwargs):
+    if created:
+        LearningPathStepRollup.objects.create(
+            step=instance,
+            learning_path_id=instance.learning_path_id,
+            unstarted=LearningPathProgress.objects.filter(
+                learning_path_id=instance.learning_path_id
+            ).count(),
+        )
+
+
+@receiver(pre_delete, sender=LearningPathStep)
+def uncount_removed_step(sender, instance, origin=None, **kwargs):
+    if _deleted_via(origin, LearningPath):
+        return
+    progress = LearningPathProgress.objects.filter(
+        learning_path_id=instance.learning_path_id
+    )
+    entries = LearningPathStepProgress.objects.filter(step=instance)
+    for status in COUNTED_STATUSES:
+        progress.filter(
+            pk__in=entries.filter(status=status).values("progress_id")
+        ).shift_step_counters(
+            total=-1, **LearningPathStepProgress.counter_deltas(status, None)
+        )
+
+    # Compact records that tracked the step drop its key as well. The lock
+    # keeps a concurrent progress write from being overwritten.
+    compact = list(
+        progress.filter(step_statuses__has_key=str(instance.pk))
+        .select_for_update()
+        .only("step_statuses")
+    )
+    compact_ids_by_status = defaultdict(list)
+    for record in compact:
+        statuses = record.get_compact_statuses()
+        compact_ids_by_status[statuses.pop(instance.pk)].append(record.pk)
+        record.set_compact_statuses(statuses)
+    LearningPathProgress.objects.bulk_update(compact, ["step_statuses"])
+    for status, ids in compact_ids_by_status.items():
+        progress.filter(pk__in=ids).shift_step_counters(
+            total=-1, **LearningPathStepProgress.counter_deltas(status, None)
+        )
+
+    progress.exclude(
+        pk__in=entries.filter(status__in=COUNTED_STATUSES).values("progress_id")
+    ).exclude(pk__in=[record.pk for record in compact]).shift_step_counters(total=-1)
+
+
+@receiver(post_save, sender=LearningPath)
+@receiver(post_delete, sender=LearningPath)
+@receiver(post_save, sender=LearningPathStep)
+@receiver(post_delete, sender=LearningPathStep)
+@receiver(post_save, sender=LearningPathStepBlock)
+@receiver(post_delete, sender=LearningPathStepBlock)
+def invalidate_content_cache(sender, instance, **kwargs):
+    bump_content_version()
+    # Bump again once committed: a concurrent read may have cached the
+    # pre-commit state under the version bumped above.
+    transaction.on_commit(bump_content_version)
+
+
+@receiver(pre_save, sender=LearningPath)
+def stamp_path_content(sender, instance, **kwargs):
+    instance.content_updated_at = timezone.now()
+
+
+def _bump_path_content(**filters) -> None:
+    LearningPath.objects.filter(**filters).update(
+        content_version=F("content_version") + 1,
+        content_updated_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=LearningPathStep)
+@receiver(post_delete, sender=LearningPathStep)
+def bump_path_content_for_step(sender, instance, origin=None, **kwargs):
+    # A path deleted as a whole has no content version left to bump.
+    if _deleted_via(origin, LearningPath):
+        return
+    _bump_path_content(pk=instance.learning_path_id)
+
+
+@receiver(post_save, sender=LearningPathStepBlock)
+@receiver(post_delete, sender=LearningPathStepBlock)
+def bump_path_content_for_block(sender, instance, origin=None, **kwargs):
+    # Blocks cascading from a step or path leave the bump to that parent.
+    if _deleted_via(origin, LearningPath) or _deleted_via(origin, LearningPathStep):
+        return
+    _bump_path_content(steps=instance.step_id)
+
+
+@receiver(post_save, sender=LearningPathEnrollment)
+@receiver(post_delete, sender=LearningPathEnrollment)
+def invalidate_enrollment_access(sender, instance, **kwargs):
+    invalidate_access(instance.user_profile_id)
+
+
+@receiver(post_save, sender=LearningPath)
+def invalidate_owner_access(sender, instance, created, **kwargs):
+    previous_owner_id = getattr(instance, "_stored_owner_id", None)
+    if created or previous_owner_id != instance.owner_id:
+        invalidate_access(previous_owner_id, instance.owner_id)
+    instance._stored_owner_id = instance.owner_id
+
+
+@receiver(post_delete, sender=LearningPath)
+def invalidate_deleted_path_access(sender, instance, **kwargs):
+    invalidate_access(instance.owner_id)
+
+
+@receiver(m2m_changed, sender=LearningPath.assigned_groups.through)
+def invalidate_group_assignment(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # `group.learning_paths.add(...)`: only this group's path set changed.
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_group_access(instance.pk)
+    elif action == "pre_clear":
+        instance._cleared_group_ids = list(
+            instance.assigned_groups.values_list("id", flat=True)
+        )
+    elif action == "post_clear":
+        invalidate_group_access(*getattr(instance, "_cleared_group_ids", ()))
+    elif action in ("post_add", "post_remove"):
+        invalidate_group_access(*pk_set)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def invalidate_membership_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_user_access(instance.pk)
+    elif action == "pre_clear":
+        instance._cleared_user_ids = list(instance.user_set.values_list("id", flat=True))
+    elif action == "post_clear":
+        invalidate_user_access(*getattr(instance, "_cleared_user_ids", ()))
+    elif action in ("post_add", "post_remove"):
+        invalidate_user_access(*pk_set)
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_members(sender, instance, **kwargs):
+    instance._member_ids = list(instance.user_set.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_deleted_group_access(sender, instance, **kwargs):
+    invalidate_group_access(instance.pk)
+    invalidate_user_access(*getattr(instance, "_member_ids", ()))
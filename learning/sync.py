@@ -0,0 +1,380 @@
+"""Checkpoint-based replication helpers for local-first progress sync."""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Iterable, NamedTuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from .access import get_access_index
+from .models import (
+    LearningPath,
+    LearningPathProgress,
+    LearningPathProgressTombstone,
+    LearningPathStep,
+    LearningPathStepProgress,
+    LearningPathStepRollup,
+)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class Checkpoint(NamedTuple):
+    """Position in the change feed: last seen `(updated_at, id)` pair.
+
+    Encoded as `<epoch microseconds>-<id>` so it survives URLs untouched and
+    keeps full timestamp precision; the id breaks ties between rows written
+    in the same microsecond.
+    """
+
+    updated_at: datetime
+    id: int
+
+    def encode(self) -> str:
+        return f"{(self.updated_at - EPOCH) // MICROSECOND}-{self.id}"
+
+    @classmethod
+    def decode(cls, value: str) -> Checkpoint:
+        micros, separator, pk = value.partition("-")
+        if not separator:
+            raise ValueError("Checkpoint must look like '<timestamp>-<id>'.")
+        return cls(EPOCH + int(micros) * MICROSECOND, int(pk))
+
+
+def after_checkpoint(
+    queryset: QuerySet,
+    checkpoint: Checkpoint | None,
+    timestamp_field: str = "updated_at",
+    id_field: str = "id",
+) -> QuerySet:
+    """Return rows strictly after `checkpoint`, ordered by `(timestamp, id)`."""
+    if checkpoint is not None:
+        queryset = queryset.filter(
+            Q(**{f"{timestamp_field}__gt": checkpoint.updated_at})
+            | Q(
+                **{
+                    timestamp_field: checkpoint.updated_at,
+                    f"{id_field}__gt": checkpoint.id,
+                }
+            )
+        )
+    return queryset.order_by(timestamp_field, id_field)
+
+
+@dataclass
+class ChangeBatch:
+    documents: list[LearningPathProgress | LearningPathProgressTombstone] = field(
+        default_factory=list
+    )
+    checkpoint: Checkpoint | None = None
+
+
+def pull_progress_changes(
+    progress_queryset: QuerySet,
+    profile_id: int,
+    checkpoint: Checkpoint | None,
+    limit: int,
+) -> ChangeBatch:
+    """Collect up to `limit` progress records and tombstones after `checkpoint`.
+
+    Live records and tombstones share one id space (a tombstone keeps the id
+    of the progress record it replaces), so merging both streams on
+    `(timestamp, id)` yields a single total order.
+
+    Timestamps are taken before their transaction commits, so a write
+    stamped earlier may become visible after a later one. Changes younger
+    than `LEARNING_SYNC_SAFETY_LAG_SECONDS` are held back, which keeps the
+    returned checkpoint behind any transaction that may still commit.
+    """
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.LEARNING_SYNC_SAFETY_LAG_SECONDS
+    )
+    settled = progress_queryset.filter(updated_at__lte=cutoff)
+    live = list(after_checkpoint(settled, checkpoint)[:limit])
+    tombstones = list(
+        after_checkpoint(
+            LearningPathProgressTombstone.objects.filter(
+                user_profile_id=profile_id, deleted_at__lte=cutoff
+            ),
+            checkpoint,
+            timestamp_field="deleted_at",
+            id_field="progress_id",
+        )[:limit]
+    )
+    merged = sorted(live + tombstones, key=_position)[:limit]
+    batch = ChangeBatch(documents=merged, checkpoint=checkpoint)
+    if merged:
+        batch.checkpoint = Checkpoint(*_position(merged[-1]))
+    return batch
+
+
+def _position(
+    document: LearningPathProgress | LearningPathProgressTombstone,
+) -> tuple[datetime, int]:
+    if isinstance(document, LearningPathProgressTombstone):
+        return document.deleted_at, document.progress_id
+    return document.updated_at, document.id
+
+
+def push_progress_documents(
+    profile_id: int, rows: Iterable[dict[str, Any]]
+) -> list[int]:
+    """Apply pushed progress documents in one transaction.
+
+    Each row carries the server state the client last saw
+    (`assumed_master_state`) and the state it wants (`new_document_state`).
+    Rows whose assumption no longer matches the stored record are skipped
+    and returned as conflicts; everything else is written with bulk
+    statements. Returns the ids of the conflicting progress records.
+    """
+    rows = list(rows)
+    documents = {row["new_document_state"]["learning_path"]: row for row in rows}
+    if len(documents) != len(rows):
+        raise ValidationError("Each learning path may only be pushed once per batch.")
+
+    path_ids = set(documents)
+    steps_by_path = _validate_push_targets(profile_id, path_ids, documents)
+
+    with transaction.atomic():
+        existing = {
+            progress.learning_path_id: progress
+            for progress in LearningPathProgress.objects.select_for_update().filter(
+                user_profile_id=profile_id, learning_path_id__in=path_ids
+            )
+        }
+        conflicting = {
+            path_id
+            for path_id, progress in existing.items()
+            if _is_conflict(documents[path_id].get("assumed_master_state"), progress)
+        }
+        accepted = path_ids - conflicting
+
+        missing = accepted - set(existing)
+        while missing:
+            try:
+                _create_progress(profile_id, missing, steps_by_path)
+                break
+            except IntegrityError:
+                # `select_for_update` cannot lock rows that did not exist yet:
+                # a concurrent push created some of these since. The client
+                # assumed no record, so they are conflicts like any other.
+                raced = list(
+                    LearningPathProgress.objects.select_for_update().filter(
+                        user_profile_id=profile_id, learning_path_id__in=missing
+                    )
+                )
+                if not raced:
+                    raise
+                for progress in raced:
+                    existing[progress.learning_path_id] = progress
+                    conflicting.add(progress.learning_path_id)
+                accepted -= conflicting
+                missing -= conflicting
+        if missing:
+            # Bulk inserts skip the signal that counts new learners.
+            LearningPathStepRollup.objects.filter(
+                learning_path_id__in=missing
+            ).shift(unstarted=1)
+            existing.update(
+                (progress.learning_path_id, progress)
+                for progress in LearningPathProgress.objects.filter(
+                    user_profile_id=profile_id, learning_path_id__in=missing
+                )
+            )
+
+        progress_records = [existing[path_id] for path_id in accepted]
+        for progress in progress_records:
+            state = documents[progress.learning_path_id]["new_document_state"]
+            if "last_step" in state:
+                progress.last_step_id = state["last_step"]
+        apply_step_statuses(
+            progress_records,
+            {
+                existing[path_id].id: {
+                    entry["step"]: entry["status"]
+                    for entry in documents[path_id]["new_document_state"].get(
+                        "step_progress_entries", []
+                    )
+                }
+                for path_id in accepted
+            },
+        )
+    return [existing[path_id].id for path_id in conflicting]
+
+
+def _create_progress(
+    profile_id: int, path_ids: set[int], steps_by_path: dict[int, list[int]]
+) -> None:
+    # A savepoint, so a failed insert leaves the transaction usable.
+    with transaction.atomic():
+        LearningPathProgress.objects.bulk_create(
+            [
+                LearningPathProgress(
+                    user_profile_id=profile_id,
+                    learning_path_id=path_id,
+                    total_steps=len(steps_by_path[path_id]),
+                    step_statuses=LearningPathProgress.initial_step_statuses(),
+                )
+                for path_id in path_ids
+            ]
+        )
+
+
+def apply_step_statuses(
+    progress_records: list[LearningPathProgress],
+    statuses: dict[int, dict[int, str]],
+) -> None:
+    """Write step statuses and derived progress fields with bulk statements.
+
+    `statuses` maps progress ids to `{step_id: status}`; omitted steps keep
+    their stored state. Step counters are shifted in memory from the status
+    transitions, so callers must hold the progress rows locked. Compact
+    records are updated in their `step_statuses` column instead of rows.
+    The same transitions are summed per step into the funnel rollups.
+    """
+    now = timezone.now()
+    rollup: defaultdict[int, Counter] = defaultdict(Counter)
+    stored: dict[int, dict[int, LearningPathStepProgress]] = defaultdict(dict)
+    for entry in LearningPathStepProgress.objects.filter(
+        progress_id__in=[
+            progress.id
+            for progress in progress_records
+            if not progress.uses_compact_statuses
+        ]
+    ):
+        stored[entry.progress_id][entry.step_id] = entry
+
+    to_update: list[LearningPathStepProgress] = []
+    to_create: list[LearningPathStepProgress] = []
+    for progress in progress_records:
+        if progress.uses_compact_statuses:
+            _apply_compact_statuses(progress, statuses.get(progress.id, {}), rollup)
+            _refresh_completion(progress, now)
+            continue
+        entries = stored[progress.id]
+        for step_id, status in statuses.get(progress.id, {}).items():
+            entry = entries.get(step_id)
+            previous = entry.status if entry else None
+            if entry is None:
+                entries[step_id] = entry = LearningPathStepProgress(
+                    progress_id=progress.id, step_id=step_id, status=status
+                )
+                to_create.append(entry)
+            elif entry.status != status:
+                entry.status = status
+                entry.updated_at = now
+                to_update.append(entry)
+            else:
+                continue
+            _shift_counters(progress, previous, status)
+            rollup[step_id].update(LearningPathStepRollup.transition(previous, status))
+        _refresh_completion(progress, now)
+
+    LearningPathStepProgress.objects.bulk_update(to_update, ["status", "updated_at"])
+    # No other transaction can insert these: step rows are only written under
+    # the lock of their progress row, and a record created in this transaction
+    # stays invisible to (and blocks inserts of) any other until it commits.
+    LearningPathStepProgress.objects.bulk_create(to_create)
+    LearningPathProgress.objects.bulk_update(
+        progress_records,
+        [
+            "last_step",
+            "is_completed",
+            "completed_steps",
+            "in_progress_steps",
+            "step_statuses",
+            "started_at",
+            "updated_at",
+        ],
+    )
+    LearningPathStepRollup.objects.shift_steps(rollup)
+
+
+def _apply_compact_statuses(
+    progress: LearningPathProgress,
+    statuses: dict[int, str],
+    rollup: defaultdict[int, Counter],
+) -> None:
+    stored = progress.get_compact_statuses()
+    for step_id, status in statuses.items():
+        _shift_counters(progress, stored.get(step_id), status)
+        rollup[step_id].update(
+            LearningPathStepRollup.transition(stored.get(step_id), status)
+        )
+        stored[step_id] = status
+    progress.set_compact_statuses(stored)
+
+
+def _shift_counters(
+    progress: LearningPathProgress, previous: str | None, current: str
+) -> None:
+    deltas = LearningPathStepProgress.counter_deltas(previous, current)
+    progress.completed_steps += deltas["completed"]
+    progress.in_progress_steps += deltas["in_progress"]
+
+
+def _refresh_completion(progress: LearningPathProgress, now: datetime) -> None:
+    progress.is_completed = (
+        progress.total_steps > 0 and progress.completed_steps >= progress.total_steps
+    )
+    if progress.completed_steps or progress.in_progress_steps:
+        progress.started_at = progress.started_at or now
+    else:
+        progress.started_at = None
+    progress.updated_at = now
+
+
+def _validate_push_targets(
+    profile_id: int,
+    path_ids: set[int],
+    documents: dict[int, dict[str, Any]],
+) -> dict[int, list[int]]:
+    paths = dict(
+        LearningPath.objects.filter(id__in=path_ids).values_list("id", "is_public")
+    )
+    unknown = path_ids - set(paths)
+    if unknown:
+        raise ValidationError(
+            {"learning_path": f"Unknown learning paths: {sorted(unknown)}."}
+        )
+    private = {path_id for path_id, is_public in paths.items() if not is_public}
+    if private - get_access_index(profile_id).assigned:
+        raise PermissionDenied("You do not have access to this learning path.")
+
+    steps_by_path: dict[int, list[int]] = defaultdict(list)
+    for step_id, path_id in LearningPathStep.objects.filter(
+        learning_path_id__in=path_ids
+    ).values_list("id", "learning_path_id"):
+        steps_by_path[path_id].append(step_id)
+
+    for path_id, row in documents.items():
+        state = row["new_document_state"]
+        valid_steps = set(steps_by_path[path_id])
+        last_step = state.get("last_step")
+        if last_step is not None and last_step not in valid_steps:
+            raise ValidationError(
+                {"last_step": "Selected step must belong to the learning path."}
+            )
+        if any(
+            entry["step"] not in valid_steps
+            for entry in state.get("step_progress_entries", [])
+        ):
+            raise ValidationError(
+                {"step_progress_entries": "All steps must belong to the learning path."}
+            )
+    return steps_by_path
+
+
+def _is_conflict(
+    assumed: dict[str, Any] | None, progress: LearningPathProgress
+) -> bool:
+    # `updated_at` acts as the record revision: any server-side change bumps it.
+    return assumed is None or assumed.get("updated_at") != progress.updated_at
@@ -0,0 +1,147 @@
+"""Query-count budgets for the API endpoints, as a reusable test harness.
+
+`profile_queries()` seeds a data set (see `learning.seeding`), calls every
+endpoint of `learning.benchmark.ENDPOINTS` against it and rolls everything
+back. `QueryBudgetMixin.assertQueryBudgets()` does this at two data sizes
+and fails when an endpoint's query count changes with the size of the data
+(an N+1) or exceeds its budget in `QUERY_BUDGETS`, listing the SQL of the
+offending calls with repeated statements marked.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import override_settings
+
+from .benchmark import run_benchmark
+from .seeding import SeedSpec, seed
+
+# Every learner has completed progress on every path they can see, so list
+# endpoints return rows (and run their prefetches) at both sizes.
+_FULL = dict(enrollment_rate=0.5, progress_rate=1.0, completion_rate=1.0)
+SMALL = SeedSpec(paths=3, steps=2, blocks=1, users=3, **_FULL)
+LARGE = SeedSpec(paths=9, steps=5, blocks=3, users=9, **_FULL)
+
+# Queries per call once caches are warm. Raise a budget only together with
+# the change that needs it. Writes and staff endpoints include the account
+# lookup of `accounts.authentication.ClaimsUser`.
+QUERY_BUDGETS: dict[str, int] = {
+    "auth-register": 3,
+    "token-obtain-pair": 3,
+    "token-refresh": 2,
+    "learning-path-list": 4,
+    "learning-path-list-summary": 2,
+    "learning-path-public": 0,
+    "learning-path-assigned": 4,
+    "learning-path-started": 3,
+    "learning-path-dashboard": 1,
+    "learning-path-detail": 5,
+    "learning-path-progress": 5,
+    "learning-path-funnel": 2,
+    "learning-path-enrollments": 6,
+    "learning-path-create": 3,
+    "learning-path-update": 5,
+    "learning-path-partial-update": 5,
+    "learning-path-delete": 22,
+    "progress-list": 3,
+    "progress-create": 13,
+    "progress-detail": 3,
+    "progress-update": 12,
+    "progress-partial-update": 11,
+    "progress-changes": 4,
+    "progress-push": 8,
+    "progress-export": 4,
+}
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+@dataclass(frozen=True)
+class QueryProfile:
+    name: str
+    status: int
+    sql: tuple[str, ...]
+
+    @property
+    def count(self) -> int:
+        return len(self.sql)
+
+    def report(self) -> str:
+        """Numbered SQL; statements repeated with other values are marked."""
+        shapes = [_LITERALS.sub("?", sql) for sql in self.sql]
+        repeated = Counter(shapes)
+        lines = []
+        for index, (sql, shape) in enumerate(zip(self.sql, shapes), start=1):
+            marker = f"[x{repeated[shape]}] " if repeated[shape] > 1 else ""
+            lines.append(f"  {index:>3}. {marker}{sql}")
+        return "\n".join(lines)
+
+
+# Fast hashing: the harness logs in and registers users on every run.
+# Budgets count warm calls as deployed: with a shared cache, which keeps the
+# access index cached (the test settings use a process-local one).
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    LEARNING_ACCESS_CACHE_TIMEOUT=3600,
+)
+def profile_queries(spec: SeedSpec) -> dict[str, QueryProfile]:
+    """Seed `spec`, capture one warm call per endpoint and roll it all back."""
+    cache.clear()
+    with transaction.atomic():
+        seed(spec)
+        results = run_benchmark(spec, iterations=1, warmup=1)
+        transaction.set_rollback(True)
+    cache.clear()
+    return {
+        result.name: QueryProfile(result.name, result.statuses[-1], tuple(result.sql))
+        for result in results
+    }
+
+
+def budget_violations(
+    small: dict[str, QueryProfile],
+    large: dict[str, QueryProfile],
+    budgets: dict[str, int],
+) -> list[str]:
+    violations = []
+    for name, profile in large.items():
+        budget = budgets.get(name)
+        if not 200 <= profile.status < 300:
+            # A rejected request says nothing about the endpoint's budget.
+            violations.append(f"{name}: answered {profile.status}")
+        if budget is None:
+            violations.append(
+                f"{name}: no query budget declared ({profile.count} queries)"
+            )
+        if small[name].count != profile.count:
+            violations.append(
+                f"{name}: {small[name].count} queries on the small data set, "
+                f"{profile.count} on the large one\n{profile.report()}"
+            )
+        elif budget is not None and profile.count > budget:
+            violations.append(
+                f"{name}: {profile.count} queries, budget {budget}\n{profile.report()}"
+            )
+    return violations
+
+
+class QueryBudgetMixin:
+    """Adds `assertQueryBudgets()` to a `TestCase`."""
+
+    query_budgets = QUERY_BUDGETS
+    small_spec = SMALL
+    large_spec = LARGE
+
+    def assertQueryBudgets(self, only: set[str] | None = None) -> None:
+        small = profile_queries(self.small_spec)
+        large = profile_queries(self.large_spec)
+        if only:
+            large = {name: large[name] for name in only}
+        violations = budget_violations(small, large, self.query_budgets)
+        if violations:
+            self.fail("Query budget violations:\n\n" + "\n\n".join(violations))
@@ -1,19 +1,44 @@
+import base64
+import json
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from . import sync
+from .benchmark import ENDPOINTS, run_benchmark
+from .checks import check_step_status_storage
 from .models import (
     LearningPath,
     LearningPathEnrollment,
     LearningPathProgress,
+    LearningPathProgressTombstone,
     LearningPathStep,
+    LearningPathStepBlock,
     LearningPathStepProgress,
+    LearningPathStepRollup,
 )
+from .seeding import SeedSpec, seed
+from .testing import QueryBudgetMixin
 
 
 class LearningPathAPITests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user = get_user_model().objects.create_user(
             username="learner",
             email="learner@example.com",
@@ -55,8 +80,8 @@ class LearningPathAPITests(APITestCase):
         url = reverse("learning-path-public")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["title"], self.public_path.title)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["title"], self.public_path.title)
 
     def test_assigned_learning_paths_requires_authentication(self):
         url = reverse("learning-path-assigned")
@@ -66,8 +91,8 @@ class LearningPathAPITests(APITestCase):
         self.client.force_authenticate(self.user)
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["title"], self.private_path.title)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["title"], self.private_path.title)
 
     def test_progress_create_and_update_flow(self):
         self.client.force_authenticate(self.user)
@@ -114,3 +139,1180 @@ class LearningPathAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["learning_path"], self.private_path.id)
         self.assertEqual(len(response.data["step_progress_entries"]), 2)
+
+    @override_settings(LEARNING_SYNC_SAFETY_LAG_SECONDS=0)
+    def test_progress_changes_feed_pages_with_checkpoints_and_tombstones(self):
+        self.client.force_authenticate(self.user)
+        public_progress = LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.public_path
+        )
+        private_progress = LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.private_path
+        )
+        # Identical timestamps must still page deterministically via the id.
+        same_instant = timezone.now()
+        LearningPathProgress.objects.update(updated_at=same_instant)
+
+        url = reverse("learning-path-progress-changes")
+        response = self.client.get(url, {"limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [doc["id"] for doc in response.data["documents"]], [public_progress.id]
+        )
+        self.assertFalse(response.data["documents"][0]["deleted"])
+
+        checkpoint = response.data["checkpoint"]
+        response = self.client.get(url, {"checkpoint": checkpoint, "limit": 1})
+        self.assertEqual(
+            [doc["id"] for doc in response.data["documents"]], [private_progress.id]
+        )
+
+        checkpoint = response.data["checkpoint"]
+        response = self.client.get(url, {"checkpoint": checkpoint})
+        self.assertEqual(response.data["documents"], [])
+        self.assertEqual(response.data["checkpoint"], checkpoint)
+
+        deleted_id = private_progress.id
+        private_progress.delete()
+        response = self.client.get(url, {"checkpoint": checkpoint})
+        self.assertEqual(len(response.data["documents"]), 1)
+        self.assertEqual(response.data["documents"][0]["id"], deleted_id)
+        self.assertTrue(response.data["documents"][0]["deleted"])
+
+        response = self.client.get(url, {"checkpoint": "not-a-checkpoint"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(LEARNING_SYNC_SAFETY_LAG_SECONDS=0)
+    def test_step_status_change_reappears_in_changes_feed(self):
+        self.client.force_authenticate(self.user)
+        progress = LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.private_path
+        )
+        url = reverse("learning-path-progress-changes")
+        checkpoint = self.client.get(url).data["checkpoint"]
+
+        detail_url = reverse("learning-path-progress-detail", args=[progress.id])
+        self.client.patch(
+            detail_url,
+            {
+                "step_progress_entries": [
+                    {
+                        "step": self.step_private_1.id,
+                        "status": LearningPathStepProgress.Status.COMPLETED,
+                    }
+                ]
+            },
+            format="json",
+        )
+        response = self.client.get(url, {"checkpoint": checkpoint})
+        self.assertEqual([doc["id"] for doc in response.data["documents"]], [progress.id])
+
+        # Entries carry `step_order`, so moving a step re-emits the record;
+        # a new title does not change the document.
+        checkpoint = response.data["checkpoint"]
+        self.step_private_2.title = "Renamed"
+        self.step_private_2.save()
+        self.assertEqual(
+            self.client.get(url, {"checkpoint": checkpoint}).data["documents"], []
+        )
+        step = LearningPathStep.objects.get(pk=self.step_private_2.pk)
+        step.order = 3
+        step.save()
+        response = self.client.get(url, {"checkpoint": checkpoint})
+        self.assertEqual(
+            [
+                [entry["step_order"] for entry in doc["step_progress_entries"]]
+                for doc in response.data["documents"]
+            ],
+            [[1, 3]],
+        )
+
+    @override_settings(LEARNING_SYNC_SAFETY_LAG_SECONDS=5)
+    def test_changes_feed_holds_back_writes_that_may_still_commit(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("learning-path-progress-changes")
+        now = timezone.now()
+        # Transaction B stamped its record after transaction A, but commits
+        # first; A's record only becomes visible after the client pulled.
+        later = LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.public_path
+        )
+        LearningPathProgress.objects.filter(pk=later.pk).update(
+            updated_at=now - timedelta(seconds=1)
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.data["documents"], [])
+        self.assertIsNone(response.data["checkpoint"])
+
+        earlier = LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.private_path
+        )
+        LearningPathProgress.objects.filter(pk=earlier.pk).update(
+            updated_at=now - timedelta(seconds=2)
+        )
+
+        # Once both have settled, the client receives them in stamp order.
+        LearningPathProgress.objects.update(
+            updated_at=F("updated_at") - timedelta(seconds=10)
+        )
+        response = self.client.get(url)
+        self.assertEqual(
+            [doc["id"] for doc in response.data["documents"]], [earlier.id, later.id]
+        )
+        checkpoint = response.data["checkpoint"]
+
+        deleted_id = earlier.id
+        earlier.delete()
+        response = self.client.get(url, {"checkpoint": checkpoint})
+        self.assertEqual(response.data["documents"], [])
+        self.assertEqual(response.data["checkpoint"], checkpoint)
+        LearningPathProgressTombstone.objects.update(
+            deleted_at=F("deleted_at") - timedelta(seconds=10)
+        )
+        response = self.client.get(url, {"checkpoint": checkpoint})
+        self.assertEqual(
+            [(doc["id"], doc["deleted"]) for doc in response.data["documents"]],
+            [(deleted_id, True)],
+        )
+    def test_progress_push_applies_batch_and_reports_conflicts(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("learning-path-progress-push")
+        rows = [
+            {
+                "assumed_master_state": None,
+                "new_document_state": {
+                    "learning_path": self.public_path.id,
+                    "last_step": self.step_public.id,
+                    "step_progress_entries": [
+                        {"step": self.step_public.id, "status": "completed"},
+                    ],
+                },
+            },
+            {
+                "assumed_master_state": None,
+                "new_document_state": {
+                    "learning_path": self.private_path.id,
+                    "step_progress_entries": [
+                        {"step": self.step_private_1.id, "status": "in_progress"},
+                    ],
+                },
+            },
+        ]
+        response = self.client.post(url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["conflicts"], [])
+
+        public_progress = LearningPathProgress.objects.get(learning_path=self.public_path)
+        self.assertTrue(public_progress.is_completed)
+        self.assertEqual(public_progress.last_step, self.step_public)
+        private_progress = LearningPathProgress.objects.get(learning_path=self.private_path)
+        self.assertFalse(private_progress.is_completed)
+
+        # Pushing again without the server state the client last saw is a conflict.
+        response = self.client.post(url, rows[1:], format="json")
+        self.assertEqual(
+            [doc["id"] for doc in response.data["conflicts"]], [private_progress.id]
+        )
+
+        detail = self.client.get(
+            reverse("learning-path-progress-detail", args=[private_progress.id])
+        )
+        rows[1]["assumed_master_state"] = {"updated_at": detail.data["updated_at"]}
+        rows[1]["new_document_state"]["step_progress_entries"] = [
+            {"step": self.step_private_1.id, "status": "completed"},
+            {"step": self.step_private_2.id, "status": "completed"},
+        ]
+        response = self.client.post(url, rows[1:], format="json")
+        self.assertEqual(response.data["conflicts"], [])
+        private_progress.refresh_from_db()
+        self.assertTrue(private_progress.is_completed)
+
+    def test_progress_push_reports_records_created_concurrently_as_conflicts(self):
+        self.client.force_authenticate(self.user)
+        create_progress = sync._create_progress
+        raced = []
+
+        def create_after_concurrent_push(profile_id, path_ids, steps_by_path):
+            if not raced:
+                # Another push creates the public record after the lock query.
+                raced.append(
+                    LearningPathProgress.objects.create(
+                        user_profile=self.profile, learning_path=self.public_path
+                    )
+                )
+            create_progress(profile_id, path_ids, steps_by_path)
+
+        rows = [
+            {"new_document_state": {"learning_path": path.id}}
+            for path in (self.public_path, self.private_path)
+        ]
+        with mock.patch.object(
+            sync, "_create_progress", side_effect=create_after_concurrent_push
+        ):
+            response = self.client.post(
+                reverse("learning-path-progress-push"), rows, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [doc["id"] for doc in response.data["conflicts"]], [raced[0].id]
+        )
+        created = LearningPathProgress.objects.filter(learning_path=self.private_path)
+        self.assertTrue(created.exists())
+
+    def test_progress_push_rejects_foreign_steps_and_inaccessible_paths(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("learning-path-progress-push")
+        response = self.client.post(
+            url,
+            [
+                {
+                    "new_document_state": {
+                        "learning_path": self.public_path.id,
+                        "step_progress_entries": [
+                            {"step": self.step_private_1.id, "status": "completed"},
+                        ],
+                    }
+                }
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        hidden_path = LearningPath.objects.create(title="Hidden", is_public=False)
+        response = self.client.post(
+            url,
+            [{"new_document_state": {"learning_path": hidden_path.id}}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(LearningPathProgress.objects.exists())
+
+    def test_progress_reads_do_not_write_and_use_constant_queries(self):
+        self.client.force_authenticate(self.user)
+        LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.private_path
+        )
+        url = reverse("learning-path-progress-list")
+
+        with CaptureQueriesContext(connection) as single:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        entries = response.data["results"][0]["step_progress_entries"]
+        self.assertEqual([entry["step"] for entry in entries], [
+            self.step_private_1.id,
+            self.step_private_2.id,
+        ])
+        self.assertEqual({entry["status"] for entry in entries}, {"unstarted"})
+        self.assertIsNone(entries[0]["id"])
+        self.assertFalse(LearningPathStepProgress.objects.exists())
+
+        LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.public_path
+        )
+        with CaptureQueriesContext(connection) as double:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(len(double.captured_queries), len(single.captured_queries))
+        self.assertFalse(
+            any(
+                not query["sql"].lstrip().upper().startswith("SELECT")
+                for query in double.captured_queries
+            )
+        )
+
+    def test_step_counters_follow_status_and_step_changes(self):
+        progress = LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.private_path
+        )
+        self.assertEqual(progress.total_steps, 2)
+
+        entry = LearningPathStepProgress.objects.create(
+            progress=progress,
+            step=self.step_private_1,
+            status=LearningPathStepProgress.Status.IN_PROGRESS,
+        )
+        progress.refresh_completion_state()
+        self.assertEqual((progress.completed_steps, progress.in_progress_steps), (0, 1))
+
+        entry.status = LearningPathStepProgress.Status.COMPLETED
+        entry.save()
+        LearningPathStepProgress.objects.create(
+            progress=progress,
+            step=self.step_private_2,
+            status=LearningPathStepProgress.Status.COMPLETED,
+        )
+        progress.refresh_completion_state()
+        self.assertEqual((progress.completed_steps, progress.in_progress_steps), (2, 0))
+        self.assertTrue(progress.is_completed)
+
+        extra_step = LearningPathStep.objects.create(
+            learning_path=self.private_path, title="Extra", order=3
+        )
+        progress.refresh_completion_state()
+        self.assertEqual(progress.total_steps, 3)
+        self.assertFalse(progress.is_completed)
+
+        extra_step.delete()
+        self.step_private_2.delete()
+        progress.refresh_completion_state()
+        self.assertEqual((progress.total_steps, progress.completed_steps), (1, 1))
+        self.assertTrue(progress.is_completed)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("learning-path-started"))
+        self.assertEqual([path["id"] for path in response.data["results"]], [self.private_path.id])
+
+    def test_verify_progress_counters_repairs_drift(self):
+        progress = LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.private_path
+        )
+        LearningPathStepProgress.objects.create(
+            progress=progress,
+            step=self.step_private_1,
+            status=LearningPathStepProgress.Status.COMPLETED,
+        )
+        LearningPathProgress.objects.filter(pk=progress.pk).update(
+            total_steps=7, completed_steps=0, is_completed=True
+        )
+
+        out = StringIO()
+        call_command("verify_progress_counters", stdout=out)
+        self.assertIn("1 progress records have drifted", out.getvalue())
+
+        call_command("verify_progress_counters", "--repair", stdout=out)
+        progress.refresh_completion_state()
+        self.assertEqual(
+            (progress.total_steps, progress.completed_steps, progress.in_progress_steps),
+            (2, 1, 0),
+        )
+        self.assertFalse(progress.is_completed)
+
+        # Correct counters with a completion or started state that disagrees.
+        compact = LearningPathProgress.objects.create(
+            user_profile=self.profile,
+            learning_path=self.public_path,
+            step_statuses={},
+        )
+        LearningPathProgress.objects.filter(pk=progress.pk).update(is_completed=True)
+        LearningPathProgress.objects.filter(pk=compact.pk).update(
+            started_at=timezone.now()
+        )
+        out = StringIO()
+        call_command("verify_progress_counters", stdout=out)
+        self.assertIn("2 progress records have drifted", out.getvalue())
+        call_command("verify_progress_counters", "--repair", stdout=out)
+        progress.refresh_from_db()
+        compact.refresh_from_db()
+        self.assertFalse(progress.is_completed)
+        self.assertIsNotNone(progress.started_at)
+        self.assertIsNone(compact.started_at)
+        out = StringIO()
+        call_command("verify_progress_counters", stdout=out)
+        self.assertIn("consistent", out.getvalue())
+
+    def test_public_catalog_is_cached_until_content_changes(self):
+        url = reverse("learning-path-public")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data["results"][0]["steps"][0]["blocks"], [])
+
+        LearningPathStepBlock.objects.create(
+            step=self.step_public,
+            block_type=LearningPathStepBlock.BlockType.TEXT,
+            text="Hello",
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.data["results"][0]["steps"][0]["blocks"][0]["text"], "Hello")
+
+        self.public_path.is_public = False
+        self.public_path.save()
+        self.assertEqual(self.client.get(url).data["results"], [])
+
+    def test_learning_path_content_supports_conditional_get(self):
+        self.client.force_authenticate(self.user)
+        detail_url = reverse("learning-path-detail", args=[self.private_path.id])
+        response = self.client.get(detail_url)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(
+            any("learning_learningpathstep" in query["sql"] for query in queries)
+        )
+
+        LearningPathStepBlock.objects.create(
+            step=self.step_private_1,
+            block_type=LearningPathStepBlock.BlockType.TEXT,
+            text="Changed",
+        )
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        list_url = reverse("learning-path-list")
+        etag = self.client.get(list_url)["ETag"]
+        self.assertEqual(
+            self.client.get(list_url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        LearningPathEnrollment.objects.filter(user_profile=self.profile).delete()
+        self.assertEqual(
+            self.client.get(list_url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_200_OK,
+        )
+
+        public_url = reverse("learning-path-public")
+        self.client.logout()
+        self.client.force_authenticate(None)
+        etag = self.client.get(public_url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(public_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(LEARNING_ACCESS_CACHE_TIMEOUT=3600)
+    def test_visibility_index_skips_enrollment_joins_and_follows_changes(self):
+        self.client.force_authenticate(self.user)
+        detail_url = reverse("learning-path-detail", args=[self.private_path.id])
+        self.client.get(detail_url)
+        key = f"learning:access:{self.profile.id}"
+        self.assertIsNotNone(cache.get(key))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            any("learning_learningpathenrollment" in query["sql"] for query in queries)
+        )
+
+        stale = cache.get(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            LearningPathEnrollment.objects.filter(user_profile=self.profile).delete()
+            # A concurrent request refills the entry before the delete commits.
+            cache.set(key, stale)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(
+            self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+        self.private_path.owner = self.profile
+        self.private_path.save()
+        self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_200_OK)
+        # Owners see their paths but still need an assignment to track progress.
+        response = self.client.post(
+            reverse("learning-path-progress-list"),
+            {"learning_path": self.private_path.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_visibility_is_checked_uncached_on_a_process_local_cache(self):
+        self.client.force_authenticate(self.user)
+        detail_url = reverse("learning-path-detail", args=[self.private_path.id])
+        self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_200_OK)
+        self.assertIsNone(cache.get(f"learning:access:{self.profile.id}"))
+
+    def test_group_assignment_follows_membership_without_enrollments(self):
+        self.client.force_authenticate(self.user)
+        LearningPathEnrollment.objects.filter(user_profile=self.profile).delete()
+        detail_url = reverse("learning-path-detail", args=[self.private_path.id])
+        self.assertEqual(
+            self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+        team = Group.objects.create(name="Engineering")
+        self.private_path.assigned_groups.add(team)
+        team.user_set.add(self.user)
+        self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse("learning-path-assigned"))
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [self.private_path.id]
+        )
+        response = self.client.post(
+            reverse("learning-path-progress-list"),
+            {"learning_path": self.private_path.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(LearningPathEnrollment.objects.exists())
+
+        self.user.groups.remove(team)
+        self.assertEqual(
+            self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+        self.user.groups.add(team)
+        team.learning_paths.clear()
+        self.assertEqual(
+            self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+        self.private_path.assigned_groups.add(team)
+        team.delete()
+        self.assertEqual(
+            self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    def test_learning_path_listings_support_summary_and_sparse_fields(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("learning-path-list")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"view": "summary"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("steps", response.data["results"][0])
+        counts = {item["id"]: item["step_count"] for item in response.data["results"]}
+        self.assertEqual(counts, {self.private_path.id: 2, self.public_path.id: 1})
+        self.assertFalse(
+            any('FROM "learning_learningpathstep"' in query["sql"] for query in queries)
+        )
+
+        response = self.client.get(url, {"expand": "steps"})
+        self.assertIn("steps", response.data["results"][0])
+        self.assertNotIn("blocks", response.data["results"][0]["steps"][0])
+
+        response = self.client.get(
+            reverse("learning-path-public"), {"fields": "id,title"}
+        )
+        self.assertEqual(
+            response.data["results"],
+            [{"id": self.public_path.id, "title": "Public Path"}],
+        )
+        self.assertEqual(
+            self.client.get(url, {"fields": "id,secret"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_listings_use_stable_keyset_pages(self):
+        for title in ("Alpha", "Beta", "Beta", "Gamma"):
+            LearningPath.objects.create(title=title, is_public=True)
+        expected = list(
+            LearningPath.objects.filter(is_public=True)
+            .order_by("title", "id")
+            .values_list("id", flat=True)
+        )
+
+        url = reverse("learning-path-public") + "?page_size=2"
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            seen += [path["id"] for path in response.data["results"]]
+            if len(seen) == 2:
+                # Rows added ahead of the cursor do not shift later pages.
+                LearningPath.objects.create(title="Aardvark", is_public=True)
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+
+        for cursor in ("bogus", '["a","x"]', '["a",null]', '[1,2]', '["a",true]'):
+            if cursor != "bogus":
+                cursor = base64.urlsafe_b64encode(cursor.encode()).decode()
+            for name in ("learning-path-public", "learning-path-list"):
+                response = self.client.get(reverse(name), {"cursor": cursor})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Unrelated parameters share the cached page and stay out of links.
+        public_url = reverse("learning-path-public")
+        first = self.client.get(public_url, {"page_size": 2, "view": "summary"})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                public_url, {"page_size": 2, "view": "summary", "x": 1}
+            )
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response["ETag"], first["ETag"])
+        self.assertNotIn("x=1", response.data["next"])
+        self.assertIn("view=summary", response.data["next"])
+
+        self.client.force_authenticate(self.user)
+        for path in (self.public_path, self.private_path):
+            LearningPathProgress.objects.create(
+                user_profile=self.profile, learning_path=path
+            )
+        response = self.client.get(
+            reverse("learning-path-progress-list"), {"page_size": 1}
+        )
+        self.assertEqual(
+            response.data["results"][0]["learning_path"], self.private_path.id
+        )
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            response.data["results"][0]["learning_path"], self.public_path.id
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_fast_read_path_renders_identical_bytes(self):
+        LearningPathStepBlock.objects.create(
+            step=self.step_private_1,
+            block_type=LearningPathStepBlock.BlockType.TEXT,
+            text='Quotes " \\ tabs\t ünïcödé \u2028 \x01 emoji 🎉',
+        )
+        LearningPathStepBlock.objects.create(
+            step=self.step_private_1,
+            order=1,
+            block_type=LearningPathStepBlock.BlockType.IMAGE,
+            image="learning_path_blocks/diagram.png",
+            caption="Diagram",
+        )
+        LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.private_path
+        )
+        LearningPathStepProgress.objects.create(
+            progress=LearningPathProgress.objects.get(),
+            step=self.step_private_1,
+            status=LearningPathStepProgress.Status.IN_PROGRESS,
+        )
+        self.client.force_authenticate(self.user)
+        urls = [
+            reverse(name, args=args)
+            for name, args in (
+                ("learning-path-list", ()),
+                ("learning-path-detail", (self.private_path.id,)),
+                ("learning-path-public", ()),
+                ("learning-path-assigned", ()),
+                ("learning-path-started", ()),
+            )
+        ]
+        queries = ["", "?view=summary", "?expand=steps", "?fields=id,steps,step_count"]
+        for url in urls:
+            for query in queries:
+                rendered = []
+                for fast in (False, True):
+                    cache.clear()
+                    with override_settings(LEARNING_FAST_READ_PATH=fast):
+                        response = self.client.get(url + query)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    rendered.append((response.content, response.get("ETag")))
+                self.assertEqual(rendered[0], rendered[1], url + query)
+
+    def test_progress_writes_cost_constant_queries(self):
+        learning_path = LearningPath.objects.create(title="Long", is_public=True)
+        steps = [
+            LearningPathStep.objects.create(learning_path=learning_path, order=order)
+            for order in range(50)
+        ]
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse("learning-path-progress-list"),
+            {"learning_path": learning_path.id},
+            format="json",
+        )
+        detail_url = reverse(
+            "learning-path-progress-detail", args=[response.data["id"]]
+        )
+
+        def patch(entries, status_value):
+            payload = {
+                "step_progress_entries": [
+                    {"step": step.id, "status": status_value} for step in entries
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(detail_url, payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response, len(queries)
+
+        _, few = patch(steps[:5], "in_progress")
+        _, many = patch(steps[5:], "in_progress")
+        self.assertEqual(few, many)
+        response, _ = patch(steps, "completed")
+
+        self.assertTrue(response.data["is_completed"])
+        self.assertEqual(response.data["completed_steps"], 50)
+        self.assertEqual(response.data["in_progress_steps"], 0)
+        progress = LearningPathProgress.objects.get(pk=response.data["id"])
+        self.assertEqual(progress.completed_steps, 50)
+        self.assertFalse(LearningPathProgress.objects.with_counter_drift().exists())
+
+    @override_settings(LEARNING_STEP_STATUS_STORAGE="compact")
+    def test_compact_step_status_storage_keeps_api_shape(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse("learning-path-progress-list"),
+            {
+                "learning_path": self.private_path.id,
+                "step_progress_entries": [
+                    {"step": self.step_private_1.id, "status": "completed"},
+                    {"step": self.step_private_2.id, "status": "in_progress"},
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        entries = response.data["step_progress_entries"]
+        self.assertEqual(
+            [(entry["step"], entry["status"]) for entry in entries],
+            [
+                (self.step_private_1.id, "completed"),
+                (self.step_private_2.id, "in_progress"),
+            ],
+        )
+        self.assertEqual(
+            sorted(entries[0]),
+            ["created_at", "id", "status", "step", "step_order", "updated_at"],
+        )
+        self.assertFalse(LearningPathStepProgress.objects.exists())
+        progress = LearningPathProgress.objects.get()
+        self.assertEqual(
+            progress.step_statuses,
+            {str(self.step_private_1.id): "c", str(self.step_private_2.id): "i"},
+        )
+        self.assertEqual((progress.completed_steps, progress.in_progress_steps), (1, 1))
+
+        self.step_private_1.delete()
+        progress.refresh_from_db()
+        self.assertEqual(progress.step_statuses, {str(self.step_private_2.id): "i"})
+        self.assertEqual(
+            (
+                progress.total_steps,
+                progress.completed_steps,
+                progress.in_progress_steps,
+            ),
+            (1, 0, 1),
+        )
+
+        out = StringIO()
+        call_command("verify_progress_counters", stdout=out)
+        self.assertIn("consistent", out.getvalue())
+        with CaptureQueriesContext(connection) as queries:
+            call_command(
+                "verify_progress_counters",
+                f"--learning-path={self.public_path.id}",
+                stdout=StringIO(),
+            )
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in queries.captured_queries
+                if query["sql"].startswith('SELECT "learning_learningpathstep"."id"')
+            ]
+        )
+
+        call_command("convert_step_statuses", to="rows", stdout=StringIO())
+        progress.refresh_from_db()
+        self.assertIsNone(progress.step_statuses)
+        self.assertEqual(
+            list(LearningPathStepProgress.objects.values_list("step_id", "status")),
+            [(self.step_private_2.id, "in_progress")],
+        )
+        call_command("convert_step_statuses", to="compact", stdout=StringIO())
+        progress.refresh_from_db()
+        self.assertEqual(progress.step_statuses, {str(self.step_private_2.id): "i"})
+        self.assertFalse(LearningPathStepProgress.objects.exists())
+        self.assertEqual(progress.in_progress_steps, 1)
+
+        # Another run converts the record between the scan and the lock; it
+        # must be skipped rather than compacted again from no rows.
+        call_command("convert_step_statuses", to="rows", stdout=StringIO())
+
+        def convert_concurrently(*args, **kwargs):
+            atomic.side_effect = None
+            call_command("convert_step_statuses", to="compact", stdout=StringIO())
+            return transaction.atomic(*args, **kwargs)
+
+        atomic = mock.Mock(wraps=transaction.atomic, side_effect=convert_concurrently)
+        out = StringIO()
+        with mock.patch(
+            "learning.management.commands.convert_step_statuses.transaction",
+            SimpleNamespace(atomic=atomic),
+        ):
+            call_command("convert_step_statuses", to="compact", stdout=out)
+        self.assertIn("Converted 0 progress records", out.getvalue())
+        progress.refresh_from_db()
+        self.assertEqual(progress.step_statuses, {str(self.step_private_2.id): "i"})
+
+    @override_settings(LEARNING_STEP_STATUS_STORAGE="compat")
+    def test_unknown_step_status_storage_fails_the_system_check(self):
+        self.assertEqual(
+            [error.id for error in check_step_status_storage()], ["learning.E001"]
+        )
+
+    def test_started_state_is_maintained_on_progress(self):
+        progress = LearningPathProgress.objects.create(
+            user_profile=self.profile, learning_path=self.private_path
+        )
+        self.assertIsNone(progress.started_at)
+        entry = LearningPathStepProgress.objects.create(
+            progress=progress,
+            step=self.step_private_1,
+            status=LearningPathStepProgress.Status.IN_PROGRESS,
+        )
+        progress.refresh_completion_state()
+        started_at = progress.started_at
+        self.assertIsNotNone(started_at)
+
+        entry.status = LearningPathStepProgress.Status.COMPLETED
+        entry.save()
+        progress.refresh_completion_state()
+        self.assertEqual(progress.started_at, started_at)
+
+        self.client.force_authenticate(self.user)
+        url = reverse("learning-path-started")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(
+            [path["id"] for path in response.data["results"]], [self.private_path.id]
+        )
+        self.assertFalse(
+            any("learning_learningpathstepprogress" in query["sql"] for query in queries)
+        )
+
+        detail_url = reverse("learning-path-progress-detail", args=[progress.id])
+        self.client.patch(
+            detail_url,
+            {
+                "step_progress_entries": [
+                    {"step": self.step_private_1.id, "status": "unstarted"}
+                ]
+            },
+            format="json",
+        )
+        progress.refresh_completion_state()
+        self.assertIsNone(progress.started_at)
+        self.assertEqual(self.client.get(url).data["results"], [])
+
+    def test_dashboard_summarises_visible_paths_in_constant_queries(self):
+        progress = LearningPathProgress.objects.create(
+            user_profile=self.profile,
+            learning_path=self.private_path,
+            last_step=self.step_private_2,
+        )
+        LearningPathStepProgress.objects.create(
+            progress=progress,
+            step=self.step_private_1,
+            status=LearningPathStepProgress.Status.COMPLETED,
+        )
+        other = get_user_model().objects.create_user(username="other", password="x")
+        LearningPathProgress.objects.create(
+            user_profile=other.profile, learning_path=self.public_path
+        )
+        self.client.force_authenticate(self.user)
+        url = reverse("learning-path-dashboard")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = {row["id"]: row for row in response.data["results"]}
+        self.assertEqual(
+            rows[self.private_path.id],
+            {
+                "id": self.private_path.id,
+                "title": "Private Path",
+                "step_count": 2,
+                "progress": progress.id,
+                "completed_steps": 1,
+                "in_progress_steps": 0,
+                "percent_complete": 50,
+                "last_step": self.step_private_2.id,
+                "is_completed": False,
+                "started_at": rows[self.private_path.id]["started_at"],
+            },
+        )
+        self.assertIsNotNone(rows[self.private_path.id]["started_at"])
+        public = rows[self.public_path.id]
+        self.assertEqual(
+            (public["progress"], public["completed_steps"], public["is_completed"]),
+            (None, 0, False),
+        )
+
+        for index in range(5):
+            LearningPath.objects.create(title=f"Extra {index}", is_public=True)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["results"]), 7)
+
+    def test_bulk_enrollment_from_json_csv_and_command(self):
+        learners = [
+            get_user_model().objects.create_user(
+                username=f"learner{index}", password="x"
+            )
+            for index in range(4)
+        ]
+        # Owning a path is enough; the creation flag is not needed.
+        editor = get_user_model().objects.create_user(username="editor", password="x")
+        self.assertFalse(editor.profile.can_create_learning_paths)
+        self.private_path.owner = editor.profile
+        self.private_path.save()
+
+        # Warm the learner's access index; enrolling must invalidate it.
+        self.client.force_authenticate(learners[0])
+        detail_url = reverse("learning-path-detail", args=[self.private_path.id])
+        self.assertEqual(self.client.get(detail_url).status_code, 404)
+
+        url = reverse("learning-path-enrollments", args=[self.private_path.id])
+        response = self.client.post(
+            url, {"profile_ids": [learners[0].profile.id]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            url, {"profile_ids": [learners[0].profile.id]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(editor)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                url,
+                {
+                    "profile_ids": [learners[0].profile.id, self.profile.id, 999999],
+                    "usernames": ["learner1", "nobody"],
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {"created": 2, "already_enrolled": 1, "unknown": ["999999", "nobody"]},
+        )
+
+        upload = SimpleUploadedFile(
+            "cohort.csv",
+            (
+                "username,profile_id\n"
+                "learner2,\n"
+                f",{learners[3].profile.id}\n"
+                "learner1,\n"
+            ).encode(),
+            content_type="text/csv",
+        )
+        response = self.client.post(url, {"file": upload}, format="multipart")
+        self.assertEqual(
+            response.data, {"created": 2, "already_enrolled": 1, "unknown": []}
+        )
+        bad = SimpleUploadedFile("bad.csv", b"email\nx@example.com\n")
+        response = self.client.post(url, {"file": bad}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(learners[0])
+        self.assertEqual(self.client.get(detail_url).status_code, 200)
+
+        out = StringIO()
+        call_command(
+            "enroll_learners",
+            str(self.public_path.id),
+            "--username=learner0",
+            f"--profile-id={learners[1].profile.id}",
+            stdout=out,
+        )
+        self.assertIn("Enrolled 2 learners", out.getvalue())
+        self.assertEqual(
+            LearningPathEnrollment.objects.filter(
+                learning_path=self.public_path
+            ).count(),
+            2,
+        )
+
+    def test_progress_export_streams_both_storages_for_staff(self):
+        self.client.force_authenticate(self.user)
+        progress_url = reverse("learning-path-progress-list")
+        self.client.post(
+            progress_url,
+            {
+                "learning_path": self.private_path.id,
+                "step_progress_entries": [
+                    {"step": self.step_private_1.id, "status": "completed"}
+                ],
+            },
+            format="json",
+        )
+        with override_settings(LEARNING_STEP_STATUS_STORAGE="compact"):
+            self.client.post(
+                progress_url,
+                {
+                    "learning_path": self.public_path.id,
+                    "step_progress_entries": [
+                        {"step": self.step_public.id, "status": "in_progress"}
+                    ],
+                },
+                format="json",
+            )
+        export_url = reverse("learning-path-progress-export")
+        self.assertEqual(
+            self.client.get(export_url).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+        staff = get_user_model().objects.create_user(
+            username="analyst", password="pass1234", is_staff=True
+        )
+        self.client.force_authenticate(staff)
+        response = self.client.get(export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines[0].split(",")[:3], ["progress_id", "user_profile_id", "username"]
+        )
+        self.assertEqual(
+            [line.split(",")[7:9] for line in lines[1:]],
+            [
+                ["Private Step 1", "completed"],
+                ["Private Step 2", "unstarted"],
+                ["Public Step", "in_progress"],
+            ],
+        )
+
+        response = self.client.get(
+            export_url, {"output": "ndjson", "learning_path": self.public_path.id}
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [(row["username"], row["step_id"], row["status"]) for row in rows],
+            [("learner", self.step_public.id, "in_progress")],
+        )
+        self.assertIsNone(rows[0]["step_updated_at"])
+
+        later = (timezone.now() + timedelta(days=1)).isoformat()
+        response = self.client.get(export_url, {"updated_after": later})
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 1)
+
+        out = StringIO()
+        with mock.patch("sys.stdout", out):
+            call_command("export_progress", "--batch-size=1")
+        self.assertEqual(out.getvalue().splitlines(), lines)
+
+    def test_step_rollups_follow_transitions_and_serve_the_funnel(self):
+        self.private_path.owner = self.profile
+        self.private_path.save()
+        other = get_user_model().objects.create_user(
+            username="other", password="pass1234"
+        )
+        LearningPathEnrollment.objects.create(
+            learning_path=self.private_path, user_profile=other.profile
+        )
+        progress_url = reverse("learning-path-progress-list")
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            progress_url,
+            {
+                "learning_path": self.private_path.id,
+                "step_progress_entries": [
+                    {"step": self.step_private_1.id, "status": "completed"},
+                    {"step": self.step_private_2.id, "status": "in_progress"},
+                ],
+            },
+            format="json",
+        )
+        self.client.force_authenticate(other)
+        with override_settings(LEARNING_STEP_STATUS_STORAGE="compact"):
+            self.client.post(
+                progress_url,
+                {
+                    "learning_path": self.private_path.id,
+                    "step_progress_entries": [
+                        {"step": self.step_private_1.id, "status": "in_progress"}
+                    ],
+                },
+                format="json",
+            )
+        entry = LearningPathStepProgress.objects.get(step=self.step_private_2)
+        entry.status = LearningPathStepProgress.Status.COMPLETED
+        entry.save()
+        step_3 = LearningPathStep.objects.create(
+            learning_path=self.private_path, title="Private Step 3", order=3
+        )
+
+        funnel_url = reverse("learning-path-funnel", args=[self.private_path.id])
+        self.assertEqual(
+            self.client.get(funnel_url).status_code, status.HTTP_403_FORBIDDEN
+        )
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(funnel_url)
+        self.assertFalse(
+            any("learning_learningpathstepprogress" in query["sql"] for query in queries)
+        )
+        self.assertEqual(response.data["learners"], 2)
+        self.assertEqual(
+            [
+                (row["step"], row["unstarted"], row["in_progress"], row["completed"])
+                for row in response.data["steps"]
+            ],
+            [
+                (self.step_private_1.id, 0, 1, 1),
+                (self.step_private_2.id, 1, 0, 1),
+                (step_3.id, 2, 0, 0),
+            ],
+        )
+
+        def rollups():
+            return list(
+                LearningPathStepRollup.objects.order_by("step_id").values_list(
+                    "step_id", "unstarted", "in_progress", "completed"
+                )
+            )
+
+        maintained = rollups()
+        call_command("rebuild_step_rollups", stdout=StringIO())
+        self.assertEqual(rollups(), maintained)
+
+        LearningPathProgress.objects.get(user_profile=other.profile).delete()
+        response = self.client.get(funnel_url)
+        self.assertEqual(response.data["learners"], 1)
+        self.assertEqual(
+            [row["in_progress"] for row in response.data["steps"]], [0, 0, 0]
+        )
+        maintained = rollups()
+        call_command("rebuild_step_rollups", stdout=StringIO())
+        self.assertEqual(rollups(), maintained)
+
+    def test_seeded_data_is_consistent_and_every_endpoint_benchmarks(self):
+        spec = SeedSpec(paths=6, steps=3, blocks=2, users=12, enrollment_rate=0.5)
+        report = seed(spec)
+        self.assertEqual((report.paths, report.steps, report.blocks), (6, 18, 36))
+        seeded = LearningPathProgress.objects.filter(
+            user_profile__user__username__startswith="seed-user-"
+        )
+        self.assertEqual(seeded.count(), report.progress)
+        self.assertFalse(seeded.with_counter_drift().exists())
+        rollups = list(
+            LearningPathStepRollup.objects.order_by("step_id").values_list()
+        )
+        LearningPathStepRollup.rebuild()
+        self.assertEqual(
+            list(LearningPathStepRollup.objects.order_by("step_id").values_list()),
+            rollups,
+        )
+
+        results = run_benchmark(spec, iterations=1, warmup=0)
+        self.assertEqual(
+            [result.name for result in results],
+            [endpoint.name for endpoint in ENDPOINTS],
+        )
+        for result in results:
+            summary = result.summary()
+            self.assertLess(max(summary["statuses"]), 400, summary)
+        # Writes are rolled back between calls.
+        self.assertEqual(seeded.count(), report.progress)
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    def test_every_endpoint_stays_within_its_query_budget(self):
+        self.assertQueryBudgets()
+
+    def test_deleting_a_path_tombstones_its_progress_in_one_statement(self):
+        seed(self.large_spec)
+        learning_path = LearningPath.objects.filter(progress_entries__isnull=False)[0]
+        path_id = learning_path.pk
+        progress = dict(
+            learning_path.progress_entries.values_list("pk", "user_profile_id")
+        )
+        with CaptureQueriesContext(connection) as queries:
+            learning_path.delete()
+        inserts = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "learning_learningpathprogresstombstone" in query["sql"]
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            dict(
+                LearningPathProgressTombstone.objects.filter(
+                    learning_path_id=path_id
+                ).values_list("progress_id", "user_profile_id")
+            ),
+            progress,
+        )
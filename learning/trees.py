@@ -0,0 +1,154 @@
+"""Read-only fast path for serialized learning path trees.
+
+Loads paths, steps and blocks as flat `values()` rows (one query per level)
+and assembles the nested representation with dict lookups instead of DRF
+field objects. The output must stay identical to `LearningPathSerializer`;
+`learning.tests` compares the rendered bytes of both.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Iterable
+
+from django.db.models import Count, QuerySet
+from rest_framework import serializers
+
+from .models import LearningPathStep, LearningPathStepBlock
+from .serializers import (
+    LearningPathContentOptions,
+    LearningPathSerializer,
+    LearningPathStepBlockSerializer,
+    LearningPathStepSerializer,
+)
+
+PATH_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "is_public",
+    "owner_id",
+    "created_at",
+    "updated_at",
+)
+STEP_FIELDS = ("id", "learning_path_id", "title", "order", "created_at", "updated_at")
+BLOCK_FIELDS = (
+    "id",
+    "step_id",
+    "order",
+    "block_type",
+    "text",
+    "image",
+    "caption",
+    "created_at",
+    "updated_at",
+)
+
+# Shared with the serializers so timezone and format settings apply alike.
+_datetime = serializers.DateTimeField()
+_image_storage = LearningPathStepBlock._meta.get_field("image").storage
+
+
+def path_rows(queryset: QuerySet, options: LearningPathContentOptions) -> QuerySet:
+    """Turn a learning path queryset into the flat rows `build_path_trees` reads."""
+    fields = list(PATH_FIELDS)
+    if options.step_count:
+        queryset = queryset.annotate(step_count=Count("steps", distinct=True))
+        fields.append("step_count")
+    return queryset.prefetch_related(None).values(*fields)
+
+
+def build_path_trees(
+    rows: Iterable[dict[str, Any]],
+    options: LearningPathContentOptions,
+    request=None,
+) -> list[dict[str, Any]]:
+    rows = list(rows)
+    steps_by_path = (
+        _load_steps([row["id"] for row in rows], options, request)
+        if options.steps
+        else {}
+    )
+    names = list(options.prune(dict.fromkeys(LearningPathSerializer.Meta.fields)))
+    trees = []
+    for row in rows:
+        values = {
+            "id": row["id"],
+            "title": row["title"],
+            "description": row["description"],
+            "is_public": row["is_public"],
+            "owner": row["owner_id"],
+            "step_count": row.get("step_count"),
+            "created_at": _datetime.to_representation(row["created_at"]),
+            "updated_at": _datetime.to_representation(row["updated_at"]),
+        }
+        if options.steps:
+            values["steps"] = steps_by_path.get(row["id"], [])
+        trees.append({name: values[name] for name in names})
+    return trees
+
+
+def _load_steps(
+    path_ids: list[int], options: LearningPathContentOptions, request
+) -> dict[int, list[dict[str, Any]]]:
+    step_rows = list(
+        LearningPathStep.objects.filter(learning_path_id__in=path_ids)
+        .order_by("learning_path_id", "order")
+        .values(*STEP_FIELDS)
+    )
+    blocks_by_step = (
+        _load_blocks([row["id"] for row in step_rows], request)
+        if options.blocks
+        else {}
+    )
+    names = [
+        name
+        for name in LearningPathStepSerializer.Meta.fields
+        if options.blocks or name != "blocks"
+    ]
+    steps_by_path = defaultdict(list)
+    for row in step_rows:
+        values = {
+            "id": row["id"],
+            "title": row["title"],
+            "order": row["order"],
+            "blocks": blocks_by_step.get(row["id"], []),
+            "created_at": _datetime.to_representation(row["created_at"]),
+            "updated_at": _datetime.to_representation(row["updated_at"]),
+        }
+        steps_by_path[row["learning_path_id"]].append(
+            {name: values[name] for name in names}
+        )
+    return steps_by_path
+
+
+def _load_blocks(step_ids: list[int], request) -> dict[int, list[dict[str, Any]]]:
+    blocks_by_step = defaultdict(list)
+    block_rows = LearningPathStepBlock.objects.filter(step_id__in=step_ids).values(
+        *BLOCK_FIELDS
+    )
+    for row in block_rows:
+        values = {
+            "id": row["id"],
+            "order": row["order"],
+            "block_type": row["block_type"],
+            "text": row["text"],
+            "image": _image_url(row["image"], request),
+            "caption": row["caption"],
+            "created_at": _datetime.to_representation(row["created_at"]),
+            "updated_at": _datetime.to_representation(row["updated_at"]),
+        }
+        blocks_by_step[row["step_id"]].append(
+            {name: values[name] for name in LearningPathStepBlockSerializer.Meta.fields}
+        )
+    return blocks_by_step
+
+
+def _image_url(name: str | None, request) -> str | None:
+    # Mirrors `serializers.ImageField.to_representation`.
+    if not name:
+        return None
+    url = _image_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
@@ -1,63 +1,181 @@
 from __future__ import annotations
 
-from django.db.models import Prefetch, Q
+import io
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count,
+    F,
+    FilteredRelation,
+    Prefetch,
+    Q,
+    prefetch_related_objects,
+)
+from django.http import StreamingHttpResponse
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
-from accounts.models import UserProfile
+from accounts.authentication import ProfileClaims, get_profile_claims
+from main.db_routing import use_primary
+from main.timing import SERIALIZE, measure
 
+from .access import get_access_index
+from .cache import ContentValidators, content_rows, get_or_build, versioned_key
+from .enrollment import PROFILE_ID, USERNAME, enroll_learners, read_learner_csv
+from .export import CONTENT_TYPES, RENDERERS, export_queryset, export_rows
 from .models import (
     LearningPath,
     LearningPathProgress,
     LearningPathStep,
     LearningPathStepProgress,
 )
+from .pagination import LearningPathPagination, LearningPathProgressPagination
 from .serializers import (
+    EnrollmentRequestSerializer,
+    LearningPathContentOptions,
+    LearningPathDashboardSerializer,
+    LearningPathFunnelStepSerializer,
     LearningPathProgressSerializer,
+    LearningPathProgressTombstoneSerializer,
     LearningPathSerializer,
+    ProgressChangesQuerySerializer,
+    ProgressExportQuerySerializer,
+    ProgressPushRowSerializer,
 )
 from .permissions import CanManageLearningPaths
+from .renderers import FastJSONRenderer
+from .sync import pull_progress_changes, push_progress_documents
+from .trees import build_path_trees, path_rows
+
+# Read actions served by `learning.trees` when LEARNING_FAST_READ_PATH is on.
+FAST_READ_ACTIONS = frozenset({"list", "retrieve", "public", "assigned", "started"})
+# Detail actions that only need the path row itself from `get_object()`.
+CONTENT_FREE_ACTIONS = frozenset({"enrollments", "funnel"})
+
+
+def step_progress_prefetch() -> Prefetch:
+    return Prefetch(
+        "step_progress_entries",
+        queryset=LearningPathStepProgress.objects.select_related("step"),
+    )
 
 
 class LearningPathViewSet(viewsets.ModelViewSet):
     serializer_class = LearningPathSerializer
+    pagination_class = LearningPathPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, CanManageLearningPaths]
     http_method_names = ["get", "post", "put", "patch", "delete", "head", "options"]
 
     def get_queryset(self):
-        base_queryset = (
-            LearningPath.objects.all()
-            .select_related("owner")
-            .prefetch_related(
-                Prefetch(
-                    "steps",
-                    queryset=LearningPathStep.objects.order_by("order").prefetch_related(
-                        "blocks"
-                    ),
-                )
-            )
-            .order_by("title")
-        )
+        if getattr(self, "action", None) in CONTENT_FREE_ACTIONS:
+            return self._visible_queryset()
+        if self._fast_read():
+            # Content is loaded by `learning.trees`, not by prefetches.
+            return self._visible_queryset()
+        return self._with_content(self._visible_queryset())
+
+    def _fast_read(self) -> bool:
+        action_name = getattr(self, "action", None)
+        return settings.LEARNING_FAST_READ_PATH and action_name in FAST_READ_ACTIONS
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not self._fast_read():
+            return renderers
+        return [
+            FastJSONRenderer() if type(renderer) is JSONRenderer else renderer
+            for renderer in renderers
+        ]
+
+    def _visible_queryset(self):
+        base_queryset = LearningPath.objects.order_by("title")
 
         user = self.request.user
         if not user.is_authenticated:
             return base_queryset.filter(is_public=True)
 
-        profile: UserProfile | None
-        try:
-            profile = user.profile
-        except UserProfile.DoesNotExist:
-            profile = None
-
-        if profile and profile.can_manage_all_learning_paths:
+        profile = get_profile_claims(user)
+        if not profile:
+            return base_queryset.filter(is_public=True)
+        if profile.can_manage_all_learning_paths:
             return base_queryset
+        index = get_access_index(profile.id, profile.user_id)
+        return base_queryset.filter(index.visible_filter())
+
+    def _with_content(self, queryset):
+        """Load only the nested content the requested representation renders."""
+        options = self._content_options()
+        if options.steps:
+            steps = LearningPathStep.objects.order_by("order")
+            if options.blocks:
+                steps = steps.prefetch_related("blocks")
+            queryset = queryset.prefetch_related(Prefetch("steps", queryset=steps))
+        if options.step_count:
+            queryset = queryset.annotate(step_count=Count("steps", distinct=True))
+        return queryset
+
+    def _output_variant(self, paginated: bool = True) -> tuple:
+        """What shapes a read response besides its rows, for cache keys and
+        ETags: the origin of absolute URLs, the path, the representation and
+        the page. Other query parameters are left out so they cannot mint
+        cache entries."""
+        request = self.request
+        variant = (
+            request.build_absolute_uri("/"),
+            request.path,
+            self._content_options(),
+        )
+        if paginated:
+            variant += (
+                request.query_params.get(self.paginator.cursor_query_param),
+                self.paginator.get_page_size(request),
+            )
+        return variant
+
+    def _page_rows(self, queryset) -> list[tuple]:
+        """Version rows of just the requested page, for its validators."""
+        return content_rows(self.paginator.window(queryset, self.request))
+
+    def _paginated_content(self, queryset):
+        if self._fast_read():
+            options = self._content_options()
+            page = self.paginate_queryset(path_rows(queryset, options))
+            with measure(SERIALIZE):
+                data = build_path_trees(page, options, self.request)
+        else:
+            page = self.paginate_queryset(self._with_content(queryset))
+            data = self.get_serializer(page, many=True).data
+        return self.paginator.get_paginated_payload(data)
+
+    def _detail_content(self):
+        learning_path = self.get_object()
+        if not self._fast_read():
+            return self.get_serializer(learning_path).data
+        options = self._content_options()
+        rows = path_rows(LearningPath.objects.filter(pk=learning_path.pk), options)
+        with measure(SERIALIZE):
+            return build_path_trees(rows, options, self.request)[0]
+
+    def _content_options(self) -> LearningPathContentOptions:
+        # Write responses always render the full tree.
+        if self.request.method not in permissions.SAFE_METHODS:
+            return LearningPathContentOptions()
+        if not hasattr(self, "_parsed_content_options"):
+            self._parsed_content_options = LearningPathContentOptions.from_query_params(
+                self.request.query_params
+            )
+        return self._parsed_content_options
 
-        filters = Q(is_public=True) | Q(assigned_profiles__user=user)
-        if profile:
-            filters |= Q(owner=profile)
-        return base_queryset.filter(filters).distinct()
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None:
+            context["content_options"] = self._content_options()
+        return context
 
     def get_object(self):
         learning_path = super().get_object()
@@ -66,24 +184,74 @@ class LearningPathViewSet(viewsets.ModelViewSet):
             if not user.is_authenticated:
                 raise PermissionDenied("Authentication required.")
             profile = self._get_profile()
-            if (
-                learning_path.owner_id == profile.id
-                or profile.can_manage_all_learning_paths
-                or learning_path.assigned_profiles.filter(id=profile.id).exists()
-            ):
+            if profile.can_manage_all_learning_paths or get_access_index(
+                profile.id, profile.user_id
+            ).can_view(learning_path):
                 return learning_path
             raise PermissionDenied("You do not have access to this learning path.")
         return learning_path
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self._visible_queryset())
+        validators = ContentValidators.for_rows(
+            self._page_rows(queryset), *self._output_variant()
+        )
+        return self._conditional_response(
+            validators, lambda: Response(self._paginated_content(queryset))
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            rows = content_rows(self._visible_queryset().filter(pk=kwargs["pk"]))
+        except (TypeError, ValueError):
+            rows = []
+        if not rows:
+            # Unknown or hidden path: let get_object() produce the error.
+            return Response(self._detail_content())
+        validators = ContentValidators.for_rows(
+            rows, *self._output_variant(paginated=False)
+        )
+        return self._conditional_response(
+            validators, lambda: Response(self._detail_content()), collection=False
+        )
+
     def perform_create(self, serializer):
         profile = self._get_profile()
-        serializer.save(owner=profile)
+        serializer.save(owner_id=profile.id)
 
-    def _get_profile(self) -> UserProfile:
-        try:
-            return self.request.user.profile
-        except UserProfile.DoesNotExist as exc:
-            raise PermissionDenied("User profile not found.") from exc
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop("partial", False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        # Steps and blocks are read-only here, so unlike DRF's update() the
+        # prefetched content is kept instead of being reloaded step by step.
+        return Response(serializer.data)
+
+    def _conditional_response(self, validators, render, collection=True):
+        """Answer with 304 before serializing if the client copy is current."""
+        not_modified = validators.not_modified(
+            self.request, use_last_modified=not collection
+        )
+        if not_modified is not None:
+            return not_modified
+        return validators.apply(render())
+
+    def _get_profile(self) -> ProfileClaims:
+        profile = get_profile_claims(self.request.user)
+        if profile is None:
+            raise PermissionDenied("User profile not found.")
+        return profile
+
+    def _require_manager(self, learning_path: LearningPath, message: str) -> None:
+        # Unlike `CanManageLearningPaths`, owners need no creation flag here.
+        profile = self._get_profile()
+        if not (
+            profile.can_manage_all_learning_paths
+            or learning_path.owner_id == profile.id
+        ):
+            raise PermissionDenied(message)
 
     @action(
         detail=False,
@@ -91,20 +259,19 @@ class LearningPathViewSet(viewsets.ModelViewSet):
         url_path="public",
     )
     def public(self, request):
-        queryset = (
-            LearningPath.objects.filter(is_public=True)
-            .prefetch_related(
-                Prefetch(
-                    "steps",
-                    queryset=LearningPathStep.objects.order_by("order").prefetch_related(
-                        "blocks"
-                    ),
-                )
+        variant = self._output_variant()
+
+        def build():
+            queryset = LearningPath.objects.filter(is_public=True)
+            validators = ContentValidators.for_rows(
+                self._page_rows(queryset), *variant
             )
-            .order_by("title")
+            return self._paginated_content(queryset), validators
+
+        data, validators = get_or_build(
+            versioned_key("public-catalog", *variant), build
         )
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self._conditional_response(validators, lambda: Response(data))
 
     @action(
         detail=False,
@@ -113,21 +280,15 @@ class LearningPathViewSet(viewsets.ModelViewSet):
     )
     def assigned(self, request):
         profile = self._get_profile()
-        queryset = (
-            LearningPath.objects.filter(assigned_profiles=profile)
-            .prefetch_related(
-                Prefetch(
-                    "steps",
-                    queryset=LearningPathStep.objects.order_by("order").prefetch_related(
-                        "blocks"
-                    ),
-                )
-            )
-            .order_by("title")
-            .distinct()
+        queryset = LearningPath.objects.filter(
+            id__in=get_access_index(profile.id, profile.user_id).assigned
+        )
+        validators = ContentValidators.for_rows(
+            self._page_rows(queryset), *self._output_variant()
+        )
+        return self._conditional_response(
+            validators, lambda: Response(self._paginated_content(queryset))
         )
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
 
     @action(
         detail=False,
@@ -135,28 +296,111 @@ class LearningPathViewSet(viewsets.ModelViewSet):
         url_path="started",
     )
     def started(self, request):
+        profile = self._get_profile()
+        queryset = LearningPath.objects.filter(
+            progress_entries__user_profile_id=profile.id,
+            progress_entries__started_at__isnull=False,
+        )
+        return Response(self._paginated_content(queryset))
+
+    @action(
+        detail=False,
+        permission_classes=[permissions.IsAuthenticated],
+        url_path="dashboard",
+    )
+    def dashboard(self, request):
+        """Per-path progress summaries for the learner's home page.
+
+        One query per page: the learner's progress row is joined through a
+        `FilteredRelation` and steps are counted in the same statement.
+        """
         profile = self._get_profile()
         queryset = (
-            LearningPath.objects.filter(progress_entries__user_profile=profile)
-            .filter(
-                progress_entries__step_progress_entries__status__in=[
-                    LearningPathStepProgress.Status.IN_PROGRESS,
-                    LearningPathStepProgress.Status.COMPLETED,
-                ]
+            self._visible_queryset()
+            .annotate(
+                my_progress=FilteredRelation(
+                    "progress_entries",
+                    condition=Q(progress_entries__user_profile_id=profile.id),
+                ),
+                step_count=Count("steps", distinct=True),
             )
-            .prefetch_related(
-                Prefetch(
-                    "steps",
-                    queryset=LearningPathStep.objects.order_by("order").prefetch_related(
-                        "blocks"
-                    ),
-                )
+            .values(
+                "id",
+                "title",
+                "step_count",
+                progress=F("my_progress__id"),
+                completed_steps=F("my_progress__completed_steps"),
+                in_progress_steps=F("my_progress__in_progress_steps"),
+                last_step=F("my_progress__last_step_id"),
+                is_completed=F("my_progress__is_completed"),
+                started_at=F("my_progress__started_at"),
             )
-            .order_by("title")
-            .distinct()
         )
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(queryset)
+        serializer = LearningPathDashboardSerializer(page, many=True)
+        return Response(self.paginator.get_paginated_payload(serializer.data))
+
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[permissions.IsAuthenticated],
+        url_path="enrollments",
+    )
+    def enrollments(self, request, pk=None):
+        """Assign the path to many learners; owners and global editors only."""
+        learning_path = self.get_object()
+        self._require_manager(learning_path, "Only the path owner can enroll learners.")
+        body = EnrollmentRequestSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        learners = chain(
+            ((PROFILE_ID, value) for value in body.validated_data["profile_ids"]),
+            ((USERNAME, value) for value in body.validated_data["usernames"]),
+        )
+        upload = body.validated_data.get("file")
+        if upload is not None:
+            lines = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+            learners = chain(learners, read_learner_csv(lines))
+        try:
+            with transaction.atomic():
+                report = enroll_learners(learning_path, learners)
+        except ValueError as exc:
+            raise ValidationError({"file": str(exc)}) from exc
+        return Response(report.as_dict())
+
+    @action(
+        detail=True,
+        permission_classes=[permissions.IsAuthenticated],
+        url_path="funnel",
+    )
+    def funnel(self, request, pk=None):
+        """Learners per status at each step; owners and global editors only."""
+        learning_path = self.get_object()
+        self._require_manager(
+            learning_path, "Only the path owner can view its analytics."
+        )
+        rows = list(
+            LearningPathStep.objects.filter(learning_path=learning_path)
+            .order_by("order")
+            .values(
+                "id",
+                "title",
+                "order",
+                "rollup__unstarted",
+                "rollup__in_progress",
+                "rollup__completed",
+            )
+        )
+        steps = LearningPathFunnelStepSerializer(rows, many=True).data
+        if steps:
+            first = steps[0]
+            learners = first["unstarted"] + first["in_progress"] + first["completed"]
+        else:
+            learners = LearningPathProgress.objects.filter(
+                learning_path=learning_path
+            ).count()
+        return Response(
+            {"learning_path": learning_path.id, "learners": learners, "steps": steps}
+        )
 
     @action(
         detail=True,
@@ -167,9 +411,12 @@ class LearningPathViewSet(viewsets.ModelViewSet):
         learning_path = self.get_object()
         profile = self._get_profile()
         progress, _ = LearningPathProgress.objects.get_or_create(
-            user_profile=profile,
+            user_profile_id=profile.id,
             learning_path=learning_path,
         )
+        # Reuse the already prefetched steps for the unstarted placeholders.
+        progress.learning_path = learning_path
+        prefetch_related_objects([progress], step_progress_prefetch())
         serializer = LearningPathProgressSerializer(
             progress, context=self.get_serializer_context()
         )
@@ -178,20 +425,16 @@ class LearningPathViewSet(viewsets.ModelViewSet):
 
 class LearningPathProgressViewSet(viewsets.ModelViewSet):
     serializer_class = LearningPathProgressSerializer
+    pagination_class = LearningPathProgressPagination
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ["get", "post", "put", "patch"]
 
     def get_queryset(self):
         profile = self._get_profile()
         return (
-            LearningPathProgress.objects.filter(user_profile=profile)
+            LearningPathProgress.objects.filter(user_profile_id=profile.id)
             .select_related("learning_path", "last_step")
-            .prefetch_related(
-                Prefetch(
-                    "step_progress_entries",
-                    queryset=LearningPathStepProgress.objects.select_related("step"),
-                )
-            )
+            .prefetch_related("learning_path__steps", step_progress_prefetch())
             .order_by("learning_path__title")
         )
 
@@ -199,13 +442,15 @@ class LearningPathProgressViewSet(viewsets.ModelViewSet):
         if learning_path.is_public:
             return True
         profile = self._get_profile()
-        return learning_path.assigned_profiles.filter(pk=profile.pk).exists()
+        return get_access_index(profile.id, profile.user_id).is_assigned(
+            learning_path
+        )
 
-    def _get_profile(self) -> UserProfile:
-        try:
-            return self.request.user.profile
-        except UserProfile.DoesNotExist as exc:
-            raise PermissionDenied("User profile not found.") from exc
+    def _get_profile(self) -> ProfileClaims:
+        profile = get_profile_claims(self.request.user)
+        if profile is None:
+            raise PermissionDenied("User profile not found.")
+        return profile
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -236,3 +481,70 @@ class LearningPathProgressViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save()
 
+    @action(detail=False, methods=["get"], url_path="changes")
+    # A checkpoint taken on a lagging replica would skip the missing writes.
+    @use_primary()
+    def changes(self, request):
+        query = ProgressChangesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        profile = self._get_profile()
+        batch = pull_progress_changes(
+            self.get_queryset(),
+            profile.id,
+            query.validated_data.get("checkpoint"),
+            query.validated_data["limit"],
+        )
+        context = self.get_serializer_context()
+        documents = []
+        for document in batch.documents:
+            if isinstance(document, LearningPathProgress):
+                data = {
+                    **LearningPathProgressSerializer(document, context=context).data,
+                    "deleted": False,
+                }
+            else:
+                data = LearningPathProgressTombstoneSerializer(
+                    document, context=context
+                ).data
+            documents.append(data)
+        return Response(
+            {
+                "documents": documents,
+                "checkpoint": batch.checkpoint.encode() if batch.checkpoint else None,
+            }
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[permissions.IsAdminUser],
+        url_path="export",
+    )
+    def export(self, request):
+        """Stream every matching progress record as CSV or NDJSON (staff only)."""
+        query = ProgressExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        output = query.validated_data["output"]
+        queryset = export_queryset(
+            query.validated_data["learning_path"],
+            query.validated_data.get("updated_after"),
+            query.validated_data.get("updated_before"),
+        )
+        response = StreamingHttpResponse(
+            RENDERERS[output](export_rows(queryset)),
+            content_type=CONTENT_TYPES[output],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="learning-progress.{output}"'
+        )
+        return response
+
+    @action(detail=False, methods=["post"], url_path="push")
+    def push(self, request):
+        rows = ProgressPushRowSerializer(data=request.data, many=True)
+        rows.is_valid(raise_exception=True)
+        profile = self._get_profile()
+        conflict_ids = push_progress_documents(profile.id, rows.validated_data)
+        conflicts = self.get_queryset().filter(id__in=conflict_ids)
+        serializer = self.get_serializer(conflicts, many=True)
+        return Response({"conflicts": serializer.data})
@@ -0,0 +1,53 @@
+"""Whether the default cache is shared between worker processes.
+
+The content version (`learning.cache`), the access index (`learning.access`)
+and the primary pins of `main.db_routing` live in the default cache, and
+every worker has to see their changes. A process-local backend keeps them
+in the memory of the worker that made them, so the others serve stale data
+until their own entries expire.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS
+
+logger = logging.getLogger(__name__)
+
+PROCESS_LOCAL_BACKENDS = frozenset(
+    {
+        "django.core.cache.backends.locmem.LocMemCache",
+        "django.core.cache.backends.dummy.DummyCache",
+    }
+)
+
+LOCAL_CACHE_MESSAGE = "The default cache is local to each process."
+LOCAL_CACHE_HINT = (
+    "Set DJANGO_CACHE_URL to a cache all workers share (Redis, Memcached, "
+    "database or file). Otherwise content updates, access revocations and "
+    "replica pins only reach the worker that made them."
+)
+
+
+def is_shared_backend(backend: str) -> bool:
+    return backend not in PROCESS_LOCAL_BACKENDS
+
+
+def default_cache_is_shared() -> bool:
+    return is_shared_backend(settings.CACHES[DEFAULT_CACHE_ALIAS]["BACKEND"])
+
+
+def check_shared_cache(app_configs=None, **kwargs) -> list[checks.CheckMessage]:
+    """`manage.py check --deploy`: warn about a process-local default cache."""
+    if default_cache_is_shared():
+        return []
+    return [checks.Warning(LOCAL_CACHE_MESSAGE, hint=LOCAL_CACHE_HINT, id="main.W001")]
+
+
+def warn_if_cache_is_local() -> None:
+    """Log the deploy check's warning when a production worker starts."""
+    if not settings.DEBUG and not default_cache_is_shared():
+        logger.warning("%s %s", LOCAL_CACHE_MESSAGE, LOCAL_CACHE_HINT)
@@ -0,0 +1,75 @@
+"""Connection settings for the database engines we deploy on.
+
+`configure()` finishes a `DATABASES` entry parsed from a URL:
+
+- PostgreSQL aliases get a psycopg 3 connection pool when one is configured,
+  so workers borrow open connections instead of connecting per request.
+  Django refuses persistent connections on a pooled alias, so `CONN_MAX_AGE`
+  drops to 0 there: the pool keeps the connections alive instead.
+- SQLite aliases run `PRAGMA`s on every new connection (WAL, a busy timeout,
+  `synchronous=NORMAL`, memory-mapped reads) and open write transactions
+  with `BEGIN IMMEDIATE`. A deferred transaction that reads before writing
+  cannot wait for the write lock and fails with "database is locked" at
+  once; an immediate one takes the lock up front and waits for it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+SQLITE_ENGINE = "django.db.backends.sqlite3"
+POSTGRES_ENGINE = "django.db.backends.postgresql"
+
+
+@dataclass(frozen=True)
+class PoolOptions:
+    """Keyword arguments for `psycopg_pool.ConnectionPool`; times in seconds."""
+
+    min_size: int = 2
+    max_size: int = 10
+    timeout: float = 30.0
+    max_idle: float = 600.0
+
+    def as_dict(self) -> dict:
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "timeout": self.timeout,
+            "max_idle": self.max_idle,
+        }
+
+
+@dataclass(frozen=True)
+class SQLiteTuning:
+    busy_timeout_ms: int = 5000
+    mmap_size: int = 128 * 1024 * 1024
+
+    def init_command(self) -> str:
+        pragmas = [
+            # Persistent in the file; readers no longer block the writer.
+            "PRAGMA journal_mode=WAL",
+            # Durable across crashes of the app in WAL mode, without an
+            # fsync per commit.
+            "PRAGMA synchronous=NORMAL",
+            f"PRAGMA busy_timeout={self.busy_timeout_ms}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+        ]
+        return ";".join(pragmas)
+
+
+def configure(
+    config: dict,
+    *,
+    pool: PoolOptions | None = None,
+    sqlite: SQLiteTuning | None = None,
+) -> dict:
+    """Apply the pool or SQLite tuning matching the engine of `config`."""
+    options = config.setdefault("OPTIONS", {})
+    engine = config.get("ENGINE")
+    if engine == POSTGRES_ENGINE and pool is not None:
+        options["pool"] = pool.as_dict()
+        config["CONN_MAX_AGE"] = 0
+    elif engine == SQLITE_ENGINE and sqlite is not None:
+        options["init_command"] = sqlite.init_command()
+        options["transaction_mode"] = "IMMEDIATE"
+    return config
@@ -0,0 +1,136 @@
+"""Read-replica routing for safe-method requests.
+
+`ReplicaRoutingMiddleware` picks one of `DATABASE_REPLICAS` for each GET,
+HEAD or OPTIONS request and `ReplicaRouter` sends that request's reads
+there. Everything else reads from the primary:
+
+- requests with other methods, and code running outside a request;
+- the rest of a request once it has written anything;
+- for `DATABASE_REPLICA_PIN_SECONDS` after a write, every request of the
+  user who wrote, so they read their own writes (the pin is kept in the
+  default cache, which must be shared between workers for it to hold);
+- blocks wrapped in `use_primary()`, for reads whose results outlive the
+  request (cache fills) or must not lag (the sync feed).
+
+The body of a streaming response is produced after the middleware returns;
+it is iterated under the request's routing, so an export reads from the
+same replica as the rest of its request.
+
+Without replicas configured the middleware does nothing and the router has
+no opinion, so every query goes to `default`.
+"""
+
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from accounts.authentication import authenticate_request
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+@dataclass
+class _Routing:
+    read_alias: str | None
+    wrote: bool = False
+
+
+_routing: ContextVar[_Routing | None] = ContextVar("db_routing", default=None)
+
+
+def _pin_key(user_id: int) -> str:
+    return f"db:primary-pin:{user_id}"
+
+
+def pin_to_primary(user_id: int) -> None:
+    cache.set(_pin_key(user_id), True, timeout=settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id: int) -> bool:
+    return bool(cache.get(_pin_key(user_id)))
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Read from the primary inside the block."""
+    token = _routing.set(_Routing(read_alias=None))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None:
+            return None
+        return routing.read_alias or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            # Later reads of the request must see what it wrote.
+            routing.read_alias = None
+            routing.wrote = True
+        # Explicit, or instances read from a replica would be saved there.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Route the reads of each request; place it after authentication."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return self.get_response(request)
+        read_alias = user = None
+        if request.method in SAFE_METHODS:
+            user = authenticate_request(request)
+            if user is None or not is_pinned(user.id):
+                read_alias = random.choice(replicas)
+        routing = _Routing(read_alias=read_alias)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        if response.streaming and not response.is_async:
+            response.streaming_content = _routed(response.streaming_content, routing)
+        if routing.wrote:
+            # DRF has authenticated the request by now.
+            user = user or authenticate_request(request)
+            if user is not None:
+                pin_to_primary(user.id)
+        return response
+
+
+def _routed(content: Iterable, routing: _Routing) -> Iterator:
+    """Produce each chunk of `content` under `routing`."""
+    chunks = iter(content)
+    while True:
+        token = _routing.set(routing)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            _routing.reset(token)
+        yield chunk
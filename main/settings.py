@@ -5,6 +5,9 @@ import dj_database_url
 import environ
 from pathlib import Path
 
+from main.caches import is_shared_backend
+from main.databases import PoolOptions, SQLiteTuning, configure as configure_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,15 +46,20 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt.token_blacklist',
     'learning.apps.LearningConfig',
     'accounts.apps.AccountsConfig',
+    'monitoring.apps.MonitoringConfig',
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers the rest of the stack.
+    'monitoring.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'main.db_routing.ReplicaRoutingMiddleware',
+    'monitoring.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,21 +87,151 @@ WSGI_APPLICATION = 'main.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Connection management (main.databases): PostgreSQL aliases use a psycopg
+# pool when DATABASE_POOL is set, SQLite ones are tuned for concurrent writes
+# unless DATABASE_SQLITE_TUNING is off.
+_database_pool = (
+    PoolOptions(
+        min_size=env.int("DATABASE_POOL_MIN_SIZE", default=2),
+        max_size=env.int("DATABASE_POOL_MAX_SIZE", default=10),
+        timeout=env.float("DATABASE_POOL_TIMEOUT", default=30.0),
+        max_idle=env.float("DATABASE_POOL_MAX_IDLE", default=600.0),
+    )
+    if env.bool("DATABASE_POOL", default=False)
+    else None
+)
+_sqlite_tuning = (
+    SQLiteTuning(
+        busy_timeout_ms=env.int("DATABASE_SQLITE_BUSY_TIMEOUT_MS", default=5000),
+        mmap_size=env.int("DATABASE_SQLITE_MMAP_SIZE", default=128 * 1024 * 1024),
+    )
+    if env.bool("DATABASE_SQLITE_TUNING", default=True)
+    else None
+)
 
-DATABASE_URL = env("DATABASE_URL", default=None)
-if DATABASE_URL:
-    DATABASES["default"] = dj_database_url.parse(
-        DATABASE_URL,
-        conn_max_age=env.int("DATABASE_CONN_MAX_AGE", default=600),
-        ssl_require=env.bool("DATABASE_SSL_REQUIRE", default=False),
+
+def _database(url: str | None = None) -> dict:
+    if url is None:
+        config = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    else:
+        config = dj_database_url.parse(
+            url,
+            conn_max_age=env.int("DATABASE_CONN_MAX_AGE", default=600),
+            ssl_require=env.bool("DATABASE_SSL_REQUIRE", default=False),
+        )
+    return configure_database(
+        config, pool=_database_pool, sqlite=_sqlite_tuning
     )
 
+
+DATABASE_URL = env("DATABASE_URL", default=None)
+DATABASES = {"default": _database(DATABASE_URL)}
+
+# Read replicas (main.db_routing): comma-separated URLs, registered as
+# `replica_1`, `replica_2`, ... Safe-method requests read from one of them;
+# a user who wrote reads from the primary for DATABASE_REPLICA_PIN_SECONDS.
+# Tests mirror the replicas onto `default`.
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), start=1):
+    alias = f"replica_{index}"
+    DATABASES[alias] = _database(url)
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["main.db_routing.ReplicaRouter"]
+DATABASE_REPLICA_PIN_SECONDS = env.int("DATABASE_REPLICA_PIN_SECONDS", default=10)
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Accepts django-environ cache URLs, e.g. `locmemcache://`,
+# `filecache:///var/tmp/bodo_os_cache` or `dbcache://bodo_os_cache`
+# (run `manage.py createcachetable` for the database backend).
+# Deployments with more than one worker process need a shared backend: the
+# locmem default keeps content versions, access invalidations and replica
+# pins in the memory of the worker that wrote them (see main.caches).
+
+CACHES = {
+    'default': env.cache_url('DJANGO_CACHE_URL', default='locmemcache://'),
+}
+_shared_cache = is_shared_backend(CACHES['default']['BACKEND'])
+
+# Seconds a serialized public catalogue stays cached; content changes
+# invalidate it immediately on shared caches. With a process-local cache the
+# other workers only catch up when their copy expires, hence the short default.
+LEARNING_CATALOG_CACHE_TIMEOUT = env.int(
+    'LEARNING_CATALOG_CACHE_TIMEOUT', default=3600 if _shared_cache else 60
+)
+
+# Seconds a profile's cached set of visible private paths lives; enrollment,
+# membership and ownership changes invalidate it on commit. 0 loads it for
+# every check, the default with a process-local cache, which could not
+# carry revocations to the other workers.
+LEARNING_ACCESS_CACHE_TIMEOUT = env.int(
+    'LEARNING_ACCESS_CACHE_TIMEOUT', default=3600 if _shared_cache else 0
+)
+
+# Default and maximum `page_size` of learning path and progress listings.
+LEARNING_PAGE_SIZE = env.int('LEARNING_PAGE_SIZE', default=50)
+LEARNING_MAX_PAGE_SIZE = env.int('LEARNING_MAX_PAGE_SIZE', default=200)
+
+# Serve learning path reads from flat `values()` rows (learning.trees) and
+# encode them with orjson when installed. Output is identical either way.
+LEARNING_FAST_READ_PATH = env.bool('LEARNING_FAST_READ_PATH', default=True)
+
+# The sync feed (`/api/progress/changes/`) holds back changes younger than
+# this: they are stamped before their transaction commits, and a checkpoint
+# past them would skip writes stamped earlier that commit later. Keep it
+# above the longest progress write plus the clock skew between servers.
+LEARNING_SYNC_SAFETY_LAG_SECONDS = env.float(
+    'LEARNING_SYNC_SAFETY_LAG_SECONDS', default=5.0
+)
+
+# Where new progress records keep step statuses: "rows" (one
+# LearningPathStepProgress per step) or "compact" (an encoded map on the
+# progress record). Convert existing records with `convert_step_statuses`.
+# Other values fail the `learning.E001` system check.
+LEARNING_STEP_STATUS_STORAGE = env.str('LEARNING_STEP_STATUS_STORAGE', default='rows')
+
+# Per-request timings (monitoring.middleware.ServerTimingMiddleware): send
+# them to clients as a `Server-Timing` header (off by default, as every
+# client, anonymous ones included, would see them), and keep the last N
+# requests of each view action for `/api/monitoring/stats/` (0 disables).
+MONITORING_SERVER_TIMING = env.bool('MONITORING_SERVER_TIMING', default=False)
+MONITORING_STATS_WINDOW = env.int('MONITORING_STATS_WINDOW', default=1000)
+
+# On-demand profiles of single requests for staff (`X-Profile: cprofile` or
+# `?_profile=sample`; monitoring.middleware.ProfilingMiddleware). Artifacts
+# are written below MONITORING_PROFILE_DIR and listed in the admin; at most
+# MONITORING_PROFILE_EXPLAIN_LIMIT distinct SELECTs are explained per profile.
+# Off by default. SQL parameter values (emails, learner data) are written to
+# disk only with MONITORING_PROFILE_SQL_PARAMS; otherwise they are redacted.
+MONITORING_PROFILING = env.bool('MONITORING_PROFILING', default=False)
+MONITORING_PROFILE_SQL_PARAMS = env.bool('MONITORING_PROFILE_SQL_PARAMS', default=False)
+MONITORING_PROFILE_DIR = env('MONITORING_PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+MONITORING_PROFILE_EXPLAIN_LIMIT = env.int('MONITORING_PROFILE_EXPLAIN_LIMIT', default=50)
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# `monitoring.requests` writes one JSON line per request at INFO.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'monitoring.requests': {
+            'handlers': ['console'],
+            'level': env('MONITORING_LOG_LEVEL', default='WARNING' if DEBUG else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -142,7 +280,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ],
 }
 
@@ -0,0 +1,197 @@
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from learning.models import LearningPath, LearningPathProgress, LearningPathStep
+
+from .caches import check_shared_cache
+from .databases import PoolOptions, SQLiteTuning, configure
+from .db_routing import ReplicaRoutingMiddleware, use_primary
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="learner", password="pass1234"
+        )
+        self.factory = RequestFactory()
+
+    def _route(self, method: str, user=None, write: bool = False) -> list[str]:
+        """Aliases the reads of a request go to, before and after any write."""
+        aliases = []
+
+        def view(request):
+            aliases.append(router.db_for_read(LearningPath))
+            if write:
+                router.db_for_write(LearningPath)
+                aliases.append(router.db_for_read(LearningPath))
+            return HttpResponse()
+
+        request = getattr(self.factory, method)("/api/learning-paths/")
+        request.user = user or AnonymousUser()
+        self.assertEqual(ReplicaRoutingMiddleware(view)(request).status_code, 200)
+        return aliases
+
+    def test_safe_requests_read_from_a_replica_until_they_write(self):
+        self.assertEqual(self._route("get"), ["replica_1"])
+        self.assertEqual(self._route("post"), [DEFAULT_DB_ALIAS])
+        self.assertEqual(
+            self._route("get", self.user, write=True), ["replica_1", DEFAULT_DB_ALIAS]
+        )
+        # Outside a request nothing is routed.
+        self.assertEqual(router.db_for_read(LearningPath), DEFAULT_DB_ALIAS)
+
+    def test_writer_is_pinned_to_the_primary_for_a_while(self):
+        self._route("post", self.user, write=True)
+        self.assertEqual(self._route("get", self.user), [DEFAULT_DB_ALIAS])
+        self.assertEqual(self._route("get"), ["replica_1"])
+
+        cache.clear()  # The pin expired.
+        self.assertEqual(self._route("get", self.user), ["replica_1"])
+
+    def test_use_primary_and_missing_replicas_read_from_default(self):
+        aliases = []
+
+        def view(request):
+            with use_primary():
+                aliases.append(router.db_for_read(LearningPath))
+            aliases.append(router.db_for_read(LearningPath))
+            return HttpResponse()
+
+        request = self.factory.get("/")
+        request.user = AnonymousUser()
+        ReplicaRoutingMiddleware(view)(request)
+        self.assertEqual(aliases, [DEFAULT_DB_ALIAS, "replica_1"])
+
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self._route("get"), [DEFAULT_DB_ALIAS])
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class SeparateReplicaTests(APITestCase):
+    """A second, migrated SQLite file as the replica, which never catches up."""
+
+    # The replica is only added in setUpClass, after the runner checked
+    # the aliases it knows.
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        replica = {"ENGINE": "django.db.backends.sqlite3"}
+        replica["NAME"] = Path(cls.directory.name) / "replica.sqlite3"
+        default = connections.settings[DEFAULT_DB_ALIAS]
+        configured = connections.configure_settings(
+            {DEFAULT_DB_ALIAS: default, "replica_1": replica}
+        )
+        connections.settings["replica_1"] = configured["replica_1"]
+        call_command("migrate", database="replica_1", verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica_1"].close()
+        del connections["replica_1"]
+        del connections.settings["replica_1"]
+        cls.directory.cleanup()
+
+    def setUp(self):
+        cache.clear()
+        self.writer = get_user_model().objects.create_user(
+            username="writer", password="pass1234", is_staff=True
+        )
+        self.writer.profile.can_create_learning_paths = True
+        self.writer.profile.save()
+        response = self.client.post(
+            reverse("token-obtain-pair"),
+            {"username": "writer", "password": "pass1234"},
+            format="json",
+        )
+        self.bearer = f"Bearer {response.data['access']}"
+
+    def _titles(self, **headers) -> list[str]:
+        response = self.client.get(reverse("learning-path-list"), **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["title"] for item in response.data["results"]]
+
+    def test_writer_reads_own_writes_until_the_pin_expires(self):
+        cache.clear()
+        response = self.client.post(
+            reverse("learning-path-list"),
+            {"title": "Fresh", "is_public": True},
+            format="json",
+            HTTP_AUTHORIZATION=self.bearer,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self._titles(), [])
+        self.assertEqual(self._titles(HTTP_AUTHORIZATION=self.bearer), ["Fresh"])
+        cache.clear()  # The pin expired.
+        self.assertEqual(self._titles(HTTP_AUTHORIZATION=self.bearer), [])
+
+    def test_streamed_export_reads_from_the_replica(self):
+        learning_path = LearningPath.objects.create(title="Tracked")
+        LearningPathStep.objects.create(
+            learning_path=learning_path, title="Step", order=1
+        )
+        LearningPathProgress.objects.create(
+            user_profile=self.writer.profile, learning_path=learning_path
+        )
+        url = reverse("learning-path-progress-export")
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.bearer)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)  # The header; the replica has no rows.
+
+        with override_settings(DATABASE_REPLICAS=[]):
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.bearer)
+            lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    databases = {DEFAULT_DB_ALIAS}
+
+    def test_postgres_pools_instead_of_persistent_connections(self):
+        config = {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": 600}
+        configure(config, pool=PoolOptions(max_size=4), sqlite=SQLiteTuning())
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        self.assertEqual(config["OPTIONS"]["pool"]["max_size"], 4)
+
+        config = {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": 600}
+        configure(config, pool=None)
+        self.assertEqual(config["CONN_MAX_AGE"], 600)
+        self.assertNotIn("pool", config["OPTIONS"])
+
+    def test_sqlite_connections_are_tuned_for_concurrent_writes(self):
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+        pragmas = {}
+        with connection.cursor() as cursor:
+            for name in ("synchronous", "busy_timeout"):
+                cursor.execute(f"PRAGMA {name}")
+                pragmas[name] = cursor.fetchone()[0]
+        # The test database lives in memory, where WAL and mmap do not apply.
+        self.assertEqual(pragmas, {"synchronous": 1, "busy_timeout": 5000})
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_process_local_default_cache_is_reported(self):
+        self.assertEqual(
+            [message.id for message in check_shared_cache()], ["main.W001"]
+        )
+        shared = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache"}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(), [])
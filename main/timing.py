@@ -0,0 +1,104 @@
+"""Per-request timing of the phases a response goes through.
+
+`monitoring.middleware.ServerTimingMiddleware` opens a `RequestTimings` for
+each request; code running inside it reports into the current one through
+`measure()` and the database execute wrapper. Outside a request every hook
+is a no-op, so apps can time their phases without depending on `monitoring`.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from rest_framework.serializers import ListSerializer
+
+SERIALIZE = "serialize"
+RENDER = "render"
+
+
+@dataclass
+class RequestTimings:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db_ms: float = 0.0
+    phases_ms: dict[str, float] = field(default_factory=dict)
+    _open: set[str] = field(default_factory=set)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def add(self, phase: str, ms: float) -> None:
+        self.phases_ms[phase] = self.phases_ms.get(phase, 0.0) + ms
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+@contextmanager
+def collect() -> Iterator[RequestTimings]:
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def measure(phase: str) -> Iterator[None]:
+    """Add the time spent in the block to `phase` of the current request.
+
+    Nested blocks of the same phase count once, so a serializer rendering
+    nested serializers is not timed twice.
+    """
+    timings = _current.get()
+    if timings is None or phase in timings._open:
+        yield
+        return
+    timings._open.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._open.discard(phase)
+        timings.add(phase, (time.perf_counter() - started) * 1000)
+
+
+class TimedSerializerMixin:
+    """Time `serializer.data` as the `serialize` phase of the current request.
+
+    Mix it into the serializers views respond with, and set
+    `Meta.list_serializer_class = TimedListSerializer` on those used with
+    `many=True`. Nested serializers are timed as part of their parent.
+    """
+
+    @property
+    def data(self):
+        with measure(SERIALIZE):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    pass
+
+
+def percentile(ordered: list[float], percent: int) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
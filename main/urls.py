@@ -7,6 +7,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('accounts.urls')),
     path('api/', include('learning.urls')),
+    path('api/', include('monitoring.urls')),
 ]
 
 if settings.DEBUG:
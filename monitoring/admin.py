@@ -0,0 +1,76 @@
+import json
+
+from django.contrib import admin
+from django.utils.html import format_html, format_html_join
+
+from .models import RequestProfile
+from .profiling import QUERIES_FILE, SUMMARY_FILE, read_artifact
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "method",
+        "path",
+        "view",
+        "status_code",
+        "duration_ms",
+        "queries",
+        "db_ms",
+        "user",
+    )
+    list_filter = ("mode", "method", "status_code")
+    search_fields = ("path", "view", "user__username")
+    date_hierarchy = "created_at"
+    list_select_related = ("user",)
+    fields = (
+        "created_at",
+        "user",
+        "method",
+        "path",
+        "view",
+        "status_code",
+        "mode",
+        "duration_ms",
+        "queries",
+        "db_ms",
+        "directory",
+        "profile_summary",
+        "sql",
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Profile")
+    def profile_summary(self, obj):
+        summary = read_artifact(obj, SUMMARY_FILE)
+        if summary is None:
+            return "Artifacts missing."
+        return format_html("<pre>{}</pre>", summary)
+
+    @admin.display(description="SQL and query plans")
+    def sql(self, obj):
+        queries = read_artifact(obj, QUERIES_FILE)
+        if queries is None:
+            return "Artifacts missing."
+        return format_html_join(
+            "",
+            "<pre>{}. {} ms [{}]\n{}\nparams: {}\n\n{}</pre>",
+            (
+                (
+                    index,
+                    f"{query['ms']:.2f}",
+                    query["alias"],
+                    query["sql"],
+                    query["params"],
+                    query["plan"] or "",
+                )
+                for index, query in enumerate(json.loads(queries), start=1)
+            ),
+        )
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+
+from accounts.authentication import authenticate_request
+from main.timing import RENDER, SERIALIZE, collect, current
+
+from .profiling import (
+    MODES,
+    ProfilerUnavailable,
+    explain,
+    requested_mode,
+    run_profiled,
+    store,
+)
+from .stats import Sample, endpoint_stats
+
+logger = logging.getLogger("monitoring.requests")
+
+UNRESOLVED = "<unresolved>"
+
+
+class ServerTimingMiddleware:
+    """Time each request and report it as `Server-Timing`, a log line and stats.
+
+    Place it first in `MIDDLEWARE` so the total covers the other middleware.
+    Database time is collected with an execute wrapper on every configured
+    connection; the body of a streaming response is produced after the
+    middleware returns and is not included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect() as timings, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings.record_query))
+            response = self.get_response(request)
+            total_ms = timings.elapsed_ms()
+        view = getattr(request, "timing_view", None) or UNRESOLVED
+        if settings.MONITORING_SERVER_TIMING:
+            metrics = [
+                f'db;dur={timings.db_ms:.1f};desc="{timings.queries} queries"',
+                *(f"{phase};dur={ms:.1f}" for phase, ms in timings.phases_ms.items()),
+                f"total;dur={total_ms:.1f}",
+            ]
+            if response.has_header("Server-Timing"):
+                metrics.insert(0, response["Server-Timing"])
+            response["Server-Timing"] = ", ".join(metrics)
+        if logger.isEnabledFor(logging.INFO):
+            record = {
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "user_id": getattr(getattr(request, "user", None), "id", None),
+                "queries": timings.queries,
+                "db_ms": round(timings.db_ms, 2),
+                "serialize_ms": round(timings.phases_ms.get(SERIALIZE, 0.0), 2),
+                "render_ms": round(timings.phases_ms.get(RENDER, 0.0), 2),
+                "total_ms": round(total_ms, 2),
+            }
+            logger.info(
+                json.dumps(record, separators=(",", ":")), extra={"timing": record}
+            )
+        endpoint_stats.record(
+            view,
+            Sample(total_ms, timings.db_ms, timings.queries, response.status_code),
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timing_view = view_name(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        timings = current()
+        if timings is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add(
+                    RENDER, (time.perf_counter() - started) * 1000
+                )
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile a single request when a staff user asks for it.
+
+    Place it after `AuthenticationMiddleware`. Bearer tokens are checked
+    here already, since DRF only authenticates inside the view. The flag is
+    ignored for everyone else, so their requests are served unprofiled. The
+    id of the stored `RequestProfile` comes back as `X-Profile-Id`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request) if settings.MONITORING_PROFILING else None
+        user = authenticate_request(request) if mode else None
+        if user is None or not user.is_staff:
+            return self.get_response(request)
+        if mode not in MODES:
+            modes = ", ".join(MODES)
+            return JsonResponse(
+                {"detail": f"Unknown profiler {mode!r}; use one of: {modes}."},
+                status=400,
+            )
+        try:
+            response, run = run_profiled(mode, lambda: self.get_response(request))
+        except ProfilerUnavailable as exc:
+            return JsonResponse({"detail": str(exc)}, status=400)
+        explain(run.recorder.queries, settings.MONITORING_PROFILE_EXPLAIN_LIMIT)
+        profile = store(
+            run,
+            user_id=user.id,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            view=getattr(request, "timing_view", ""),
+            status_code=response.status_code,
+        )
+        response["X-Profile-Id"] = str(profile.pk)
+        return response
+
+
+def view_name(view_func, method: str) -> str:
+    """`LearningPathViewSet.list` for viewset actions, the class name for
+    other class-based views and the dotted path for function views."""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return f"{view_func.__module__}.{view_func.__qualname__}"
+    action = (getattr(view_func, "actions", None) or {}).get(method.lower())
+    return f"{cls.__name__}.{action}" if action else cls.__name__
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """Index entry of a profiled request; the artifacts live on disk.
+
+    `directory` is relative to `MONITORING_PROFILE_DIR`; see
+    `monitoring.profiling`.
+    """
+
+    class Mode(models.TextChoices):
+        CPROFILE = "cprofile", "Deterministic (cProfile)"
+        SAMPLE = "sample", "Sampled (pyinstrument)"
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    view = models.CharField(max_length=255, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    mode = models.CharField(max_length=16, choices=Mode.choices)
+    duration_ms = models.FloatField()
+    queries = models.PositiveIntegerField()
+    db_ms = models.FloatField()
+    directory = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path} ({self.created_at:%Y-%m-%d %H:%M:%S})"
@@ -0,0 +1,223 @@
+"""On-demand Python profiles of single requests, for staff.
+
+A staff user asks for one with the `X-Profile` header or the `_profile`
+query parameter, naming the profiler: `cprofile` (deterministic, the
+default) or `sample` (pyinstrument, when installed). The request runs under
+that profiler with its SQL captured; afterwards every distinct SELECT is
+explained and the artifacts are written to a directory of their own under
+`MONITORING_PROFILE_DIR`, indexed by a `RequestProfile` row for the admin.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import pstats
+import time
+import uuid
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from .models import RequestProfile
+
+try:
+    import pyinstrument
+except ImportError:  # pragma: no cover - optional profiler
+    pyinstrument = None
+
+CPROFILE = RequestProfile.Mode.CPROFILE
+SAMPLE = RequestProfile.Mode.SAMPLE
+MODES = tuple(RequestProfile.Mode.values)
+
+HEADER = "HTTP_X_PROFILE"
+QUERY_PARAMETER = "_profile"
+
+SUMMARY_FILE = "profile.txt"
+QUERIES_FILE = "queries.json"
+# Raw profiler output: pstats data for cProfile, an HTML report otherwise.
+RAW_FILES = {CPROFILE: "profile.prof", SAMPLE: "profile.html"}
+# Stored in place of SQL parameter values unless MONITORING_PROFILE_SQL_PARAMS.
+REDACTED = "<redacted>"
+
+
+class ProfilerUnavailable(Exception):
+    pass
+
+
+def requested_mode(request) -> str | None:
+    """The profiler name a request asks for, `None` when it asks for none.
+
+    The name is not validated; compare it against `MODES`.
+    """
+    value = request.META.get(HEADER) or request.GET.get(QUERY_PARAMETER)
+    if not value:
+        return None
+    value = value.strip().lower()
+    return CPROFILE if value in ("1", "true") else value
+
+
+@dataclass
+class CapturedQuery:
+    alias: str
+    sql: str
+    params: Any
+    ms: float
+    plan: str | None = None
+
+
+class QueryRecorder:
+    """Execute wrapper keeping every statement with its parameters."""
+
+    def __init__(self):
+        self.queries: list[CapturedQuery] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                CapturedQuery(
+                    alias=context["connection"].alias,
+                    sql=sql,
+                    params=params,
+                    ms=(time.perf_counter() - started) * 1000,
+                )
+            )
+
+
+@dataclass
+class ProfileRun:
+    mode: str
+    profiler: Any
+    recorder: QueryRecorder
+    duration_ms: float = 0.0
+
+    def summary(self) -> str:
+        if self.mode == SAMPLE:
+            return self.profiler.output_text(unicode=True)
+        out = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(60)
+        return out.getvalue()
+
+    def write_raw(self, path: Path) -> None:
+        if self.mode == SAMPLE:
+            path.write_text(self.profiler.output_html())
+        else:
+            self.profiler.dump_stats(path)
+
+
+def run_profiled(mode: str, func: Callable[[], Any]) -> tuple[Any, ProfileRun]:
+    """Call `func` under the `mode` profiler, recording its SQL."""
+    if mode == SAMPLE:
+        if pyinstrument is None:
+            raise ProfilerUnavailable("Sampling needs pyinstrument installed.")
+        profiler = pyinstrument.Profiler()
+        start, stop = profiler.start, profiler.stop
+    else:
+        profiler = cProfile.Profile()
+        start, stop = profiler.enable, profiler.disable
+    run = ProfileRun(mode, profiler, QueryRecorder())
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(run.recorder))
+        started = time.perf_counter()
+        start()
+        try:
+            result = func()
+        finally:
+            stop()
+            run.duration_ms = (time.perf_counter() - started) * 1000
+    return result, run
+
+
+def explain(queries: list[CapturedQuery], limit: int) -> None:
+    """Attach the query plan of each distinct SELECT, up to `limit` of them."""
+    plans: dict[tuple[str, str, str], str] = {}
+    for query in queries:
+        if not query.sql.lstrip().upper().startswith("SELECT"):
+            continue
+        key = (query.alias, query.sql, repr(query.params))
+        if key not in plans:
+            if len(plans) >= limit:
+                continue
+            plans[key] = _plan(query)
+        query.plan = plans[key]
+
+
+def store(run: ProfileRun, **fields) -> RequestProfile:
+    """Write the artifacts of `run` and index them with a `RequestProfile`."""
+    directory = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    path = profile_root() / directory
+    path.mkdir(parents=True)
+    run.write_raw(path / RAW_FILES[run.mode])
+    (path / SUMMARY_FILE).write_text(run.summary())
+    params = _jsonable if settings.MONITORING_PROFILE_SQL_PARAMS else _redacted
+    queries = [
+        {**asdict(query), "params": params(query.params)}
+        for query in run.recorder.queries
+    ]
+    (path / QUERIES_FILE).write_text(json.dumps(queries, indent=2))
+    return RequestProfile.objects.create(
+        directory=directory,
+        mode=run.mode,
+        duration_ms=run.duration_ms,
+        queries=len(queries),
+        db_ms=sum(query.ms for query in run.recorder.queries),
+        **fields,
+    )
+
+
+def profile_root() -> Path:
+    return Path(settings.MONITORING_PROFILE_DIR)
+
+
+def read_artifact(profile: RequestProfile, name: str) -> str | None:
+    try:
+        return (profile_root() / profile.directory / name).read_text()
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
+
+
+def _plan(query: CapturedQuery) -> str:
+    connection = connections[query.alias]
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {query.sql}", query.params)
+            rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def _redacted(params: Any) -> Any:
+    """Keep the shape of `params` but none of the values."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: REDACTED for key in params}
+    if isinstance(params, (list, tuple)):
+        return [REDACTED] * len(params)
+    return REDACTED
+
+
+def _jsonable(params: Any) -> Any:
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: _jsonable(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_jsonable(value) for value in params]
+    if isinstance(params, (str, int, float, bool)):
+        return params
+    return str(params)
+
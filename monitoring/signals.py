@@ -0,0 +1,14 @@
+import shutil
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import RequestProfile
+from .profiling import profile_root
+
+
+@receiver(post_delete, sender=RequestProfile)
+def remove_profile_artifacts(sender, instance, **kwargs):
+    path = profile_root() / instance.directory
+    transaction.on_commit(lambda: shutil.rmtree(path, ignore_errors=True))
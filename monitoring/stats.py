@@ -0,0 +1,70 @@
+"""Rolling per-endpoint latency windows, kept in process memory.
+
+Each worker process keeps the last `MONITORING_STATS_WINDOW` requests of
+every endpoint; the stats endpoint reports the process that answers it.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+
+from main.timing import percentile
+
+
+@dataclass(frozen=True)
+class Sample:
+    total_ms: float
+    db_ms: float
+    queries: int
+    status: int
+
+
+class EndpointStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows: dict[str, deque[Sample]] = {}
+
+    def record(self, endpoint: str, sample: Sample) -> None:
+        size = settings.MONITORING_STATS_WINDOW
+        if size <= 0:
+            return
+        with self._lock:
+            window = self._windows.get(endpoint)
+            if window is None or window.maxlen != size:
+                window = self._windows[endpoint] = deque(window or (), maxlen=size)
+            window.append(sample)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+    def summary(self) -> list[dict[str, Any]]:
+        with self._lock:
+            windows = {name: list(window) for name, window in self._windows.items()}
+        return [
+            _summarize(name, samples) for name, samples in sorted(windows.items())
+        ]
+
+
+def _summarize(name: str, samples: list[Sample]) -> dict[str, Any]:
+    totals = sorted(sample.total_ms for sample in samples)
+    db = sorted(sample.db_ms for sample in samples)
+    return {
+        "endpoint": name,
+        "count": len(samples),
+        "errors": sum(sample.status >= 500 for sample in samples),
+        "p50_ms": round(percentile(totals, 50), 2),
+        "p95_ms": round(percentile(totals, 95), 2),
+        "p99_ms": round(percentile(totals, 99), 2),
+        "max_ms": round(totals[-1], 2),
+        "db_p95_ms": round(percentile(db, 95), 2),
+        "queries_max": max(sample.queries for sample in samples),
+    }
+
+
+endpoint_stats = EndpointStats()
@@ -0,0 +1,185 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APITestCase
+
+from learning.models import LearningPath
+
+from .models import RequestProfile
+from .profiling import QUERIES_FILE, RAW_FILES, REDACTED, SUMMARY_FILE
+from .stats import endpoint_stats
+
+
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        endpoint_stats.clear()
+        self.staff = get_user_model().objects.create_user(
+            username="ops", password="pass1234", is_staff=True
+        )
+        self.learner = get_user_model().objects.create_user(
+            username="learner", password="pass1234"
+        )
+        LearningPath.objects.create(title="Public", is_public=True)
+
+    @override_settings(MONITORING_SERVER_TIMING=True)
+    def test_timings_are_sent_logged_and_aggregated_per_view_action(self):
+        url = reverse("learning-path-list")
+        with self.assertLogs("monitoring.requests", "INFO") as logs:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = {
+            metric.split(";")[0]: metric
+            for metric in response["Server-Timing"].split(", ")
+        }
+        self.assertEqual(set(metrics), {"db", "serialize", "render", "total"})
+        self.assertRegex(metrics["db"], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record, logs.records[0].timing)
+        self.assertEqual(record["view"], "LearningPathViewSet.list")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertGreater(record["serialize_ms"], 0)
+        self.assertGreaterEqual(
+            record["total_ms"], record["db_ms"] + record["render_ms"]
+        )
+
+        self.client.post(url, {"title": "Denied"}, format="json")
+        stats_url = reverse("monitoring-stats")
+        self.client.force_authenticate(self.learner)
+        self.assertEqual(
+            self.client.get(stats_url).status_code, status.HTTP_403_FORBIDDEN
+        )
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        endpoints = {row["endpoint"]: row for row in response.data["endpoints"]}
+        self.assertEqual(endpoints["LearningPathViewSet.list"]["count"], 1)
+        self.assertEqual(endpoints["LearningPathViewSet.create"]["count"], 1)
+        self.assertEqual(endpoints["EndpointStatsView"]["count"], 1)
+
+        self.assertEqual(
+            self.client.delete(stats_url).status_code, status.HTTP_204_NO_CONTENT
+        )
+        self.assertEqual(
+            [row["endpoint"] for row in self.client.get(stats_url).data["endpoints"]],
+            ["EndpointStatsView"],
+        )
+
+    @override_settings(MONITORING_SERVER_TIMING=True, LEARNING_FAST_READ_PATH=False)
+    def test_timed_serializers_report_the_serialize_phase(self):
+        self.client.force_authenticate(self.learner)
+        response = self.client.get(reverse("learning-path-list"))
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+        # DRF's own classes are left as they are.
+        self.assertEqual(
+            BaseSerializer.data.fget.__module__, "rest_framework.serializers"
+        )
+
+    @override_settings(MONITORING_STATS_WINDOW=0)
+    def test_header_is_off_by_default_and_stats_can_be_turned_off(self):
+        response = self.client.get(reverse("learning-path-public"))
+        self.assertFalse(response.has_header("Server-Timing"))
+        self.assertEqual(endpoint_stats.summary(), [])
+
+
+class ProfilingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        settings_override = override_settings(
+            MONITORING_PROFILING=True, MONITORING_PROFILE_DIR=directory.name
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff = get_user_model().objects.create_superuser(
+            username="ops", password="pass1234"
+        )
+        get_user_model().objects.create_user(username="learner", password="pass1234")
+        LearningPath.objects.create(title="Public", is_public=True)
+
+    def _bearer(self, username: str) -> str:
+        response = self.client.post(
+            reverse("token-obtain-pair"),
+            {"username": username, "password": "pass1234"},
+            format="json",
+        )
+        return f"Bearer {response.data['access']}"
+
+    def test_staff_token_profiles_a_request_with_sql_and_plans(self):
+        url = reverse("learning-path-progress-list")
+        response = self.client.get(
+            url, HTTP_AUTHORIZATION=self._bearer("ops"), HTTP_X_PROFILE="cprofile"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual(profile.user, self.staff)
+        self.assertEqual(profile.view, "LearningPathProgressViewSet.list")
+        self.assertEqual((profile.method, profile.path), ("GET", url))
+        self.assertEqual(profile.mode, RequestProfile.Mode.CPROFILE)
+
+        directory = self.root / profile.directory
+        self.assertTrue((directory / RAW_FILES[profile.mode]).exists())
+        self.assertIn("cumulative", (directory / SUMMARY_FILE).read_text())
+        queries = json.loads((directory / QUERIES_FILE).read_text())
+        self.assertEqual(len(queries), profile.queries)
+        selects = [query for query in queries if query["sql"].startswith("SELECT")]
+        self.assertTrue(selects)
+        self.assertTrue(all(query["plan"] for query in selects))
+        params = [value for query in queries for value in query["params"] or ()]
+        self.assertTrue(params)
+        self.assertEqual(set(params), {REDACTED})
+
+        with self.settings(MONITORING_PROFILE_SQL_PARAMS=True):
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION=self._bearer("ops"), HTTP_X_PROFILE="1"
+            )
+        stored = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        queries = json.loads(
+            (self.root / stored.directory / QUERIES_FILE).read_text()
+        )
+        self.assertIn(
+            [self.staff.profile.id],
+            [query["params"] for query in queries],
+        )
+
+        self.client.force_login(self.staff)
+        page = self.client.get(
+            reverse("admin:monitoring_requestprofile_change", args=[profile.pk])
+        )
+        self.assertContains(page, "cumulative")
+        self.assertContains(page, "learning_learningpathprogress")
+        self.assertEqual(
+            self.client.get(
+                reverse("admin:monitoring_requestprofile_changelist")
+            ).status_code,
+            status.HTTP_200_OK,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.delete()
+        self.assertFalse(directory.exists())
+
+    def test_flag_is_ignored_for_others_and_validated_for_staff(self):
+        url = reverse("learning-path-list")
+        for headers in ({}, {"HTTP_AUTHORIZATION": self._bearer("learner")}):
+            response = self.client.get(url, {"_profile": "cprofile"}, **headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertFalse(RequestProfile.objects.exists())
+
+        response = self.client.get(
+            url, {"_profile": "flame"}, HTTP_AUTHORIZATION=self._bearer("ops")
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RequestProfile.objects.exists())
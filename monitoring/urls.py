@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import EndpointStatsView
+
+
+urlpatterns = [
+    path("monitoring/stats/", EndpointStatsView.as_view(), name="monitoring-stats"),
+]
@@ -0,0 +1,24 @@
+from django.conf import settings
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .stats import endpoint_stats
+
+
+class EndpointStatsView(APIView):
+    """Rolling latency percentiles per view action, for staff."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "window": settings.MONITORING_STATS_WINDOW,
+                "endpoints": endpoint_stats.summary(),
+            }
+        )
+
+    def delete(self, request):
+        endpoint_stats.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)